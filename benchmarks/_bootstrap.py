@@ -0,0 +1,44 @@
+"""Helpers for loading add-on submodules outside of Blender.
+
+The add-on packages import ``bpy`` from ``__init__.py``. Their pure-Python
+helper modules do not, so benchmarks register an empty package object for the
+add-on and import only the submodules they need. Benchmarks that run inside
+Blender import the whole package with ``load_addon``.
+"""
+import importlib
+import importlib.util
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _package_spec(addon, name):
+    package_dir = os.path.join(REPO_ROOT, addon)
+    return importlib.util.spec_from_file_location(
+        name,
+        os.path.join(package_dir, "__init__.py"),
+        submodule_search_locations=[package_dir],
+    )
+
+
+def load_addon_module(addon, module):
+    """Import ``<addon>.<module>`` without executing the add-on's __init__.py."""
+    if addon not in sys.modules:
+        sys.modules[addon] = importlib.util.module_from_spec(_package_spec(addon, addon))
+    return importlib.import_module(f"{addon}.{module}")
+
+
+def load_addon(addon, name=None):
+    """Import the whole add-on package from a clean module cache.
+
+    ``name`` is the module name to import it as and defaults to ``addon``.
+    """
+    name = name or addon
+    for loaded in [m for m in sys.modules if m == name or m.startswith(name + ".")]:
+        del sys.modules[loaded]
+    spec = _package_spec(addon, name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,150 @@
+"""Hide/show time of hideX for large numbers of objects.
+
+Generates a scene of N linked duplicates of one small mesh, then times
+hiding all of them and showing them again, each followed by a depsgraph
+update, with hideX's batched engine and with the per-object loop hideX used
+before (three property writes and a ``hide_set`` per object). The legacy loop
+re-syncs the view layer on every write, so it is skipped above
+``--legacy-limit`` objects.
+
+The batched engine is timed with both hide methods: ``flags`` writes each
+object's viewport/render visibility, ``exclude`` moves the objects into
+hideX's generated collection that is excluded from the view layers.
+
+It also times switching between two hide sets that share a third of the
+objects, which only touches the objects that differ.
+
+    blender -b --factory-startup --python benchmarks/hidex_visibility.py -- --counts 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+
+# Blender does not put the script's folder on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_addon  # noqa: E402
+
+
+def generate_scene(count):
+    """Link ``count`` objects sharing one mesh into a new collection."""
+    mesh = bpy.data.meshes.new("hidex_bench")
+    mesh.from_pydata([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [], [(0, 1, 2)])
+    collection = bpy.data.collections.new("hidex_bench")
+    bpy.context.scene.collection.children.link(collection)
+    objects = []
+    for i in range(count):
+        obj = bpy.data.objects.new(f"hidex_bench_{i}", mesh)
+        obj.location = (i % 100, (i // 100) % 100, i // 10000)
+        collection.objects.link(obj)
+        objects.append(obj)
+    bpy.context.view_layer.update()
+    return collection, mesh, objects
+
+
+def remove_scene(collection, mesh, objects):
+    bpy.data.batch_remove(objects)
+    bpy.data.collections.remove(collection)
+    bpy.data.meshes.remove(mesh)
+
+
+def is_hidden(obj):
+    return not obj.visible_get()
+
+
+def legacy_hide(scene, objects):
+    for obj in objects:
+        hidden_obj = scene.hidex_hidden_objects.add()
+        hidden_obj.object_pointer = obj
+        hidden_obj.original_hide_viewport = obj.hide_viewport
+        hidden_obj.original_hide_render = obj.hide_render
+        obj.hide_viewport = True
+        obj.hide_render = True
+        obj.hide_set(True)
+
+
+def legacy_show(scene):
+    records = scene.hidex_hidden_objects
+    for i in range(len(records) - 1, -1, -1):
+        hidden_obj = records[i]
+        obj = hidden_obj.object_pointer
+        if obj is not None:
+            obj.hide_viewport = hidden_obj.original_hide_viewport
+            obj.hide_render = hidden_obj.original_hide_render
+            obj.hide_set(hidden_obj.original_hide_viewport)
+        records.remove(i)
+
+
+def batched_hide(hidex, scene, objects):
+    hidex.hide_objects(scene, objects)
+
+
+def batched_show(hidex, scene):
+    hidex.show_objects(scene)
+
+
+def switch_sets(hidex, scene, objects):
+    """Time switching from a hide set of the first two thirds to one of the last two thirds."""
+    third = len(objects) // 3
+    set_a = scene.hidex_hide_sets.add()
+    hidex.store_hide_set(set_a, objects[:2 * third])
+    set_b = scene.hidex_hide_sets.add()
+    hidex.store_hide_set(set_b, objects[third:])
+    try:
+        hidex.apply_hide_set(scene, set_a)
+        bpy.context.view_layer.update()
+        elapsed = timed(hidex.apply_hide_set, scene, set_b)
+        assert not any(is_hidden(obj) for obj in objects[:third])
+        assert all(is_hidden(obj) for obj in objects[third:])
+        hidex.show_objects(scene)
+    finally:
+        scene.hidex_hide_sets.clear()
+    return elapsed
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    bpy.context.view_layer.update()
+    return time.perf_counter() - start
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-limit", type=int, default=10000, help="skip the legacy loop above this count")
+    args = parser.parse_args(argv)
+
+    hidex = load_addon("hideX")
+    hidex.register()
+    scene = bpy.context.scene
+    try:
+        print(f"{'objects':>8} {'engine':<8} {'hide':>10} {'show':>10} {'switch set':>11}")
+        for count in args.counts:
+            collection, mesh, objects = generate_scene(count)
+            try:
+                for method, engine in (('PROPERTIES', "flags"), ('EXCLUDE', "exclude")):
+                    scene.hidex_hide_method = method
+                    hide = timed(batched_hide, hidex, scene, objects)
+                    assert all(is_hidden(obj) for obj in objects)
+                    show = timed(batched_show, hidex, scene)
+                    assert not any(is_hidden(obj) or obj.hide_render for obj in objects)
+                    switch = switch_sets(hidex, scene, objects)
+                    print(f"{count:8d} {engine:<8} {hide * 1000:7.1f} ms {show * 1000:7.1f} ms {switch * 1000:8.1f} ms")
+                scene.hidex_hide_method = 'PROPERTIES'
+
+                if count <= args.legacy_limit:
+                    hide = timed(legacy_hide, scene, objects)
+                    show = timed(legacy_show, scene)
+                    print(f"{count:8d} {'legacy':<8} {hide * 1000:7.1f} ms {show * 1000:7.1f} ms")
+            finally:
+                scene.hidex_hidden_objects.clear()
+                remove_scene(collection, mesh, objects)
+    finally:
+        hidex.unregister()
+
+
+main()
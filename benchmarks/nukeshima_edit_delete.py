@@ -0,0 +1,177 @@
+"""Latency of Nukeshima's X in edit mode on high-poly meshes.
+
+Builds a grid of about N faces, selects a patch of it in edit mode and times
+the two parts of a smart delete: deciding the delete type from the
+selection, and the delete itself. The decision is timed with Nukeshima's
+selection counters and with the scan used before, which built Python lists
+of the selected BMesh vertices, edges and faces on every press. "X before"
+is that scan plus ``bpy.ops.mesh.delete``; "X now" is Nukeshima's whole
+edit-mode path, ``delete_in_edit_meshes``, on a freshly selected patch.
+
+A second table covers multi-object edit mode: ``--objects`` grids are edited
+together and a patch of each is deleted, with Nukeshima's per-mesh bmesh
+engine and with one ``bpy.ops.mesh.delete`` call over all of them.
+
+    blender -b --factory-startup --python benchmarks/nukeshima_edit_delete.py -- --faces 1000000 5000000
+    blender -b --factory-startup --python benchmarks/nukeshima_edit_delete.py -- --faces --objects 200
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+import bmesh
+import bpy
+
+# Blender does not put the script's folder on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_addon  # noqa: E402
+
+
+def generate_grid(faces):
+    """Add a grid with about ``faces`` faces and enter edit mode on it"""
+    side = max(1, round(math.sqrt(faces)))
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=side, y_subdivisions=side, size=100)
+    obj = bpy.context.active_object
+    bpy.ops.object.mode_set(mode='EDIT')
+    return obj
+
+
+def remove_grid(obj):
+    bpy.ops.object.mode_set(mode='OBJECT')
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+
+def generate_grids(count, faces):
+    """Add ``count`` grids of about ``faces`` faces each and edit them together"""
+    side = max(1, round(math.sqrt(faces)))
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=side, y_subdivisions=side, size=10)
+    base = bpy.context.active_object
+    objects = [base]
+    for i in range(1, count):
+        obj = bpy.data.objects.new(f"nukeshima_bench_{i}", base.data.copy())
+        obj.location = (i % 20 * 12, i // 20 * 12, 0)
+        bpy.context.scene.collection.objects.link(obj)
+        obj.select_set(True)
+        objects.append(obj)
+    bpy.ops.object.mode_set(mode='EDIT')
+    return objects
+
+
+def remove_grids(objects):
+    bpy.ops.object.mode_set(mode='OBJECT')
+    meshes = [obj.data for obj in objects]
+    bpy.data.batch_remove(objects + meshes)
+
+
+def select_patch(obj, count):
+    """Select the first ``count`` faces (and their edges and vertices)"""
+    bm = bmesh.from_edit_mesh(obj.data)
+    bm.faces.ensure_lookup_table()
+    for i in range(min(count, len(bm.faces))):
+        bm.faces[i].select_set(True)
+    bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+
+def select_patches(objects, count):
+    bpy.ops.mesh.select_all(action='DESELECT')
+    for obj in objects:
+        select_patch(obj, count)
+
+
+def multi_object(nukeshima, args):
+    objects = generate_grids(args.objects, args.object_faces)
+    try:
+        select_patches(objects, args.selected_per_object)
+        start = time.perf_counter()
+        changed = nukeshima.delete_in_edit_meshes(bpy.context.objects_in_mode)
+        engine = time.perf_counter() - start
+        assert changed == len(objects)
+
+        select_patches(objects, args.selected_per_object)
+        start = time.perf_counter()
+        bpy.ops.mesh.delete(type='FACE')
+        operator = time.perf_counter() - start
+        assert not any(obj.data.total_face_sel for obj in objects)
+
+        print(f"{'objects':>8} {'faces each':>10} {'selected':>8} {'bmesh engine':>13} {'mesh.delete':>12}")
+        print(f"{len(objects):8d} {len(objects[0].data.polygons):10d} {args.selected_per_object:8d} "
+              f"{engine * 1000:10.1f} ms {operator * 1000:9.1f} ms")
+    finally:
+        remove_grids(objects)
+
+
+def legacy_decision(mesh):
+    bm = bmesh.from_edit_mesh(mesh)
+    selected_verts = [v for v in bm.verts if v.select]
+    selected_edges = [e for e in bm.edges if e.select]
+    selected_faces = [f for f in bm.faces if f.select]
+    if selected_faces:
+        return 'FACE'
+    if selected_edges:
+        return 'EDGE'
+    if selected_verts:
+        return 'VERT'
+    return None
+
+
+def median_time(func, arg, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--faces", type=int, nargs="*", default=[1000000, 5000000])
+    parser.add_argument("--selected", type=int, default=1000, help="faces selected before the delete")
+    parser.add_argument("--repeat", type=int, default=5, help="timed decisions per mesh (median)")
+    parser.add_argument("--objects", type=int, default=0, help="also time multi-object edit mode with this many grids")
+    parser.add_argument("--object-faces", type=int, default=2500, help="faces per grid in multi-object edit mode")
+    parser.add_argument("--selected-per-object", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    nukeshima = load_addon("nukeshima")
+    if args.faces:
+        print(f"{'faces':>9} {'selected':>8} {'list scan':>11} {'counters':>10} {'X before':>10} {'X now':>10}")
+    for faces in args.faces:
+        obj = generate_grid(faces)
+        try:
+            mesh = obj.data
+            total = len(mesh.polygons)
+            bpy.ops.mesh.select_all(action='DESELECT')
+            select_patch(obj, args.selected)
+            legacy, legacy_type = median_time(legacy_decision, mesh, args.repeat)
+            fast, fast_type = median_time(nukeshima.smart_delete_type, mesh, args.repeat)
+            assert fast_type == legacy_type == 'FACE'
+
+            start = time.perf_counter()
+            bpy.ops.mesh.delete(type=legacy_type)
+            operator = time.perf_counter() - start
+
+            # What X runs now: the counters and the bmesh delete, on a new patch
+            select_patch(obj, args.selected)
+            start = time.perf_counter()
+            changed = nukeshima.delete_in_edit_meshes([obj])
+            now = time.perf_counter() - start
+            assert changed == 1 and not mesh.total_face_sel
+            print(f"{total:9d} {args.selected:8d} {legacy * 1000:8.1f} ms "
+                  f"{fast * 1e6:7.1f} us {(legacy + operator) * 1000:7.1f} ms {now * 1000:7.1f} ms")
+        finally:
+            remove_grid(obj)
+
+    if args.objects:
+        print()
+        multi_object(nukeshima, args)
+
+
+main()
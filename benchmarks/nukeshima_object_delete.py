@@ -0,0 +1,111 @@
+"""Object mode delete time of Nukeshima for large selections.
+
+Generates N objects, each with its own small mesh, sharing one material
+(with an image texture) per ``--per-material`` objects. Everything is
+selected and deleted three ways:
+
+- ``operator``: ``bpy.ops.object.delete(use_global=False, confirm=False)``,
+  the call Nukeshima used before
+- ``batch``: Nukeshima's ``bpy.data.batch_remove`` path
+- ``batch+purge``: the same with unused meshes, materials and images purged
+
+The meshes, materials and images left without users afterwards are counted
+too, since that memory is only reclaimed when the file is saved and
+reopened or orphans are purged.
+
+    blender -b --factory-startup --python benchmarks/nukeshima_object_delete.py -- --counts 1000 10000 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+
+# Blender does not put the script's folder on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_addon  # noqa: E402
+
+
+def new_material(index):
+    material = bpy.data.materials.new(f"nukeshima_bench_{index}")
+    material.use_nodes = True
+    texture = material.node_tree.nodes.new('ShaderNodeTexImage')
+    texture.image = bpy.data.images.new(f"nukeshima_bench_{index}", 64, 64)
+    return material
+
+
+def generate_objects(count, per_material):
+    """Link ``count`` selected objects, each with its own mesh, into the scene"""
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(False)
+    base = bpy.data.meshes.new("nukeshima_bench")
+    base.from_pydata([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [], [(0, 1, 2)])
+    collection = bpy.context.scene.collection
+    material = None
+    for i in range(count):
+        if i % per_material == 0:
+            material = new_material(i // per_material)
+        mesh = base.copy()
+        mesh.materials.append(material)
+        obj = bpy.data.objects.new(f"nukeshima_bench_{i}", mesh)
+        obj.location = (i % 100, (i // 100) % 100, i // 10000)
+        collection.objects.link(obj)
+        obj.select_set(True)
+    bpy.data.meshes.remove(base)
+
+
+def orphans():
+    """(meshes, materials, images) without users"""
+    return tuple(sum(1 for id_data in collection if id_data.users == 0)
+                 for collection in (bpy.data.meshes, bpy.data.materials, bpy.data.images))
+
+
+def purge_orphans():
+    for collection in (bpy.data.meshes, bpy.data.materials, bpy.data.images):
+        bpy.data.batch_remove([id_data for id_data in collection if id_data.users == 0])
+
+
+def operator_delete(nukeshima):
+    bpy.ops.object.delete(use_global=False, confirm=False)
+
+
+def batch_delete(nukeshima):
+    nukeshima.delete_objects(bpy.context.selected_objects)
+
+
+def batch_purge_delete(nukeshima):
+    nukeshima.delete_objects(bpy.context.selected_objects, purge_data=True)
+
+
+METHODS = (
+    ("operator", operator_delete),
+    ("batch", batch_delete),
+    ("batch+purge", batch_purge_delete),
+)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--per-material", type=int, default=100, help="objects sharing one material and image")
+    args = parser.parse_args(argv)
+
+    nukeshima = load_addon("nukeshima")
+    print(f"{'objects':>8} {'method':<12} {'delete':>11}  orphaned meshes/materials/images")
+    for count in args.counts:
+        for name, method in METHODS:
+            generate_objects(count, args.per_material)
+            before = len(bpy.data.objects)
+            start = time.perf_counter()
+            method(nukeshima)
+            bpy.context.view_layer.update()
+            elapsed = time.perf_counter() - start
+            assert len(bpy.data.objects) == before - count
+            meshes, materials, images = orphans()
+            print(f"{count:8d} {name:<12} {elapsed * 1000:8.1f} ms  {meshes}/{materials}/{images}")
+            purge_orphans()
+
+
+main()
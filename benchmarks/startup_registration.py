@@ -0,0 +1,220 @@
+"""Startup cost of every extension in background Blender.
+
+Each add-on is imported from a clean module cache, registered and
+unregistered, repeated ``--repeat`` times; the median of each phase is
+reported. A separate pass under ``tracemalloc`` records the Python memory
+allocated by import + ``register()`` and what is still held after
+``unregister()``. The app handlers and RNA types each add-on adds while
+registered are counted as well. Keymap items are not: the add-ons skip
+their shortcuts under ``blender -b`` and the add-on keyconfig does not
+exist there, so the count would always be 0.
+
+For add-ons with their own lookup helper (``get_text`` /
+``get_translation``) the first lookup, which loads the locale table, and the
+average cached lookup are reported too.
+
+Results can be written with ``--json`` and compared against a stored
+baseline with ``--baseline``; the script then exits non-zero when an add-on
+got slower than the tolerance allows or registers more handlers or types
+than before:
+
+    blender -b --factory-startup --python benchmarks/startup_registration.py -- --repeat 5
+    blender -b --factory-startup --python benchmarks/startup_registration.py -- --json benchmarks/startup_baseline.json
+    blender -b --factory-startup --python benchmarks/startup_registration.py -- --baseline benchmarks/startup_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import bpy
+
+# Blender does not put the script's folder on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bootstrap import load_addon  # noqa: E402
+
+ADDONS = (
+    "hideX",
+    "nukeshima",
+    "subamo",
+    "svg-importer-plus",
+    "versave",
+    "vexer",
+    "viewcam",
+    "viewpie",
+    "wizender",
+)
+
+# Lookup helper and a key it translates, per add-on
+LOOKUPS = {
+    "nukeshima": ("get_translation", "Delete Vertices"),
+    "versave": ("get_text", "no_file_open"),
+    "viewpie": ("get_translation", "Camera"),
+}
+
+LOOKUP_COUNT = 10000
+
+TIME_METRICS = ("import", "register", "unregister")
+MEMORY_METRICS = ("allocated", "retained")
+COUNT_METRICS = ("handlers", "types")
+
+
+def module_name(addon):
+    return addon.replace("-", "_")
+
+
+def import_addon(addon):
+    """Import the add-on package from a clean module cache."""
+    return load_addon(addon, module_name(addon))
+
+
+def count_registrations():
+    """Current number of app handlers and RNA types."""
+    handlers = 0
+    for name in dir(bpy.app.handlers):
+        handler_list = getattr(bpy.app.handlers, name)
+        if isinstance(handler_list, list):
+            handlers += len(handler_list)
+    return {"handlers": handlers, "types": len(dir(bpy.types))}
+
+
+def time_lookups(module, addon):
+    """(first lookup, average cached lookup) in seconds, or None."""
+    if addon not in LOOKUPS:
+        return None
+    func_name, key = LOOKUPS[addon]
+    func = getattr(module, func_name)
+    start = time.perf_counter()
+    func(key)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(LOOKUP_COUNT):
+        func(key)
+    return first, (time.perf_counter() - start) / LOOKUP_COUNT
+
+
+def measure_memory(addon):
+    """Bytes allocated by import + register, and still held after unregister."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        module = import_addon(addon)
+        module.register()
+        registered = tracemalloc.take_snapshot()
+        module.unregister()
+        del module
+        del sys.modules[module_name(addon)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in registered.compare_to(before, "filename"))
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {"allocated": allocated, "retained": retained}
+
+
+def measure(addon, repeat):
+    phases = {phase: [] for phase in TIME_METRICS}
+    lookups = []
+    counts = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        module = import_addon(addon)
+        phases["import"].append(time.perf_counter() - start)
+
+        before = count_registrations()
+        start = time.perf_counter()
+        module.register()
+        phases["register"].append(time.perf_counter() - start)
+        after = count_registrations()
+        counts = {metric: after[metric] - before[metric] for metric in COUNT_METRICS}
+
+        result = time_lookups(module, addon)
+        if result is not None:
+            lookups.append(result)
+
+        start = time.perf_counter()
+        module.unregister()
+        phases["unregister"].append(time.perf_counter() - start)
+
+    record = {phase: statistics.median(times) for phase, times in phases.items()}
+    record.update(measure_memory(addon))
+    record.update(counts)
+    if lookups:
+        record["first_lookup"] = statistics.median(first for first, _ in lookups)
+        record["cached_lookup"] = statistics.median(cached for _, cached in lookups)
+    return record
+
+
+def compare(results, baseline, tolerance, min_time, min_bytes):
+    """Regressions against the baseline, as printable lines."""
+    regressions = []
+    for addon, record in results.items():
+        base = baseline.get("addons", {}).get(addon)
+        if base is None:
+            continue
+        for metric in TIME_METRICS:
+            if metric in base and record[metric] > base[metric] * (1 + tolerance) + min_time:
+                regressions.append(f"{addon}: {metric} {base[metric] * 1000:.2f} ms -> {record[metric] * 1000:.2f} ms")
+        for metric in MEMORY_METRICS:
+            if metric in base and record[metric] > base[metric] * (1 + tolerance) + min_bytes:
+                regressions.append(f"{addon}: {metric} {base[metric] / 1024:.1f} KiB -> {record[metric] / 1024:.1f} KiB")
+        for metric in COUNT_METRICS:
+            if metric in base and record[metric] > base[metric]:
+                regressions.append(f"{addon}: {metric} {base[metric]} -> {record[metric]}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'add-on':<18} {'import':>9} {'register':>9} {'unregister':>10} {'alloc':>10} {'retained':>10} "
+          f"{'hnd':>4} {'types':>5} {'1st lookup':>11} {'lookup':>9}")
+    for addon, r in results.items():
+        first = f"{r['first_lookup'] * 1e6:8.1f} us" if "first_lookup" in r else f"{'-':>11}"
+        cached = f"{r['cached_lookup'] * 1e9:6.0f} ns" if "cached_lookup" in r else f"{'-':>9}"
+        print(f"{addon:<18} {r['import'] * 1000:6.2f} ms {r['register'] * 1000:6.2f} ms "
+              f"{r['unregister'] * 1000:7.2f} ms {r['allocated'] / 1024:6.0f} KiB {r['retained'] / 1024:6.0f} KiB "
+              f"{r['handlers']:4d} {r['types']:5d} {first} {cached}")
+    print(f"{'total':<18} {sum(r['import'] for r in results.values()) * 1000:6.2f} ms "
+          f"{sum(r['register'] for r in results.values()) * 1000:6.2f} ms "
+          f"{sum(r['unregister'] for r in results.values()) * 1000:7.2f} ms "
+          f"{sum(r['allocated'] for r in results.values()) / 1024:6.0f} KiB")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="import/register cycles per add-on")
+    parser.add_argument("--json", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a JSON file written by --json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown or growth")
+    parser.add_argument("--min-time-ms", type=float, default=0.5, help="ignore time regressions below this")
+    parser.add_argument("--min-kib", type=float, default=64, help="ignore allocation growth below this")
+    parser.add_argument("addons", nargs="*", default=ADDONS, help="add-ons to measure (default: all)")
+    args = parser.parse_args(argv)
+
+    print(f"Blender {bpy.app.version_string}, background={bpy.app.background}, median of {args.repeat}")
+    results = {addon: measure(addon, max(1, args.repeat)) for addon in args.addons}
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"blender": bpy.app.version_string, "repeat": args.repeat, "addons": results}, f, indent=4)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_time_ms / 1000, args.min_kib * 1024)
+        print()
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline} (Blender {baseline.get('blender')}):")
+            for line in regressions:
+                print(f"  {line}")
+            # blender -b --python keeps running after the script; exit explicitly
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+main()
@@ -0,0 +1,88 @@
+"""Dedup ratio and restore throughput of Subamo's chunk store.
+
+Generates a series of synthetic backups that each differ from the previous
+one by a few small insertions and overwrites. The script ingests them into a
+``ChunkStore`` the same way the DEDUP storage mode does, then restores every
+backup through the memory-mapped output.
+
+    python benchmarks/subamo_dedup.py --size-mb 256 --versions 8
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from _bootstrap import load_addon_module
+
+chunk_store = load_addon_module("subamo", "chunk_store")
+
+MB = 1024 * 1024
+
+
+def make_versions(size, versions, edits, seed):
+    """Yield ``versions`` byte strings, each a lightly edited copy of the last."""
+    rnd = random.Random(seed)
+    data = bytearray(rnd.randbytes(size))
+    for _ in range(versions):
+        for _ in range(edits):
+            pos = rnd.randrange(len(data))
+            if rnd.random() < 0.5:
+                data[pos:pos] = rnd.randbytes(rnd.randint(16, 4096))
+            else:
+                data[pos:pos + 4096] = rnd.randbytes(4096)
+        yield bytes(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=128, help="size of each synthetic backup")
+    parser.add_argument("--versions", type=int, default=8, help="number of backups")
+    parser.add_argument("--edits", type=int, default=4, help="edits between consecutive backups")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="subamo-dedup-")
+    try:
+        backup_dir = os.path.join(root, "backup")
+        os.makedirs(backup_dir)
+        store = chunk_store.ChunkStore(backup_dir)
+
+        logical = 0
+        ingest_time = 0.0
+        manifests = []
+        for i, data in enumerate(make_versions(args.size_mb * MB, args.versions, args.edits, args.seed), 1):
+            src = os.path.join(root, f"shot.blend{i}")
+            with open(src, "wb") as f:
+                f.write(data)
+            manifest = os.path.join(backup_dir, f"shot.blend{i}{chunk_store.MANIFEST_SUFFIX}")
+            start = time.perf_counter()
+            store.ingest(src, manifest)
+            ingest_time += time.perf_counter() - start
+            logical += len(data)
+            manifests.append(manifest)
+
+        stored = store.stored_bytes() + sum(os.path.getsize(m) for m in manifests)
+
+        restore_time = 0.0
+        out = os.path.join(root, "restored.blend")
+        for manifest in manifests:
+            start = time.perf_counter()
+            store.restore(manifest, out)
+            restore_time += time.perf_counter() - start
+            os.remove(out)
+
+        print(f"chunking         : {'content-defined' if chunk_store.np is not None else 'fixed-size (numpy missing)'}")
+        print(f"backups          : {args.versions} x {args.size_mb} MB")
+        print(f"logical bytes    : {logical / MB:10.1f} MB")
+        print(f"stored bytes     : {stored / MB:10.1f} MB")
+        print(f"dedup ratio      : {logical / stored:10.2f} x")
+        print(f"ingest throughput: {logical / MB / ingest_time:10.1f} MB/s")
+        print(f"restore throughput: {logical / MB / restore_time:9.1f} MB/s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
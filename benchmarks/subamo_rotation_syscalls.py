@@ -0,0 +1,153 @@
+"""Syscalls per save for Subamo's backup rotation.
+
+Builds a project directory with 32 synthetic backups and counts the
+filesystem calls made by one save's relocation. The script compares the
+original per-extension loop with the single-pass rotation engine in
+``subamo/relocation.py``.
+
+    python benchmarks/subamo_rotation_syscalls.py
+    python benchmarks/subamo_rotation_syscalls.py --strace   # Linux, needs strace
+"""
+import argparse
+import collections
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from _bootstrap import load_addon_module
+
+relocation = load_addon_module("subamo", "relocation")
+
+BACKUP_COUNT = 32
+PATCHED = [
+    (os, "stat"), (os, "lstat"), (os, "scandir"), (os, "listdir"),
+    (os, "mkdir"), (os, "remove"), (os, "unlink"), (os, "rename"), (os, "replace"),
+    (shutil, "copy2"),
+]
+
+
+def legacy_organize(current_filepath):
+    """Original organize_backup_files loop, kept as the reference."""
+    current_dir = os.path.dirname(current_filepath)
+    base_name = os.path.splitext(os.path.basename(current_filepath))[0]
+    backup_dir = os.path.join(current_dir, "backup")
+    moved = 0
+    for ext in [f'.blend{i}' for i in range(1, 33)]:
+        src = os.path.join(current_dir, base_name + ext)
+        if os.path.exists(src):
+            if not os.path.exists(backup_dir):
+                os.makedirs(backup_dir)
+            dst = os.path.join(backup_dir, base_name + ext)
+            if os.path.exists(dst):
+                os.remove(dst)
+            shutil.move(src, dst)
+            moved += 1
+    return moved
+
+
+class SyscallCounter:
+    """Counts calls to the os-level functions that map to one syscall each."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self._originals = []
+
+    def __enter__(self):
+        for module, name in PATCHED:
+            original = getattr(module, name)
+            self._originals.append((module, name, original))
+            setattr(module, name, self._wrap(name, original))
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, original in self._originals:
+            setattr(module, name, original)
+        self._originals.clear()
+
+    def _wrap(self, name, original):
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            return original(*args, **kwargs)
+        return counted
+
+
+def make_project(root, incoming, existing):
+    """Create a.blend with ``incoming`` backups beside it and ``existing`` in backup/."""
+    project = os.path.join(root, "shot")
+    os.makedirs(os.path.join(project, "backup"))
+    filepath = os.path.join(project, "a.blend")
+    open(filepath, "wb").close()
+    for i in range(1, incoming + 1):
+        with open(f"{filepath}{i}", "wb") as f:
+            f.write(b"BLENDER")
+    for i in range(1, existing + 1):
+        with open(os.path.join(project, "backup", f"a.blend{i}"), "wb") as f:
+            f.write(b"BLENDER")
+    return filepath
+
+
+SCENARIOS = {
+    # Steady state: Blender wrote one new .blend1, backup/ already holds 31
+    "steady": (1, BACKUP_COUNT - 1),
+    # Worst case: 32 backups next to the .blend, none organized yet
+    "cold": (BACKUP_COUNT, 0),
+}
+
+
+def run_once(func, scenario):
+    root = tempfile.mkdtemp(prefix="subamo-bench-")
+    try:
+        filepath = make_project(root, *SCENARIOS[scenario])
+        with SyscallCounter() as counter:
+            func(filepath)
+        return counter.counts
+    finally:
+        shutil.rmtree(root)
+
+
+def run_strace(impl, scenario):
+    """Re-run one measurement under ``strace -c`` and print its summary."""
+    if shutil.which("strace") is None:
+        sys.exit("strace not found")
+    root = tempfile.mkdtemp(prefix="subamo-bench-")
+    try:
+        filepath = make_project(root, *SCENARIOS[scenario])
+        subprocess.run([
+            "strace", "-c", "-f", "-e", "trace=%file,getdents64",
+            sys.executable, os.path.abspath(__file__), "--inner", impl, filepath,
+        ], check=True)
+    finally:
+        shutil.rmtree(root)
+
+
+IMPLEMENTATIONS = {
+    "legacy": legacy_organize,
+    "rotation": relocation.organize_backup_files,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strace", action="store_true", help="measure with strace -c instead of the shim")
+    parser.add_argument("--inner", nargs=2, metavar=("IMPL", "FILEPATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.inner:
+        IMPLEMENTATIONS[args.inner[0]](args.inner[1])
+        return
+
+    for scenario in SCENARIOS:
+        for impl, func in IMPLEMENTATIONS.items():
+            if args.strace:
+                print(f"== {scenario} / {impl}")
+                run_strace(impl, scenario)
+                continue
+            counts = run_once(func, scenario)
+            detail = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+            print(f"{scenario:7s} {impl:9s} total={sum(counts.values()):4d}  {detail}")
+
+
+if __name__ == "__main__":
+    main()
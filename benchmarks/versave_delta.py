@@ -0,0 +1,90 @@
+"""Space saved and reconstruction latency of Versave's delta storage.
+
+Generates a series of synthetic versions that each differ from the previous
+one by a few small insertions and overwrites, then compacts them the same
+way the Delta Storage preference does: the newest version stays a full file
+and every older one becomes a delta against its successor. Each older
+version is then restored, so the restore time can be read against its depth
+in the delta chain.
+
+    python benchmarks/versave_delta.py --size-mb 256 --versions 12
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from _bootstrap import load_addon_module
+
+delta_store = load_addon_module("versave", "delta_store")
+version_index = load_addon_module("versave", "version_index")
+
+MB = 1024 * 1024
+
+
+def make_versions(size, versions, edits, seed):
+    """Yield ``versions`` byte strings, each a lightly edited copy of the last."""
+    rnd = random.Random(seed)
+    data = bytearray(rnd.randbytes(size))
+    for _ in range(versions):
+        for _ in range(edits):
+            pos = rnd.randrange(len(data))
+            if rnd.random() < 0.5:
+                data[pos:pos] = rnd.randbytes(rnd.randint(16, 4096))
+            else:
+                data[pos:pos + 4096] = rnd.randbytes(4096)
+        yield bytes(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=128, help="size of each synthetic version")
+    parser.add_argument("--versions", type=int, default=8, help="number of versions")
+    parser.add_argument("--edits", type=int, default=4, help="edits between consecutive versions")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="versave-delta-")
+    try:
+        logical = 0
+        for i, data in enumerate(make_versions(args.size_mb * MB, args.versions, args.edits, args.seed), 1):
+            path = os.path.join(root, f"shot_v{i}.blend")
+            with open(path, "wb") as f:
+                f.write(data)
+            logical += len(data)
+
+        index = version_index.VersionIndex(stat_interval=0)
+        start = time.perf_counter()
+        converted = delta_store.compact_project(root, "shot", index=index)
+        encode_time = time.perf_counter() - start
+
+        stored = sum(e.stat().st_size for e in os.scandir(root) if e.is_file())
+
+        print(f"matching         : {'rolling hash' if delta_store.np is not None else 'block-aligned (numpy missing)'}")
+        print(f"versions         : {args.versions} x {args.size_mb} MB ({len(converted)} stored as deltas)")
+        print(f"logical bytes    : {logical / MB:10.1f} MB")
+        print(f"stored bytes     : {stored / MB:10.1f} MB")
+        print(f"space saved      : {100 * (1 - stored / logical):10.1f} %")
+        print(f"encode throughput: {len(converted) * args.size_mb / encode_time:10.1f} MB/s")
+        print()
+        print("depth  version        restore     MB/s")
+
+        out = os.path.join(root, "restored.blend")
+        entries = index.lookup(root, "shot").entries
+        for depth, entry in enumerate(reversed(entries[:-1]), 1):
+            if not entry.suffix:
+                continue
+            start = time.perf_counter()
+            delta_store.restore(entry.path, out)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(out)
+            os.remove(out)
+            print(f"{depth:5d}  {entry.filename[:-len(entry.suffix)]:<13} {elapsed * 1000:7.0f} ms {size / MB / elapsed:8.1f}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
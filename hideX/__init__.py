@@ -1,6 +1,10 @@
+import fnmatch
 import bpy
+import numpy as np
+from collections import Counter
 from bpy.props import CollectionProperty
 from bpy.types import PropertyGroup
+from bpy.app.handlers import persistent
 from bpy.app.translations import pgettext_iface as _
 
 bl_info = {
@@ -22,6 +26,449 @@ class HIDEX_HiddenObject(PropertyGroup):
     )
     original_hide_viewport: bpy.props.BoolProperty(name="Original Viewport Hide State")
     original_hide_render: bpy.props.BoolProperty(name="Original Render Hide State")
+    # Hidden by moving it into the excluded hideX collection (the original
+    # states above are then unused: the object's own flags are never written)
+    excluded: bpy.props.BoolProperty(name="Excluded")
+
+class HIDEX_HideSetMember(PropertyGroup):
+    """Object in a hide set"""
+    object_pointer: bpy.props.PointerProperty(name="Object Pointer", type=bpy.types.Object)
+
+class HIDEX_HideSet(PropertyGroup):
+    """Named set of objects that are hidden together
+    
+    Only object references are stored; the original visibility of hidden
+    objects is kept once in hidex_hidden_objects, whichever set hid them.
+    """
+    objects: CollectionProperty(type=HIDEX_HideSetMember)
+
+# Object types that hideX can hide, with their list icons
+OBJECT_TYPE_ICONS = {
+    'MESH': 'OUTLINER_OB_MESH',
+    'CURVE': 'OUTLINER_OB_CURVE',
+    'SURFACE': 'OUTLINER_OB_SURFACE',
+    'META': 'OUTLINER_OB_META',
+    'FONT': 'OUTLINER_OB_FONT',
+    'ARMATURE': 'OUTLINER_OB_ARMATURE',
+    'LATTICE': 'OUTLINER_OB_LATTICE',
+    'EMPTY': 'OUTLINER_OB_EMPTY',
+    'LIGHT': 'OUTLINER_OB_LIGHT',
+    'CAMERA': 'OUTLINER_OB_CAMERA',
+}
+HIDEABLE_TYPES = set(OBJECT_TYPE_ICONS)
+
+def object_positions(objects):
+    """Indices of objects in bpy.data.objects (for foreach_get/foreach_set)"""
+    all_objects = bpy.data.objects
+    uids = np.empty(len(all_objects), dtype=np.int32)
+    all_objects.foreach_get("session_uid", uids)
+    order = np.argsort(uids)
+    targets = np.fromiter((obj.session_uid for obj in objects), dtype=np.int32, count=len(objects))
+    return order[np.searchsorted(uids, targets, sorter=order)]
+
+def set_visibility(objects, hide_viewport, hide_render):
+    """Write hide_viewport/hide_render for many objects at once
+    
+    Values may be a single bool or one bool per object. Returns the previous
+    (hide_viewport, hide_render) arrays. A normal property write re-syncs the
+    view layers and tags the depsgraph for every object, so writes go through
+    bpy.data.objects.foreach_set instead, and the update runs once at the end.
+    """
+    if not objects:
+        empty = np.zeros(0, dtype=bool)
+        return empty, empty.copy()
+    
+    all_objects = bpy.data.objects
+    positions = object_positions(objects)
+    previous = []
+    for prop, values in (("hide_viewport", hide_viewport), ("hide_render", hide_render)):
+        state = np.empty(len(all_objects), dtype=bool)
+        all_objects.foreach_get(prop, state)
+        previous.append(state[positions])
+        state[positions] = values
+        all_objects.foreach_set(prop, state)
+    
+    # foreach_set skips property updates: write one property normally so the
+    # view layer sync, depsgraph tag and redraw happen once for the whole batch
+    for obj in objects:
+        if obj.library is None:
+            obj.hide_viewport = obj.hide_viewport
+            break
+    else:
+        bpy.context.view_layer.update()
+    return previous[0], previous[1]
+
+# Runtime index of the hidden-object records, built lazily per scene:
+# scene session_uid -> {object session_uid: record index}
+# Dropped on file load and undo/redo, and rebuilt when the list length no
+# longer matches (records changed outside hideX).
+_record_indices = {}
+
+# Hidden objects per type, kept alongside the index:
+# scene session_uid -> Counter({object type: count})
+_type_counts = {}
+
+# Bumped whenever hideX rewrites the records, so the hidden list knows when
+# its cached filter/sort result is stale
+_records_version = 0
+
+# View layers the hideX collection has been excluded in:
+# scene session_uid -> set of view layer names
+_excluded_view_layers = {}
+
+@persistent
+def invalidate_record_indices(*_args):
+    """load_post/undo_post/redo_post handler"""
+    global _records_version
+    _record_indices.clear()
+    _type_counts.clear()
+    _excluded_view_layers.clear()
+    _records_version += 1
+
+INDEX_HANDLERS = (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post)
+
+# Bool properties of HIDEX_HiddenObject, read and written in bulk
+RECORD_FLAGS = ("original_hide_viewport", "original_hide_render", "excluded")
+
+def read_records(records):
+    """(objects, original_hide_viewport, original_hide_render, excluded) of all records"""
+    objects = [record.object_pointer for record in records]
+    flags = []
+    for prop in RECORD_FLAGS:
+        values = np.empty(len(records), dtype=bool)
+        records.foreach_get(prop, values)
+        flags.append(values)
+    return (objects, *flags)
+
+def write_records(records, objects, viewport, render, excluded):
+    """Replace all records in one pass (remove(i) per item would be quadratic)"""
+    global _records_version
+    _records_version += 1
+    records.clear()
+    for obj in objects:
+        records.add().object_pointer = obj
+    for prop, values in zip(RECORD_FLAGS, (viewport, render, excluded)):
+        records.foreach_set(prop, np.asarray(values, dtype=bool))
+
+def compact_records(scene):
+    """Drop records of deleted objects and duplicates, and return a fresh index
+    
+    For duplicates the first record is kept, since it holds the state from
+    before the object was first hidden.
+    """
+    records = scene.hidex_hidden_objects
+    objects, viewport, render, excluded = read_records(records)
+    index = {}
+    keep = []
+    for i, obj in enumerate(objects):
+        if obj is None or obj.session_uid in index:
+            continue
+        index[obj.session_uid] = len(keep)
+        keep.append(i)
+    if len(keep) != len(objects):
+        write_records(records, [objects[i] for i in keep], viewport[keep], render[keep], excluded[keep])
+    _type_counts[scene.session_uid] = Counter(objects[i].type for i in keep)
+    _compacted_object_totals[scene.session_uid] = len(bpy.data.objects)
+    return index
+
+def get_record_index(scene):
+    """Object session_uid -> record index for the scene (compacts the list on rebuild)"""
+    index = _record_indices.get(scene.session_uid)
+    if index is None or len(index) != len(scene.hidex_hidden_objects):
+        index = _record_indices[scene.session_uid] = compact_records(scene)
+    return index
+
+# Scenes whose records get_type_counts found out of date: scene session_uids
+_compaction_pending = set()
+
+# len(bpy.data.objects) when the records were last compacted, per scene; a
+# deleted object leaves its record behind without changing the record count
+_compacted_object_totals = {}
+
+def get_type_counts(scene):
+    """Number of hidden objects per type (read-only, safe to call from draw)"""
+    counts = _type_counts.get(scene.session_uid)
+    if counts is None or counts.total() != len(scene.hidex_hidden_objects) or \
+            _compacted_object_totals.get(scene.session_uid) != len(bpy.data.objects):
+        # After load/undo, or objects added or deleted: count once and compact
+        # from a timer, since draw code may not write to the scene
+        counts = _type_counts[scene.session_uid] = Counter(
+            record.object_pointer.type for record in scene.hidex_hidden_objects
+            if record.object_pointer is not None)
+        _compaction_pending.add(scene.session_uid)
+        if not bpy.app.timers.is_registered(compact_pending_records):
+            bpy.app.timers.register(compact_pending_records, first_interval=0)
+    return counts
+
+def compact_pending_records():
+    """Timer: compact the records of the scenes queued by get_type_counts"""
+    for scene in bpy.data.scenes:
+        if scene.session_uid in _compaction_pending:
+            _record_indices[scene.session_uid] = compact_records(scene)
+    _compaction_pending.clear()
+    # Drop the rows of deleted objects from the hidden list
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return None
+
+# Name of the generated collection holding objects hidden by exclusion
+HIDDEN_COLLECTION_NAME = "hideX Hidden"
+
+def collection_members(scene, objects):
+    """Object session_uid -> scene collections that link it (including hideX's own)"""
+    wanted = np.fromiter((obj.session_uid for obj in objects), dtype=np.int32, count=len(objects))
+    members = {}
+    for collection in (scene.collection, *scene.collection.children_recursive):
+        collection_objects = collection.objects
+        if not collection_objects:
+            continue
+        uids = np.empty(len(collection_objects), dtype=np.int32)
+        collection_objects.foreach_get("session_uid", uids)
+        for uid in uids[np.isin(uids, wanted)].tolist():
+            members.setdefault(uid, []).append(collection)
+    return members
+
+def get_hidden_collection(scene):
+    """The scene's excluded hideX collection, created on first use
+    
+    It is excluded in every view layer, so neither the viewport nor the
+    render sees what it holds. Objects are moved into one child collection per
+    collection they came from, which is how they find their way back.
+    """
+    hidden = scene.hidex_hidden_collection
+    if hidden is None:
+        hidden = bpy.data.collections.new(HIDDEN_COLLECTION_NAME)
+        scene.collection.children.link(hidden)
+        scene.hidex_hidden_collection = hidden
+    exclude_in_view_layers(scene, hidden, scene.view_layers)
+    return hidden
+
+def exclude_in_view_layers(scene, hidden, view_layers):
+    """Exclude the hideX collection in the given view layers of the scene"""
+    known = _excluded_view_layers.setdefault(scene.session_uid, set())
+    for view_layer in view_layers:
+        known.add(view_layer.name)
+        layer_collection = view_layer.layer_collection.children.get(hidden.name)
+        if layer_collection is not None and not layer_collection.exclude:
+            layer_collection.exclude = True
+
+@persistent
+def exclude_in_new_view_layers(scene, _depsgraph=None):
+    """depsgraph_update_post handler: exclude the hideX collection in view layers added later
+    
+    Layers seen before are left alone, so re-including the collection by hand
+    in one of them sticks until the next hide. After load or undo the current
+    layers are taken as they are.
+    """
+    hidden = scene.hidex_hidden_collection
+    if hidden is None:
+        return
+    known = _excluded_view_layers.get(scene.session_uid)
+    if known is None:
+        _excluded_view_layers[scene.session_uid] = {view_layer.name for view_layer in scene.view_layers}
+        return
+    new_layers = [view_layer for view_layer in scene.view_layers if view_layer.name not in known]
+    if new_layers:
+        exclude_in_view_layers(scene, hidden, new_layers)
+
+def exclude_objects(scene, objects):
+    """Move objects into the excluded hideX collection
+    
+    Only collection links change; the objects' own visibility flags are not
+    written, and the view layers are re-synced once on the next update.
+    Objects in collections that cannot be edited (linked from a library), or
+    in no collection of the scene besides hideX's own, are left alone and
+    returned.
+    """
+    hidden = get_hidden_collection(scene)
+    hidex_collections = {hidden.session_uid} | {child.session_uid for child in hidden.children}
+    shadows = {child["hidex_source"].session_uid: child for child in hidden.children
+               if child.get("hidex_source") is not None}
+    members = collection_members(scene, objects)
+    failed = []
+    for obj in objects:
+        sources = [c for c in members.get(obj.session_uid, ()) if c.session_uid not in hidex_collections]
+        if not sources or any(source.library is not None or source.override_library is not None
+                              for source in sources):
+            # Nothing to bring the object back to, or the link cannot be changed
+            failed.append(obj)
+            continue
+        for source in sources:
+            if source == scene.collection:
+                shadow = hidden
+            else:
+                shadow = shadows.get(source.session_uid)
+                if shadow is None:
+                    shadow = bpy.data.collections.new(f"{source.name} ({HIDDEN_COLLECTION_NAME})")
+                    shadow["hidex_source"] = source
+                    hidden.children.link(shadow)
+                    shadows[source.session_uid] = shadow
+            # Link first so the object never has zero users
+            shadow.objects.link(obj)
+            source.objects.unlink(obj)
+    return failed
+
+def restore_objects(scene, objects):
+    """Move objects out of the hideX collection back into the collections they came from
+    
+    Child collections that end up empty are removed, and so is the hideX
+    collection itself once nothing is hidden in it.
+    """
+    hidden = scene.hidex_hidden_collection
+    if hidden is None:
+        return
+    wanted = {obj.session_uid for obj in objects}
+    for shadow in (*hidden.children, hidden):
+        if shadow == hidden:
+            target = scene.collection
+        else:
+            # Source collection deleted meanwhile: fall back to the scene collection
+            target = shadow.get("hidex_source") or scene.collection
+        for obj in [obj for obj in shadow.objects if obj.session_uid in wanted]:
+            try:
+                target.objects.link(obj)
+            except RuntimeError:
+                # Already linked there again
+                pass
+            shadow.objects.unlink(obj)
+        if shadow != hidden and not shadow.objects and not shadow.children:
+            bpy.data.collections.remove(shadow)
+    if not hidden.objects and not hidden.children:
+        bpy.data.collections.remove(hidden)
+
+def update_hidden(scene, hide=(), show=()):
+    """Hide some objects and restore others in a single batch
+    
+    hide: objects to hide (already recorded ones keep their original record).
+    show: recorded objects to restore, or None for all of them.
+    Objects in both stay hidden. New objects are hidden the way
+    scene.hidex_hide_method says; each record is restored the way it was
+    hidden. Visibility is written in one set_visibility call and the records
+    are rewritten at most once.
+    Returns (number hidden, number restored).
+    """
+    global _records_version
+    records = scene.hidex_hidden_objects
+    index = get_record_index(scene)
+    all_objects, viewport, render, excluded = read_records(records)
+    
+    hide = list({obj.session_uid: obj for obj in hide}.values())
+    hide_uids = {obj.session_uid for obj in hide}
+    if show is None:
+        show_positions = [i for i, obj in enumerate(all_objects) if obj is not None]
+    else:
+        show_positions = {index[obj.session_uid] for obj in show
+                          if obj.session_uid in index and all_objects[index[obj.session_uid]] == obj}
+    show_positions = sorted(i for i in show_positions if all_objects[i].session_uid not in hide_uids)
+    shown = [all_objects[i] for i in show_positions]
+    if not shown and not hide:
+        return 0, 0
+    
+    # Newly hidden objects get a record; already recorded ones are hidden
+    # again (flags only) and keep the state they had before
+    new_objects = [obj for obj in hide if obj.session_uid not in index]
+    rehide = [obj for obj in hide if obj.session_uid in index and not excluded[index[obj.session_uid]]]
+    moved = []
+    if scene.hidex_hide_method == 'EXCLUDE' and new_objects:
+        failed = exclude_objects(scene, new_objects)
+        failed_uids = {obj.session_uid for obj in failed}
+        moved = [obj for obj in new_objects if obj.session_uid not in failed_uids]
+        new_objects = failed
+    restore_objects(scene, [all_objects[i] for i in show_positions if excluded[i]])
+    
+    flag_shown = [i for i in show_positions if not excluded[i]]
+    targets = [all_objects[i] for i in flag_shown] + rehide + new_objects
+    target_viewport = np.ones(len(targets), dtype=bool)
+    target_render = np.ones(len(targets), dtype=bool)
+    target_viewport[:len(flag_shown)] = viewport[flag_shown]
+    target_render[:len(flag_shown)] = render[flag_shown]
+    previous_viewport, previous_render = set_visibility(targets, target_viewport, target_render)
+    
+    # Older versions also hid the object in the view layer; clear only where it differs
+    for i in flag_shown:
+        if all_objects[i].hide_get() != viewport[i]:
+            all_objects[i].hide_set(bool(viewport[i]))
+    
+    # Records of new objects: the state they had before, or just "excluded"
+    first_new = len(flag_shown) + len(rehide)
+    new_viewport = np.concatenate((previous_viewport[first_new:], np.zeros(len(moved), dtype=bool)))
+    new_render = np.concatenate((previous_render[first_new:], np.zeros(len(moved), dtype=bool)))
+    new_excluded = np.concatenate((np.zeros(len(new_objects), dtype=bool), np.ones(len(moved), dtype=bool)))
+    new_objects += moved
+    
+    # Keep the per-type counts current instead of recounting every record
+    counts = _type_counts.setdefault(scene.session_uid, Counter())
+    counts.subtract(obj.type for obj in shown)
+    counts.update(obj.type for obj in new_objects)
+    
+    if show_positions or None in all_objects:
+        # Drop the shown records (and any left by deleted objects) in one rewrite
+        keep = np.array([obj is not None for obj in all_objects], dtype=bool)
+        keep[show_positions] = False
+        remaining = [obj for obj, kept in zip(all_objects, keep) if kept] + new_objects
+        write_records(records, remaining,
+                      np.concatenate((viewport[keep], new_viewport)),
+                      np.concatenate((render[keep], new_render)),
+                      np.concatenate((excluded[keep], new_excluded)))
+        _record_indices[scene.session_uid] = {obj.session_uid: i for i, obj in enumerate(remaining)}
+        if None in all_objects:
+            # Dropped records of deleted objects were counted under their old type
+            _type_counts[scene.session_uid] = Counter(obj.type for obj in remaining)
+    elif new_objects:
+        _records_version += 1
+        first = len(records)
+        for position, obj in enumerate(new_objects, first):
+            records.add().object_pointer = obj
+            index[obj.session_uid] = position
+        
+        # Store original visibility states in bulk
+        for prop, values in zip(RECORD_FLAGS, (new_viewport, new_render, new_excluded)):
+            state = np.empty(len(records), dtype=bool)
+            records.foreach_get(prop, state)
+            state[first:] = values
+            records.foreach_set(prop, state)
+    return len(hide), len(shown)
+
+def hide_objects(scene, objects):
+    """Hide objects in viewport and render, recording their original states
+    
+    Objects that are already recorded are hidden again but keep their
+    original record. Returns the number of objects hidden.
+    """
+    return update_hidden(scene, hide=objects)[0]
+
+def show_objects(scene, objects=None):
+    """Restore the original visibility of hidden objects and drop their records
+    
+    With objects=None every hidden object is shown. Returns the number of
+    objects restored.
+    """
+    return update_hidden(scene, show=objects)[1]
+
+def hidden_objects(scene):
+    """Objects currently hidden by hideX in the scene"""
+    return [record.object_pointer for record in scene.hidex_hidden_objects if record.object_pointer is not None]
+
+def store_hide_set(hide_set, objects):
+    """Replace the members of a hide set"""
+    hide_set.objects.clear()
+    for obj in objects:
+        hide_set.objects.add().object_pointer = obj
+
+def apply_hide_set(scene, hide_set):
+    """Switch the hidden objects to the members of a hide set
+    
+    Only the difference is applied: objects hidden now and in the set are
+    left untouched. Returns (number hidden, number restored).
+    """
+    members = {obj.session_uid: obj for obj in (m.object_pointer for m in hide_set.objects) if obj is not None}
+    current = hidden_objects(scene)
+    current_uids = {obj.session_uid for obj in current}
+    hide = [obj for uid, obj in members.items() if uid not in current_uids]
+    show = [obj for obj in current if obj.session_uid not in members]
+    return update_hidden(scene, hide=hide, show=show)
 
 class HIDEX_OT_hide_selected(bpy.types.Operator):
     """Hide selected objects in viewport and disable in render"""
@@ -35,25 +482,14 @@ class HIDEX_OT_hide_selected(bpy.types.Operator):
         if not hasattr(scene, 'hidex_hidden_objects'):
             return {'CANCELLED'}
         
-        selected_objects = [obj for obj in context.selected_objects if obj.type in {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT', 'ARMATURE', 'LATTICE', 'EMPTY', 'LIGHT', 'CAMERA'}]
+        selected_objects = [obj for obj in context.selected_objects if obj.type in HIDEABLE_TYPES]
         
         if not selected_objects:
             self.report({'WARNING'}, _("No valid objects selected"))
             return {'CANCELLED'}
         
-        hidden_count = 0
-        for obj in selected_objects:
-            # Store original visibility states
-            hidden_obj = scene.hidex_hidden_objects.add()
-            hidden_obj.object_pointer = obj
-            hidden_obj.original_hide_viewport = obj.hide_viewport
-            hidden_obj.original_hide_render = obj.hide_render
-            
-            # Hide in both viewport and render
-            obj.hide_viewport = True
-            obj.hide_render = True
-            obj.hide_set(True)  # Also use hide_set for viewport
-            hidden_count += 1
+        # Hide in both viewport and render (batched, one depsgraph update)
+        hidden_count = hide_objects(scene, selected_objects)
         
         self.report({'INFO'}, _("Hidden {} objects").format(hidden_count))
         return {'FINISHED'}
@@ -77,22 +513,16 @@ class HIDEX_OT_show_object(bpy.types.Operator):
             self.report({'WARNING'}, _("Invalid object index"))
             return {'CANCELLED'}
         
-        hidden_obj = scene.hidex_hidden_objects[self.object_index]
-        obj = hidden_obj.object_pointer
+        obj = scene.hidex_hidden_objects[self.object_index].object_pointer
         
         if obj is None:
-            # Object was deleted, remove from hidden list
-            scene.hidex_hidden_objects.remove(self.object_index)
+            # Object was deleted; drop it (and any other dangling records)
+            _record_indices[scene.session_uid] = compact_records(scene)
             self.report({'WARNING'}, _("Object no longer exists"))
             return {'CANCELLED'}
         
-        # Restore original visibility states
-        obj.hide_viewport = hidden_obj.original_hide_viewport
-        obj.hide_render = hidden_obj.original_hide_render
-        obj.hide_set(hidden_obj.original_hide_viewport)  # Restore viewport visibility
-        
-        # Remove from hidden list
-        scene.hidex_hidden_objects.remove(self.object_index)
+        # Restore original visibility states and remove from hidden list
+        show_objects(scene, [obj])
         
         self.report({'INFO'}, _("Showed object '{}'").format(obj.name))
         return {'FINISHED'}
@@ -113,26 +543,240 @@ class HIDEX_OT_show_all(bpy.types.Operator):
             self.report({'INFO'}, _("No hidden objects to show"))
             return {'FINISHED'}
         
-        shown_count = 0
-        # Process in reverse order to avoid index issues when removing items
-        for i in range(len(scene.hidex_hidden_objects) - 1, -1, -1):
-            hidden_obj = scene.hidex_hidden_objects[i]
-            obj = hidden_obj.object_pointer
-            
-            if obj is not None:
-                # Restore original visibility states
-                obj.hide_viewport = hidden_obj.original_hide_viewport
-                obj.hide_render = hidden_obj.original_hide_render
-                obj.hide_set(hidden_obj.original_hide_viewport)  # Restore viewport visibility
-                shown_count += 1
-            
-            # Remove from hidden list
-            scene.hidex_hidden_objects.remove(i)
+        # Restore original visibility states (batched) and empty the list
+        shown_count = show_objects(scene)
+        scene.hidex_active_hide_set = -1
         
         self.report({'INFO'}, _("Showed {} objects").format(shown_count))
         return {'FINISHED'}
 
 
+class HIDEX_OT_hide_set_add(bpy.types.Operator):
+    """Store the currently hidden objects as a new hide set"""
+    bl_idname = "hidex.hide_set_add"
+    bl_label = "Add Hide Set"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        hide_set = scene.hidex_hide_sets.add()
+        hide_set.name = _("Set {}").format(len(scene.hidex_hide_sets))
+        store_hide_set(hide_set, hidden_objects(scene))
+        scene.hidex_active_hide_set = len(scene.hidex_hide_sets) - 1
+        return {'FINISHED'}
+
+class HIDEX_OT_hide_set_store(bpy.types.Operator):
+    """Replace the objects in the hide set with the currently hidden objects"""
+    bl_idname = "hidex.hide_set_store"
+    bl_label = "Update Hide Set"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    set_index: bpy.props.IntProperty(name="Hide Set Index")
+    
+    def execute(self, context):
+        scene = context.scene
+        if not 0 <= self.set_index < len(scene.hidex_hide_sets):
+            return {'CANCELLED'}
+        store_hide_set(scene.hidex_hide_sets[self.set_index], hidden_objects(scene))
+        scene.hidex_active_hide_set = self.set_index
+        return {'FINISHED'}
+
+class HIDEX_OT_hide_set_apply(bpy.types.Operator):
+    """Hide the objects in the hide set and show the others hidden by hideX"""
+    bl_idname = "hidex.hide_set_apply"
+    bl_label = "Apply Hide Set"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    set_index: bpy.props.IntProperty(name="Hide Set Index")
+    
+    def execute(self, context):
+        scene = context.scene
+        if not 0 <= self.set_index < len(scene.hidex_hide_sets):
+            return {'CANCELLED'}
+        hide_set = scene.hidex_hide_sets[self.set_index]
+        hidden_count, shown_count = apply_hide_set(scene, hide_set)
+        scene.hidex_active_hide_set = self.set_index
+        self.report({'INFO'}, _("'{}': hid {}, showed {} objects").format(hide_set.name, hidden_count, shown_count))
+        return {'FINISHED'}
+
+class HIDEX_OT_hide_set_remove(bpy.types.Operator):
+    """Delete the hide set (objects keep their current visibility)"""
+    bl_idname = "hidex.hide_set_remove"
+    bl_label = "Remove Hide Set"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    set_index: bpy.props.IntProperty(name="Hide Set Index")
+    
+    def execute(self, context):
+        scene = context.scene
+        if not 0 <= self.set_index < len(scene.hidex_hide_sets):
+            return {'CANCELLED'}
+        scene.hidex_hide_sets.remove(self.set_index)
+        if scene.hidex_active_hide_set == self.set_index:
+            scene.hidex_active_hide_set = -1
+        elif scene.hidex_active_hide_set > self.set_index:
+            scene.hidex_active_hide_set -= 1
+        return {'FINISHED'}
+
+# Rows shown in the hidden list (only these are laid out, however many are hidden)
+VISIBLE_ROWS = 10
+
+# Cached filter/sort result of the hidden list, per scene:
+# scene session_uid -> (key, flags, order, collection names)
+_list_cache = {}
+
+# Bumped when an object is renamed or collection links change, so the hidden
+# list knows its cached result is stale without rereading every record
+_scene_changes = 0
+
+# msgbus owner for the object name subscription
+_name_owner = object()
+
+def tag_scene_changed(*_args):
+    """Mark the cached hidden list as stale (msgbus callback)"""
+    global _scene_changes
+    _scene_changes += 1
+
+def subscribe_name_changes():
+    """Mark the hidden list stale whenever any object is renamed"""
+    bpy.msgbus.clear_by_owner(_name_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Object, "name"),
+        owner=_name_owner,
+        args=(),
+        notify=tag_scene_changed,
+    )
+
+@persistent
+def resubscribe_name_changes(*_args):
+    """load_post handler: loading a file clears every msgbus subscription"""
+    subscribe_name_changes()
+
+@persistent
+def tag_collection_changes(scene, depsgraph):
+    """depsgraph_update_post handler: objects linked to or unlinked from collections"""
+    if depsgraph.id_type_updated('COLLECTION'):
+        tag_scene_changed()
+
+def collection_names(scene, objects):
+    """Object session_uid -> name of the first collection holding it
+    
+    For objects hidden by exclusion this is the collection they came from.
+    """
+    hidden = scene.hidex_hidden_collection
+    names = {}
+    for uid, collections in collection_members(scene, objects).items():
+        collection = collections[0]
+        if hidden is not None and collection == hidden:
+            collection = scene.collection
+        elif collection.get("hidex_source") is not None:
+            collection = collection["hidex_source"]
+        names[uid] = collection.name
+    return names
+
+class HIDEX_UL_hidden_objects(bpy.types.UIList):
+    """Hidden object list that only lays out the visible rows"""
+    
+    filter_type: bpy.props.EnumProperty(
+        name="Type",
+        items=[('ALL', "All Types", "Show hidden objects of every type", 'OBJECT_DATA', 0)] + [
+            (obj_type, obj_type.title(), "", icon, i)
+            for i, (obj_type, icon) in enumerate(OBJECT_TYPE_ICONS.items(), 1)
+        ],
+        default='ALL'
+    )
+    group_by: bpy.props.EnumProperty(
+        name="Group By",
+        items=[
+            ('NONE', "No Grouping", "Keep the order in which objects were hidden"),
+            ('TYPE', "Group by Type", "List objects of the same type together"),
+            ('COLLECTION', "Group by Collection", "List objects of the same collection together"),
+        ],
+        default='NONE'
+    )
+    
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        obj = item.object_pointer
+        if obj is not None:
+            row.label(text=obj.name, icon=OBJECT_TYPE_ICONS.get(obj.type, 'OBJECT_DATA'), translate=False)
+            if self.group_by == 'COLLECTION':
+                cached = _list_cache.get(data.session_uid)
+                if cached is not None:
+                    row.label(text=cached[3].get(obj.session_uid, ""), icon='OUTLINER_COLLECTION', translate=False)
+        else:
+            row.label(text=f"({_('deleted')})", icon='ERROR', translate=False)
+        
+        # Show button for individual object
+        op = row.operator("hidex.show_object", text="", icon='HIDE_OFF')
+        op.object_index = index
+    
+    def draw_filter(self, context, layout):
+        col = layout.column(align=True)
+        row = col.row(align=True)
+        row.prop(self, "filter_name", text="", icon='VIEWZOOM')
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+        
+        row = col.row(align=True)
+        row.prop(self, "filter_type", text="")
+        row.prop(self, "group_by", text="")
+        row.prop(self, "use_filter_sort_alpha", text="", icon='SORTALPHA')
+        row.prop(self, "use_filter_sort_reverse", text="", icon='SORT_DESC' if self.use_filter_sort_reverse else 'SORT_ASC')
+    
+    def filter_items(self, context, data, propname):
+        records = getattr(data, propname)
+        
+        # Nothing to filter or sort: Blender only walks the visible rows
+        if not self.filter_name and self.filter_type == 'ALL' and self.group_by == 'NONE' and not self.use_filter_sort_alpha:
+            return [], []
+        
+        # Matching and sorting only rerun when the records, object names or
+        # collection links (_scene_changes), the number of objects (deleted
+        # objects) or the settings change; a cache hit touches no record
+        key = (_records_version, _scene_changes, len(records), len(bpy.data.objects),
+               self.filter_name, self.filter_type, self.group_by, self.use_filter_sort_alpha)
+        cached = _list_cache.get(data.session_uid)
+        if cached is None or cached[0] != key:
+            objects = [record.object_pointer for record in records]
+            names = {}
+            if self.group_by == 'COLLECTION':
+                names = collection_names(data, [obj for obj in objects if obj is not None])
+            cached = _list_cache[data.session_uid] = (key, *self.build_filter(objects, names), names)
+        return cached[1], cached[2]
+    
+    def build_filter(self, objects, names):
+        """(flags, order) for the current settings; names maps object session_uid -> collection name"""
+        pattern = f"*{self.filter_name.lower()}*" if self.filter_name else None
+        flags = [self.bitflag_filter_item] * len(objects)
+        for i, obj in enumerate(objects):
+            if obj is None:
+                if pattern or self.filter_type != 'ALL':
+                    flags[i] = 0
+            elif (self.filter_type != 'ALL' and obj.type != self.filter_type) or \
+                    (pattern and not fnmatch.fnmatchcase(obj.name.lower(), pattern)):
+                flags[i] = 0
+        
+        if self.group_by == 'NONE' and not self.use_filter_sort_alpha:
+            return flags, []
+        
+        def sort_key(i):
+            obj = objects[i]
+            if obj is None:
+                return (True, "", "", i)
+            if self.group_by == 'TYPE':
+                group = obj.type
+            elif self.group_by == 'COLLECTION':
+                group = names.get(obj.session_uid, "")
+            else:
+                group = ""
+            return (False, group, obj.name.lower() if self.use_filter_sort_alpha else "", i)
+        
+        # order[i] is the displayed position of record i
+        order = [0] * len(objects)
+        for position, i in enumerate(sorted(range(len(objects)), key=sort_key)):
+            order[i] = position
+        return flags, order
+
 class HIDEX_PT_panel(bpy.types.Panel):
     """HideX control panel"""
     bl_label = "hideX"
@@ -150,7 +794,26 @@ class HIDEX_PT_panel(bpy.types.Panel):
         col.scale_y = 1.2
         col.operator("hidex.hide_selected", text=_("Hide Selected") + " (H)", icon='HIDE_ON')
         col.operator("hidex.show_all", text=_("Show All Hidden"), icon='HIDE_OFF')
+        layout.prop(scene, "hidex_hide_method", text="")
+        
         
+        layout.separator()
+        
+        # Hide sets
+        layout.label(text=_("Hide Sets:"))
+        box = layout.box()
+        for i, hide_set in enumerate(scene.hidex_hide_sets):
+            row = box.row(align=True)
+            active = i == scene.hidex_active_hide_set
+            op = row.operator("hidex.hide_set_apply", text="", icon='RADIOBUT_ON' if active else 'RADIOBUT_OFF', depress=active)
+            op.set_index = i
+            row.prop(hide_set, "name", text="")
+            row.label(text=str(len(hide_set.objects)), translate=False)
+            op = row.operator("hidex.hide_set_store", text="", icon='FILE_REFRESH')
+            op.set_index = i
+            op = row.operator("hidex.hide_set_remove", text="", icon='X')
+            op.set_index = i
+        box.operator("hidex.hide_set_add", text=_("Store Hidden as Set"), icon='ADD')
         
         layout.separator()
         
@@ -161,34 +824,20 @@ class HIDEX_PT_panel(bpy.types.Panel):
             layout.label(text="Hidden:")
         
         if hasattr(scene, 'hidex_hidden_objects') and len(scene.hidex_hidden_objects) > 0:
-            box = layout.box()
-            for i, hidden_obj in enumerate(scene.hidex_hidden_objects):
-                row = box.row(align=True)
-                
-                # Check if object still exists and get appropriate icon
-                obj = hidden_obj.object_pointer
-                if obj is not None:
-                    # Get object type icon
-                    icon_map = {
-                        'MESH': 'OUTLINER_OB_MESH',
-                        'CURVE': 'OUTLINER_OB_CURVE',
-                        'SURFACE': 'OUTLINER_OB_SURFACE',
-                        'META': 'OUTLINER_OB_META',
-                        'FONT': 'OUTLINER_OB_FONT',
-                        'ARMATURE': 'OUTLINER_OB_ARMATURE',
-                        'LATTICE': 'OUTLINER_OB_LATTICE',
-                        'EMPTY': 'OUTLINER_OB_EMPTY',
-                        'LIGHT': 'OUTLINER_OB_LIGHT',
-                        'CAMERA': 'OUTLINER_OB_CAMERA',
-                    }
-                    obj_icon = icon_map.get(obj.type, 'OBJECT_DATA')
-                    row.label(text=obj.name, icon=obj_icon, translate=False)
-                else:
-                    row.label(text=f"({_('deleted')})", icon='ERROR', translate=False)
-                
-                # Show button for individual object
-                op = row.operator("hidex.show_object", text="", icon='HIDE_OFF')
-                op.object_index = i
+            # Per-type counts (kept up to date by hide/show, not recounted here)
+            counts = get_type_counts(scene)
+            row = layout.row(align=True)
+            for obj_type, obj_icon in OBJECT_TYPE_ICONS.items():
+                if counts[obj_type] > 0:
+                    row.label(text=str(counts[obj_type]), icon=obj_icon, translate=False)
+            
+            layout.template_list(
+                "HIDEX_UL_hidden_objects", "",
+                scene, "hidex_hidden_objects",
+                scene, "hidex_active_hidden",
+                rows=min(len(scene.hidex_hidden_objects), VISIBLE_ROWS),
+                maxrows=VISIBLE_ROWS
+            )
         else:
             box = layout.box()
             box.label(text=_("No hidden objects"), icon='INFO')
@@ -213,19 +862,63 @@ translations_dict = {
         ("*", "No hidden objects to show"): "表示する非表示オブジェクトがありません",
         ("*", "Showed {} objects"): "{}個のオブジェクトを表示しました",
         ("*", "deleted"): "削除済み",
+        ("*", "Hide Sets:"): "非表示セット:",
+        ("*", "Store Hidden as Set"): "非表示をセットとして保存",
+        ("*", "Set {}"): "セット {}",
+        ("*", "'{}': hid {}, showed {} objects"): "'{}': {}個を非表示、{}個を表示しました",
+        ("*", "All Types"): "すべてのタイプ",
+        ("*", "No Grouping"): "グループ化なし",
+        ("*", "Group by Type"): "タイプでグループ化",
+        ("*", "Group by Collection"): "コレクションでグループ化",
+        ("*", "Object Visibility"): "オブジェクトの表示設定",
+        ("*", "Excluded Collection"): "除外コレクション",
     }
 }
 
 def register():
     """Register addon"""
     bpy.utils.register_class(HIDEX_HiddenObject)
+    bpy.utils.register_class(HIDEX_HideSetMember)
+    bpy.utils.register_class(HIDEX_HideSet)
     bpy.utils.register_class(HIDEX_OT_hide_selected)
     bpy.utils.register_class(HIDEX_OT_show_object)
     bpy.utils.register_class(HIDEX_OT_show_all)
-    bpy.utils.register_class(HIDEX_PT_panel)
+    bpy.utils.register_class(HIDEX_OT_hide_set_add)
+    bpy.utils.register_class(HIDEX_OT_hide_set_store)
+    bpy.utils.register_class(HIDEX_OT_hide_set_apply)
+    bpy.utils.register_class(HIDEX_OT_hide_set_remove)
     
-    # Add property to scene
+    # Add properties to scene
     bpy.types.Scene.hidex_hidden_objects = CollectionProperty(type=HIDEX_HiddenObject)
+    bpy.types.Scene.hidex_hide_sets = CollectionProperty(type=HIDEX_HideSet)
+    bpy.types.Scene.hidex_active_hide_set = bpy.props.IntProperty(name="Active Hide Set", default=-1)
+    bpy.types.Scene.hidex_active_hidden = bpy.props.IntProperty(name="Active Hidden Object", default=0)
+    bpy.types.Scene.hidex_hide_method = bpy.props.EnumProperty(
+        name="Hide Method",
+        items=[
+            ('PROPERTIES', "Object Visibility", "Turn off each object's viewport and render visibility"),
+            ('EXCLUDE', "Excluded Collection", "Move hidden objects into a generated collection that is excluded from every view layer, leaving their own visibility untouched"),
+        ],
+        default='PROPERTIES'
+    )
+    bpy.types.Scene.hidex_hidden_collection = bpy.props.PointerProperty(name="Hidden Collection", type=bpy.types.Collection)
+    
+    # Keep the runtime record index in sync with file loads and undo
+    for handlers in INDEX_HANDLERS:
+        handlers.append(invalidate_record_indices)
+    bpy.app.handlers.depsgraph_update_post.append(exclude_in_new_view_layers)
+    
+    # The panel, UI translations and shortcuts are UI-only; skip them under blender -b
+    if bpy.app.background:
+        return
+    
+    bpy.utils.register_class(HIDEX_UL_hidden_objects)
+    bpy.utils.register_class(HIDEX_PT_panel)
+    
+    # Keep the hidden list's cache in step with renames and collection moves
+    subscribe_name_changes()
+    bpy.app.handlers.load_post.append(resubscribe_name_changes)
+    bpy.app.handlers.depsgraph_update_post.append(tag_collection_changes)
     
     # Register translations
     try:
@@ -249,25 +942,59 @@ def register():
 
 def unregister():
     """Unregister addon"""
-    # Remove keymap
-    for km, kmi in addon_keymaps:
-        km.keymap_items.remove(kmi)
-    addon_keymaps.clear()
+    if not bpy.app.background:
+        # Remove keymap
+        for km, kmi in addon_keymaps:
+            km.keymap_items.remove(kmi)
+        addon_keymaps.clear()
+        
+        # Unregister translations
+        try:
+            bpy.app.translations.unregister(__name__)
+        except ValueError:
+            # Not registered, skip
+            pass
+        
+        if resubscribe_name_changes in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.remove(resubscribe_name_changes)
+        if tag_collection_changes in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.remove(tag_collection_changes)
+        bpy.msgbus.clear_by_owner(_name_owner)
+        
+        bpy.utils.unregister_class(HIDEX_PT_panel)
+        bpy.utils.unregister_class(HIDEX_UL_hidden_objects)
     
-    # Unregister translations
-    try:
-        bpy.app.translations.unregister(__name__)
-    except ValueError:
-        # Not registered, skip
-        pass
+    for handlers in INDEX_HANDLERS:
+        if invalidate_record_indices in handlers:
+            handlers.remove(invalidate_record_indices)
+    if exclude_in_new_view_layers in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(exclude_in_new_view_layers)
+    _record_indices.clear()
+    _type_counts.clear()
+    _excluded_view_layers.clear()
+    _list_cache.clear()
+    _compacted_object_totals.clear()
+    if bpy.app.timers.is_registered(compact_pending_records):
+        bpy.app.timers.unregister(compact_pending_records)
+    _compaction_pending.clear()
     
-    # Remove property from scene
+    # Remove properties from scene
+    del bpy.types.Scene.hidex_hidden_collection
+    del bpy.types.Scene.hidex_hide_method
+    del bpy.types.Scene.hidex_active_hidden
+    del bpy.types.Scene.hidex_active_hide_set
+    del bpy.types.Scene.hidex_hide_sets
     del bpy.types.Scene.hidex_hidden_objects
     
-    bpy.utils.unregister_class(HIDEX_PT_panel)
+    bpy.utils.unregister_class(HIDEX_OT_hide_set_remove)
+    bpy.utils.unregister_class(HIDEX_OT_hide_set_apply)
+    bpy.utils.unregister_class(HIDEX_OT_hide_set_store)
+    bpy.utils.unregister_class(HIDEX_OT_hide_set_add)
     bpy.utils.unregister_class(HIDEX_OT_show_all)
     bpy.utils.unregister_class(HIDEX_OT_show_object)
     bpy.utils.unregister_class(HIDEX_OT_hide_selected)
+    bpy.utils.unregister_class(HIDEX_HideSet)
+    bpy.utils.unregister_class(HIDEX_HideSetMember)
     bpy.utils.unregister_class(HIDEX_HiddenObject)
 
 if __name__ == "__main__":
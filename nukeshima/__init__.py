@@ -1,4 +1,9 @@
 import bpy
+import bmesh
+from bpy.app.handlers import persistent
+import itertools
+import json
+import os
 
 bl_info = {
     "name": "Nukeshima",
@@ -10,61 +15,250 @@ bl_info = {
     "category": "3D View"
 }
 
-# Translation dictionary
-translations = {
-    "en_US": {
-        "Delete Vertices": "Delete Vertices",
-        "Delete Edges": "Delete Edges", 
-        "Delete Faces": "Delete Faces",
-        "Delete Objects": "Delete Objects",
-        "Dissolve Vertices": "Dissolve Vertices",
-        "Dissolve Edges": "Dissolve Edges",
-        "Dissolve Faces": "Dissolve Faces",
-        "Limited Dissolve": "Limited Dissolve",
-        "Edge Collapse": "Edge Collapse",
-        "Edge Loops": "Edge Loops",
-        "Only Edges & Faces": "Only Edges & Faces",
-        "Only Faces": "Only Faces"
-    },
-    "ja_JP": {
-        "Delete Vertices": "頂点を削除",
-        "Delete Edges": "辺を削除",
-        "Delete Faces": "面を削除", 
-        "Delete Objects": "オブジェクトを削除",
-        "Dissolve Vertices": "頂点を融解",
-        "Dissolve Edges": "辺を融解",
-        "Dissolve Faces": "面を融解",
-        "Limited Dissolve": "制限融解",
-        "Edge Collapse": "辺を潰す",
-        "Edge Loops": "辺ループ",
-        "Only Edges & Faces": "辺と面のみ",
-        "Only Faces": "面のみ"
-    }
-}
+# Translations live in locale/<language>.json and are read on first use.
+# The English strings are the lookup keys, so English needs no file.
+LOCALE_DIR = os.path.join(os.path.dirname(__file__), "locale")
+
+# Loaded tables per language code
+_translation_tables = {}
+# Table for the current UI language (reset to None when the language changes)
+_active_translations = None
+
+# msgbus owner for the language preference subscriptions
+_language_owner = object()
+
+def load_translations(lang):
+    """Load the table for a language code (cached after the first call)"""
+    table = _translation_tables.get(lang)
+    if table is None:
+        try:
+            with open(os.path.join(LOCALE_DIR, f"{lang}.json"), encoding="utf-8") as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            # Unsupported language: fall back to the English keys
+            table = {}
+        _translation_tables[lang] = table
+    return table
+
+def invalidate_translations(*_args):
+    """Pick the table again on the next lookup (msgbus callback)"""
+    global _active_translations
+    _active_translations = None
 
 def get_translation(text):
     """Get translated text based on current language and UI translation setting"""
-    prefs = bpy.context.preferences.view
-    
-    # Check if translation is enabled in UI
-    if not prefs.use_translate_interface:
+    global _active_translations
+    table = _active_translations
+    if table is None:
+        prefs = bpy.context.preferences.view
         # If translation is disabled, always use English
-        return translations.get('en_US', {}).get(text, text)
+        lang = prefs.language if prefs.use_translate_interface else 'en_US'
+        table = _active_translations = load_translations(lang)
+    return table.get(text, text)
+
+def subscribe_language_changes():
+    """Invalidate the active table when the UI language settings change"""
+    for prop in ("language", "use_translate_interface"):
+        bpy.msgbus.subscribe_rna(
+            key=(bpy.types.PreferencesView, prop),
+            owner=_language_owner,
+            args=(),
+            notify=invalidate_translations,
+        )
+
+@persistent
+def resubscribe_language_changes(*_args):
+    """load_post handler: loading a file clears every msgbus subscription"""
+    invalidate_translations()
+    subscribe_language_changes()
+
+class NUKESHIMA_AddonPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+    
+    purge_unused_data: bpy.props.BoolProperty(
+        name="Purge Unused Data",
+        description="When deleting objects, also remove the meshes, materials and images that no longer have any users",
+        default=False
+    )
     
-    # If translation is enabled, check the system language
-    lang = prefs.language
+    def draw(self, context):
+        self.layout.prop(self, "purge_unused_data", text=get_translation("Purge Unused Data"))
+
+def get_preferences():
+    """Add-on preferences, or None when not loaded as an add-on"""
+    addon = bpy.context.preferences.addons.get(__name__)
+    return addon.preferences if addon else None
+
+def can_batch_delete(objects, scene):
+    """Whether bpy.data.batch_remove gives the same result as object.delete(use_global=False)
     
-    # Map Blender language codes to our translation keys
-    lang_map = {
-        'ja_JP': 'ja_JP',
-        'DEFAULT': 'en_US'
-    }
+    Objects that are linked from a library, that also belong to another
+    scene, or that sit in a collection outside this scene (one used only by
+    collection instances, or a fake-user asset collection) are only unlinked
+    from the current scene by the operator, so they must not be removed from
+    the file.
+    """
+    if any(obj.library is not None for obj in objects):
+        return False
+    # One pass over the other scenes and the collections outside this scene,
+    # instead of obj.users_scene / obj.users_collection, which scan every
+    # scene or collection again for each object
+    scene_collections = {collection.session_uid for collection in scene.collection.children_recursive}
+    outside_objects = {obj.session_uid for other in bpy.data.scenes if other != scene for obj in other.objects}
+    for collection in bpy.data.collections:
+        if collection.session_uid not in scene_collections:
+            outside_objects.update(obj.session_uid for obj in collection.objects)
+    if outside_objects and any(obj.session_uid in outside_objects for obj in objects):
+        return False
+    return True
+
+def delete_objects(objects, purge_data=False):
+    """Delete objects with one bpy.data.batch_remove call
+    
+    With purge_data, the meshes, materials and images the objects used are
+    removed as well once nothing else uses them (fake users and linked data
+    are kept). Each level only becomes unused after the one above it is
+    gone, so they are removed in that order, one batch each.
+    Returns (objects deleted, data-blocks purged).
+    """
+    objects = list(objects)
+    meshes = set()
+    materials = set()
+    images = set()
+    if purge_data:
+        for obj in objects:
+            if obj.type == 'MESH':
+                meshes.add(obj.data)
+            for slot in obj.material_slots:
+                if slot.material is not None:
+                    materials.add(slot.material)
+        for material in materials:
+            if material.node_tree is not None:
+                for node in material.node_tree.nodes:
+                    if node.type == 'TEX_IMAGE' and node.image is not None:
+                        images.add(node.image)
     
-    # Get the appropriate language key
-    lang_key = lang_map.get(lang, 'en_US')
+    bpy.data.batch_remove(objects)
     
-    # Return translated text or original if not found
-    return translations.get(lang_key, {}).get(text, text)
+    purged = 0
+    for candidates in (meshes, materials, images):
+        unused = [id_data for id_data in candidates if id_data.users == 0 and id_data.library is None]
+        if unused:
+            bpy.data.batch_remove(unused)
+            purged += len(unused)
+    return len(objects), purged
+
+def delete_selected_objects(context):
+    """Object mode delete of the selected objects (no confirmation)"""
+    objects = context.selected_objects
+    if not objects:
+        return
+    if not can_batch_delete(objects, context.scene):
+        bpy.ops.object.delete(use_global=False, confirm=False)
+        return
+    prefs = get_preferences()
+    delete_objects(objects, purge_data=prefs is not None and prefs.purge_unused_data)
+    # batch_remove sends no notifiers; redraw the viewport, outliner and properties
+    if context.screen is not None:
+        for area in context.screen.areas:
+            area.tag_redraw()
+
+def selection_counts(mesh):
+    """(vertices, edges, faces) selected in an edit-mode mesh
+    
+    Read from the counters the edit mesh keeps up to date, so the cost does
+    not depend on the mesh size (no BMesh elements are visited).
+    """
+    return mesh.total_vert_sel, mesh.total_edge_sel, mesh.total_face_sel
+
+def smart_delete_type(mesh):
+    """Delete type for the selection (faces > edges > vertices), or None if nothing is selected"""
+    verts, edges, faces = selection_counts(mesh)
+    if faces:
+        return 'FACE'
+    if edges:
+        return 'EDGE'
+    if verts:
+        return 'VERT'
+    return None
+
+# Delete types applied with bmesh.ops: (selected element: 0 verts / 1 edges / 2 faces,
+# bmesh.ops.delete context, or None for the dissolve of that element)
+BMESH_DELETE_TYPES = {
+    'VERT': (0, 'VERTS'),
+    'EDGE': (1, 'EDGES'),
+    'FACE': (2, 'FACES'),
+    'EDGE_FACE': (1, 'EDGES_FACES'),
+    'ONLY_FACE': (2, 'FACES_ONLY'),
+    'DISSOLVE_VERTS': (0, None),
+    'DISSOLVE_EDGES': (1, None),
+    'DISSOLVE_FACES': (2, None),
+}
+
+# Delete types without a bmesh equivalent, run through the mesh operators
+OPERATOR_DELETE_TYPES = {'DISSOLVE_LIMITED', 'EDGE_COLLAPSE', 'EDGE_LOOPS'}
+
+def selected_elements(sequence, count):
+    """Selected elements of a BMesh sequence, given how many are selected"""
+    if not count:
+        return []
+    if count == len(sequence):
+        return list(sequence)
+    return [element for element in sequence if element.select]
+
+def delete_selected(mesh, delete_type):
+    """Delete or dissolve the selection of one edit-mode mesh with bmesh.ops
+    
+    The edit mesh is updated once. Returns False if nothing of the needed
+    kind was selected (the mesh is left untouched).
+    """
+    counts = selection_counts(mesh)
+    kind, context = BMESH_DELETE_TYPES[delete_type]
+    if not counts[kind]:
+        return False
+    
+    bm = bmesh.from_edit_mesh(mesh)
+    verts = selected_elements(bm.verts, counts[0])
+    edges = selected_elements(bm.edges, counts[1])
+    faces = selected_elements(bm.faces, counts[2])
+    geom = (verts, edges, faces)[kind]
+    
+    if context is not None:
+        bmesh.ops.delete(bm, geom=geom, context=context)
+        # Like the delete operator, leave nothing selected
+        for element in itertools.chain(verts, edges, faces):
+            if element.is_valid and element.select:
+                element.select = False
+    elif kind == 0:
+        bmesh.ops.dissolve_verts(bm, verts=geom)
+    elif kind == 1:
+        bmesh.ops.dissolve_edges(bm, edges=geom, use_verts=True)
+    else:
+        # The merged faces stay selected, as with the dissolve operator
+        for face in bmesh.ops.dissolve_faces(bm, faces=geom)["region"]:
+            face.select = True
+    
+    bmesh.update_edit_mesh(mesh, loop_triangles=True, destructive=True)
+    return True
+
+def delete_in_edit_meshes(objects, delete_type=None):
+    """Delete in every mesh being edited, in one pass
+    
+    delete_type: a BMESH_DELETE_TYPES key, or None for the smart type of each
+    mesh (faces > edges > vertices). Meshes shared by several objects are
+    handled once. Returns the number of meshes changed.
+    """
+    done = set()
+    changed = 0
+    for obj in objects:
+        mesh = obj.data
+        if obj.type != 'MESH' or mesh.session_uid in done:
+            continue
+        done.add(mesh.session_uid)
+        mesh_type = delete_type or smart_delete_type(mesh)
+        if mesh_type is not None and delete_selected(mesh, mesh_type):
+            changed += 1
+    return changed
 
 class NUKESHIMA_OT_silent_delete(bpy.types.Operator):
     """Silent delete without confirmation dialogs"""
@@ -81,56 +275,29 @@ class NUKESHIMA_OT_silent_delete(bpy.types.Operator):
     def execute(self, context):
         # Object mode - delete selected objects
         if context.mode == 'OBJECT':
-            if context.selected_objects:
-                bpy.ops.object.delete(use_global=False, confirm=False)
+            delete_selected_objects(context)
             return {'FINISHED'}
         
-        # Edit mode - delete based on selection mode and type
+        # Edit mode - delete based on selection mode and type, in every edited mesh
         if context.mode == 'EDIT_MESH':
-            mesh = context.edit_object.data
+            objects = context.objects_in_mode
             
-            # Check what's selected
-            import bmesh
-            bm = bmesh.from_edit_mesh(mesh)
+            # Delete, dissolve and smart delete: bmesh operators, one update per mesh
+            if self.delete_type not in OPERATOR_DELETE_TYPES:
+                delete_type = self.delete_type if self.delete_type in BMESH_DELETE_TYPES else None
+                if not delete_in_edit_meshes(objects, delete_type):
+                    return {'CANCELLED'}
+                return {'FINISHED'}
             
-            selected_verts = [v for v in bm.verts if v.select]
-            selected_edges = [e for e in bm.edges if e.select]
-            selected_faces = [f for f in bm.faces if f.select]
-            
-            if not (selected_verts or selected_edges or selected_faces):
+            # No bmesh equivalent: the mesh operators handle all edited objects themselves
+            if not any(any(selection_counts(obj.data)) for obj in objects):
                 return {'CANCELLED'}
-            
-            # Execute the appropriate delete operation
-            if self.delete_type == 'VERT':
-                bpy.ops.mesh.delete(type='VERT')
-            elif self.delete_type == 'EDGE':
-                bpy.ops.mesh.delete(type='EDGE')
-            elif self.delete_type == 'FACE':
-                bpy.ops.mesh.delete(type='FACE')
-            elif self.delete_type == 'EDGE_FACE':
-                bpy.ops.mesh.delete(type='EDGE_FACE')
-            elif self.delete_type == 'ONLY_FACE':
-                bpy.ops.mesh.delete(type='ONLY_FACE')
-            elif self.delete_type == 'DISSOLVE_VERTS':
-                bpy.ops.mesh.dissolve_verts()
-            elif self.delete_type == 'DISSOLVE_EDGES':
-                bpy.ops.mesh.dissolve_edges()
-            elif self.delete_type == 'DISSOLVE_FACES':
-                bpy.ops.mesh.dissolve_faces()
-            elif self.delete_type == 'DISSOLVE_LIMITED':
+            if self.delete_type == 'DISSOLVE_LIMITED':
                 bpy.ops.mesh.dissolve_limited()
             elif self.delete_type == 'EDGE_COLLAPSE':
                 bpy.ops.mesh.edge_collapse()
             elif self.delete_type == 'EDGE_LOOPS':
                 bpy.ops.mesh.delete(type='EDGE_LOOP')
-            else:
-                # Smart delete based on selection
-                if selected_faces:
-                    bpy.ops.mesh.delete(type='FACE')
-                elif selected_edges:
-                    bpy.ops.mesh.delete(type='EDGE')
-                elif selected_verts:
-                    bpy.ops.mesh.delete(type='VERT')
             
             return {'FINISHED'}
         
@@ -211,31 +378,14 @@ class NUKESHIMA_OT_smart_delete(bpy.types.Operator):
     def execute(self, context):
         # Object mode - delete selected objects
         if context.mode == 'OBJECT':
-            if context.selected_objects:
-                bpy.ops.object.delete(use_global=False, confirm=False)
+            delete_selected_objects(context)
             return {'FINISHED'}
         
-        # Edit mode - smart selection-based delete
+        # Edit mode - smart selection-based delete, decided per edited mesh
         if context.mode == 'EDIT_MESH':
-            mesh = context.edit_object.data
-            
-            import bmesh
-            bm = bmesh.from_edit_mesh(mesh)
-            
-            selected_verts = [v for v in bm.verts if v.select]
-            selected_edges = [e for e in bm.edges if e.select]
-            selected_faces = [f for f in bm.faces if f.select]
-            
-            if not (selected_verts or selected_edges or selected_faces):
-                return {'CANCELLED'}
-            
             # Smart delete logic: prioritize faces > edges > vertices
-            if selected_faces:
-                bpy.ops.mesh.delete(type='FACE')
-            elif selected_edges:
-                bpy.ops.mesh.delete(type='EDGE')
-            elif selected_verts:
-                bpy.ops.mesh.delete(type='VERT')
+            if not delete_in_edit_meshes(context.objects_in_mode):
+                return {'CANCELLED'}
             
             return {'FINISHED'}
         
@@ -246,10 +396,19 @@ addon_keymaps = []
 
 def register():
     """Register addon"""
+    bpy.utils.register_class(NUKESHIMA_AddonPreferences)
     bpy.utils.register_class(NUKESHIMA_OT_silent_delete)
     bpy.utils.register_class(NUKESHIMA_OT_smart_delete)
+    
+    # The delete menu, shortcuts and label translations are UI-only; skip them under blender -b
+    if bpy.app.background:
+        return
+    
     bpy.utils.register_class(NUKESHIMA_MT_delete_menu)
     
+    subscribe_language_changes()
+    bpy.app.handlers.load_post.append(resubscribe_language_changes)
+    
     # Add keymap with higher priority
     wm = bpy.context.window_manager
     kc = wm.keyconfigs.addon
@@ -300,8 +459,16 @@ def unregister():
     """Unregister addon"""
     bpy.utils.unregister_class(NUKESHIMA_OT_silent_delete)
     bpy.utils.unregister_class(NUKESHIMA_OT_smart_delete)
+    bpy.utils.unregister_class(NUKESHIMA_AddonPreferences)
+    if bpy.app.background:
+        return
     bpy.utils.unregister_class(NUKESHIMA_MT_delete_menu)
     
+    if resubscribe_language_changes in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(resubscribe_language_changes)
+    bpy.msgbus.clear_by_owner(_language_owner)
+    invalidate_translations()
+    
     # Remove keymap
     for km, kmi in addon_keymaps:
         km.keymap_items.remove(kmi)
@@ -1,11 +1,18 @@
 import bpy
 import os
-import shutil
 import datetime
+import tempfile
+import threading
 from bpy.app.handlers import persistent
-from bpy.props import IntProperty
+from bpy.props import IntProperty, BoolProperty, EnumProperty
 from bpy.app.translations import pgettext_iface as _
 
+from . import backup_index
+from .relocation import RAW_STORAGE, RelocationWorker, relocate_and_prune
+from .retention import RetentionPolicy
+from .chunk_store import DEDUP_STORAGE
+from .compression import XZ_STORAGE, ZSTD_STORAGE, get_compressed_storage
+
 bl_info = {
     "name": "Subamo",
     "author": "KRACT",
@@ -16,7 +23,100 @@ bl_info = {
     "category": "System"
 }
 
+# バックグラウンド移動用ワーカー（最初の保存時に作成）
+_relocation_worker = None
+
+
+# アドオンPreferences設定クラス
+class SUBAMO_AddonPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+    
+    # 保存後の移動処理をバックグラウンドで行うか
+    background_relocation: BoolProperty(
+        name="Background Relocation",
+        description="Move backup files on a worker thread so saving returns immediately",
+        default=True
+    )
+    
+    # backupフォルダへの保存方式
+    storage_mode: EnumProperty(
+        name="Storage Mode",
+        description="How backup files are stored in the backup folder",
+        items=[
+            ('MOVE', "Move", "Move backup files into the backup folder as they are (Default)"),
+            ('DEDUP', "Deduplicate", "Split backups into content-defined chunks and store each unique chunk once"),
+            ('COMPRESS', "Compress", "Compress backups with zstd (xz if zstd is unavailable) while moving them"),
+        ],
+        default='MOVE'
+    )
+    
+    # Save Versions を超えたバックアップを削除するか（既定では削除しない）
+    remove_old_backups: BoolProperty(
+        name="Remove Old Backups",
+        description="Delete backups beyond Blender's Save Versions setting when rotating the backup folder",
+        default=False
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "background_relocation")
+        layout.prop(self, "storage_mode")
+        layout.prop(self, "remove_old_backups")
+
+
+# プロジェクトごとの保持ポリシー（.blendファイルに保存される）
+class SUBAMO_RetentionSettings(bpy.types.PropertyGroup):
+    use_retention: BoolProperty(
+        name="Retention Policy",
+        description="Automatically prune old backups after each save",
+        default=False
+    )
+    max_total_mb: IntProperty(
+        name="Max Total (MB)",
+        description="Maximum disk space for this file's backups (0 = unlimited)",
+        default=0,
+        min=0
+    )
+    max_age_days: IntProperty(
+        name="Max Age (Days)",
+        description="Remove backups older than this many days (0 = unlimited)",
+        default=0,
+        min=0
+    )
+    keep_hourly: IntProperty(
+        name="Keep Hourly",
+        description="Keep only the newest backup for each of the last N hours (0 = disabled)",
+        default=0,
+        min=0
+    )
+    keep_daily: IntProperty(
+        name="Keep Daily",
+        description="Keep only the newest backup for each of the last N days (0 = disabled)",
+        default=0,
+        min=0
+    )
+    
+    def to_policy(self):
+        """ワーカースレッドに渡すための RetentionPolicy を作成"""
+        if not self.use_retention:
+            return None
+        return RetentionPolicy(
+            max_total_bytes=self.max_total_mb * 1024 * 1024,
+            max_age_days=self.max_age_days,
+            keep_hourly=self.keep_hourly,
+            keep_daily=self.keep_daily
+        )
+
+
+# 保存方式の設定値 -> 保存方式
+STORAGE_MODES = {
+    'MOVE': RAW_STORAGE,
+    'DEDUP': DEDUP_STORAGE,
+    'COMPRESS': get_compressed_storage(),
+}
 
+# backup フォルダで接尾辞から認識する保存方式（圧縮はどちらの形式も読み込める）
+SUFFIXED_STORAGES = (DEDUP_STORAGE, ZSTD_STORAGE, XZ_STORAGE)
 
 
 class SUBAMO_OT_delete_backup(bpy.types.Operator):
@@ -38,16 +138,19 @@ class SUBAMO_OT_delete_backup(bpy.types.Operator):
         base_name = os.path.splitext(current_filename)[0]
         backup_dir = os.path.join(current_dir, "backup")
         
-        backup_extensions = [f'.blend{i}' for i in range(1, 33)]  # .blend1 to .blend32
-        
-        if self.backup_index < len(backup_extensions):
-            ext = backup_extensions[self.backup_index]
-            backup_filename = base_name + ext
-            backup_filepath = os.path.join(backup_dir, backup_filename)
+        if self.backup_index < backup_index.MAX_BACKUP_NUMBER:
+            found = backup_index.find_backup(backup_dir, base_name, self.backup_index + 1)
             
-            if os.path.exists(backup_filepath):
+            if found:
+                backup_filepath, suffix = found
+                backup_filename = os.path.basename(backup_filepath)
                 try:
                     os.remove(backup_filepath)
+                    backup_index.invalidate(backup_dir)
+                    # 共有データの後始末は時間がかかるためスレッドで実行
+                    storage = backup_index.get_storage(suffix)
+                    if storage is not None:
+                        threading.Thread(target=storage.after_remove, args=(backup_dir,), daemon=True).start()
                     self.report({'INFO'}, _("Deleted {}").format(backup_filename))
                 except Exception as e:
                     self.report({'ERROR'}, _("Failed to delete backup: {}").format(str(e)))
@@ -77,15 +180,17 @@ class SUBAMO_OT_open_backup(bpy.types.Operator):
         base_name = os.path.splitext(current_filename)[0]
         backup_dir = os.path.join(current_dir, "backup")
         
-        backup_extensions = [f'.blend{i}' for i in range(1, 33)]  # .blend1 to .blend32
-        
-        if self.backup_index < len(backup_extensions):
-            ext = backup_extensions[self.backup_index]
-            backup_filename = base_name + ext
-            backup_filepath = os.path.join(backup_dir, backup_filename)
+        if self.backup_index < backup_index.MAX_BACKUP_NUMBER:
+            found = backup_index.find_backup(backup_dir, base_name, self.backup_index + 1)
             
-            if os.path.exists(backup_filepath):
+            if found:
+                backup_filepath, suffix = found
+                backup_filename = os.path.basename(backup_filepath)
                 try:
+                    storage = backup_index.get_storage(suffix)
+                    if storage is not None:
+                        # 保存形式から一時ファイルへ復元してから開く
+                        backup_filepath = restore_backup(storage, backup_filepath, base_name, self.backup_index + 1)
                     bpy.ops.wm.open_mainfile(filepath=backup_filepath)
                     self.report({'INFO'}, _("Opened {}").format(backup_filename))
                 except Exception as e:
@@ -97,46 +202,62 @@ class SUBAMO_OT_open_backup(bpy.types.Operator):
         
         return {'FINISHED'}
 
-def organize_backup_files(current_filepath):
-    """現在のファイルパスに基づいてバックアップファイルを整理"""
-    if not current_filepath:
-        return 0
-    
-    # 現在のファイルのディレクトリとベース名を取得
-    current_dir = os.path.dirname(current_filepath)
-    current_filename = os.path.basename(current_filepath)
-    base_name = os.path.splitext(current_filename)[0]
-    
-    # backupフォルダのパスを作成
-    backup_dir = os.path.join(current_dir, "backup")
-    
-    # バックアップファイルの拡張子リスト（Blenderの最大32個に対応）
-    backup_extensions = [f'.blend{i}' for i in range(1, 33)]  # .blend1 to .blend32
+def restore_backup(storage, backup_filepath, base_name, number):
+    """保存形式のバックアップを一時フォルダに .blend として復元し、そのパスを返す"""
+    restore_dir = os.path.join(tempfile.gettempdir(), "subamo")
+    os.makedirs(restore_dir, exist_ok=True)
+    restore_path = os.path.join(restore_dir, f"{base_name}.blend{number}.blend")
+    storage.restore(backup_filepath, restore_path)
+    return restore_path
+
+def get_preferences():
+    """アドオンPreferencesを取得"""
+    addon = bpy.context.preferences.addons.get(__name__)
+    return addon.preferences if addon else None
+
+
+def tag_redraw_panels():
+    """3Dビューのサイドバーを再描画"""
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                for region in area.regions:
+                    if region.type == 'UI':
+                        region.tag_redraw()
+
+
+def poll_relocation_results():
+    """バックグラウンド移動の完了結果をメインスレッドで処理（タイマー）"""
+    worker = _relocation_worker
+    if worker is None:
+        return None
     
-    moved_count = 0
+    results = worker.poll_results()
+    for result in results:
+        if result.error is not None:
+            print(f"Subamo: Error organizing backup files: {str(result.error)}")
+    if results:
+        tag_redraw_panels()
     
-    # 各バックアップファイルをチェック
-    for ext in backup_extensions:
-        backup_filename = base_name + ext
-        backup_filepath = os.path.join(current_dir, backup_filename)
-        
-        # バックアップファイルが存在する場合
-        if os.path.exists(backup_filepath):
-            # backupフォルダが存在しない場合は作成
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
-            
-            # バックアップファイルをbackupフォルダに移動
-            destination_path = os.path.join(backup_dir, backup_filename)
-            
-            # 同名ファイルが既に存在する場合は上書き
-            if os.path.exists(destination_path):
-                os.remove(destination_path)
-            
-            shutil.move(backup_filepath, destination_path)
-            moved_count += 1
+    # ジョブが残っていれば監視を続ける
+    return 0.2 if worker.is_busy() else None
+
+
+def get_max_versions():
+    """Blenderの Save Versions 設定（バックアップの保持数）"""
+    save_version = bpy.context.preferences.filepaths.save_version
+    return min(max(save_version, 1), backup_index.MAX_BACKUP_NUMBER)
+
+
+def relocate_in_background(filepath, max_versions, storage, policy):
+    """移動ジョブをワーカーに投入し、完了監視タイマーを開始"""
+    global _relocation_worker
+    if _relocation_worker is None:
+        _relocation_worker = RelocationWorker()
+    _relocation_worker.submit(filepath, max_versions, storage, policy)
     
-    return moved_count
+    if not bpy.app.timers.is_registered(poll_relocation_results):
+        bpy.app.timers.register(poll_relocation_results, first_interval=0.2)
 
 
 @persistent
@@ -144,8 +265,20 @@ def save_post_handler(dummy):
     """ファイル保存後にバックアップファイルを自動整理"""
     try:
         current_filepath = bpy.data.filepath
-        if current_filepath:
-            organize_backup_files(current_filepath)
+        if not current_filepath:
+            return
+        
+        prefs = get_preferences()
+        # 削除は明示的に有効にした場合のみ
+        max_versions = get_max_versions() if prefs and prefs.remove_old_backups else None
+        storage = STORAGE_MODES[prefs.storage_mode] if prefs else RAW_STORAGE
+        policy = bpy.context.scene.subamo_retention.to_policy()
+        # バックグラウンド（-b）実行時はタイマーが回らないため同期的に処理
+        if prefs and prefs.background_relocation and not bpy.app.background:
+            relocate_in_background(current_filepath, max_versions, storage, policy)
+            return
+        
+        relocate_and_prune(current_filepath, max_versions, storage, policy)
     except Exception as e:
         print(f"Subamo: Error organizing backup files: {str(e)}")
 
@@ -170,38 +303,35 @@ class SUBAMO_PT_panel(bpy.types.Panel):
             
             layout.label(text=_("Backup Files:"))
             
-            if os.path.exists(backup_dir):
-                # 同じプロジェクトのバックアップファイル一覧を取得
-                backup_extensions = [f'.blend{i}' for i in range(1, 33)]  # .blend1 to .blend32
-                backup_files = []
-                
-                for i, ext in enumerate(backup_extensions):
-                    backup_filename = base_name + ext
-                    backup_filepath = os.path.join(backup_dir, backup_filename)
-                    
-                    if os.path.exists(backup_filepath):
-                        # ファイル情報を取得
-                        stat = os.stat(backup_filepath)
-                        modified_time = datetime.datetime.fromtimestamp(stat.st_mtime)
-                        backup_files.append({
-                            'index': i,
-                            'number': ext[6:],  # .blend1 -> 1
-                            'filename': backup_filename,
-                            'datetime': modified_time.strftime("%m/%d %H:%M"),
-                            'size': round(stat.st_size / 1024 / 1024, 1)  # MB
-                        })
+            # キャッシュ済みインデックスから取得（ファイル単位のstatは行わない）
+            project_backups = backup_index.lookup(backup_dir, base_name)
+            if project_backups is not None:
+                max_visible_rows = 10  # 最大表示数（32個まで対応するため少し増加）
                 
-                # バックアップファイルを新しい順にソート（番号が大きい = 新しい）
-                backup_files.sort(key=lambda x: int(x['number']), reverse=True)
+                # 表示する行のぶんだけ表示用の情報を作る
+                backup_files = []
+                for entry in project_backups.entries[:max_visible_rows]:
+                    modified_time = datetime.datetime.fromtimestamp(entry.mtime)
+                    backup_files.append({
+                        'index': entry.number - 1,
+                        'number': str(entry.number),
+                        'filename': entry.filename,
+                        'datetime': modified_time.strftime("%m/%d %H:%M"),
+                        'size': round(entry.size / 1024 / 1024, 1),  # MB
+                        # 圧縮保存の場合はディスク上のサイズも表示
+                        'stored_size': (
+                            round(entry.stored_size / 1024 / 1024, 1)
+                            if entry.stored_size is not None and entry.stored_size != entry.size else None
+                        )
+                    })
                 
                 if backup_files:
                     # Versave風のリスト表示
                     box = layout.box()
                     
                     col = box.column(align=False)
-                    max_visible_rows = 10  # 最大表示数（32個まで対応するため少し増加）
                     
-                    for i, backup in enumerate(backup_files[:max_visible_rows]):
+                    for i, backup in enumerate(backup_files):
                         # アイテム間の間隔
                         if i > 0:
                             col.separator(factor=0.3)
@@ -211,7 +341,7 @@ class SUBAMO_PT_panel(bpy.types.Panel):
                         # バックアップアイコン
                         row.label(text="", icon='FILE_BACKUP')
                         
-                        # バックアップ番号（固定幅・番号大きい=新しい）
+                        # バックアップ番号（固定幅・番号小さい=新しい）
                         number_col = row.column()
                         number_col.ui_units_x = 2.0  # 2桁対応のため幅を拡張
                         number_col.label(text=f"#{backup['number']}")
@@ -223,9 +353,13 @@ class SUBAMO_PT_panel(bpy.types.Panel):
                         
                         # ファイルサイズ（固定幅・右寄せ）
                         size_col = row.column()
-                        size_col.ui_units_x = 3.5
                         size_col.alignment = 'RIGHT'
-                        size_col.label(text=f"{backup['size']}MB")
+                        if backup['stored_size'] is not None:
+                            size_col.ui_units_x = 6.0
+                            size_col.label(text=f"{backup['stored_size']}/{backup['size']}MB")
+                        else:
+                            size_col.ui_units_x = 3.5
+                            size_col.label(text=f"{backup['size']}MB")
                         
                         # スペーサー
                         row.separator()
@@ -241,16 +375,16 @@ class SUBAMO_PT_panel(bpy.types.Panel):
                         delete_op.backup_index = backup['index']
                     
                     # 表示されていないファイルがある場合の表示
-                    if len(backup_files) > max_visible_rows:
+                    if len(project_backups) > max_visible_rows:
                         col.separator(factor=0.3)
-                        col.label(text=f"... {_('... and {} more files').format(len(backup_files) - max_visible_rows)}")
+                        col.label(text=f"... {_('... and {} more files').format(len(project_backups) - max_visible_rows)}")
                     
-                    # 統計情報
+                    # 統計情報（インデックスで集計済み）
                     layout.separator(factor=0.5)
                     stats_row = layout.row()
                     stats_row.scale_y = 0.8
-                    total_size = sum(backup['size'] for backup in backup_files)
-                    stats_row.label(text=_("Total: {} files, {:.1f}MB").format(len(backup_files), total_size))
+                    total_size = project_backups.total_size / 1024 / 1024
+                    stats_row.label(text=_("Total: {} files, {:.1f}MB").format(len(project_backups), total_size))
                     
                 else:
                     layout.label(text="No backup files found")
@@ -259,6 +393,36 @@ class SUBAMO_PT_panel(bpy.types.Panel):
         else:
             layout.label(text="No file open")
 
+
+class SUBAMO_PT_retention(bpy.types.Panel):
+    """Subamo 保持ポリシーパネル"""
+    bl_label = "Retention"
+    bl_idname = "SUBAMO_PT_retention"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Tool"
+    bl_parent_id = "SUBAMO_PT_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw_header(self, context):
+        self.layout.prop(context.scene.subamo_retention, "use_retention", text="")
+    
+    def draw(self, context):
+        layout = self.layout
+        settings = context.scene.subamo_retention
+        
+        layout.label(text=_("Project Settings:"))
+        col = layout.column(align=True)
+        col.active = settings.use_retention
+        col.prop(settings, "max_total_mb")
+        col.prop(settings, "max_age_days")
+        col.prop(settings, "keep_hourly")
+        col.prop(settings, "keep_daily")
+        
+        note = layout.row()
+        note.scale_y = 0.8
+        note.label(text=_("Note: Retention settings are saved in this file"), icon='INFO')
+
 # 翻訳辞書
 translations_dict = {
     "en_US": {},
@@ -270,6 +434,7 @@ translations_dict = {
         ("*", "Auto Save: Disabled"): "自動保存: 無効",
         ("*", "Change Settings"): "設定変更",
         ("*", "Note: Settings are saved per project"): "注意: 設定はプロジェクトごとに保存され、Blenderのバックアップ作成設定も連動します",
+        ("*", "Note: Retention settings are saved in this file"): "注意: 保持設定はこのファイルに保存されます",
         ("*", "Project settings updated"): "プロジェクト設定を更新しました",
         ("*", "Backup Files:"): "バックアップファイル:",
         ("*", "Date"): "日時",
@@ -286,14 +451,47 @@ translations_dict = {
         ("*", "Backup file not found"): "バックアップファイルが見つかりません",
         ("*", "Opened {}"): "{}を開きました",
         ("*", "Failed to open backup: {}"): "バックアップのオープンに失敗: {}",
+        ("*", "Background Relocation"): "バックグラウンドで移動",
+        ("*", "Move backup files on a worker thread so saving returns immediately"): "バックアップファイルをワーカースレッドで移動し、保存をすぐに完了させます",
+        ("*", "Storage Mode"): "保存方式",
+        ("*", "How backup files are stored in the backup folder"): "backupフォルダでのバックアップの保存方式",
+        ("*", "Move"): "移動",
+        ("*", "Move backup files into the backup folder as they are (Default)"): "バックアップファイルをそのままbackupフォルダへ移動（デフォルト）",
+        ("*", "Deduplicate"): "重複排除",
+        ("*", "Split backups into content-defined chunks and store each unique chunk once"): "バックアップを内容に応じたチャンクに分割し、同じチャンクは1回だけ保存",
+        ("*", "Compress"): "圧縮",
+        ("*", "Compress backups with zstd (xz if zstd is unavailable) while moving them"): "移動時にバックアップをzstdで圧縮（zstdが使えない場合はxz）",
+        ("*", "Remove Old Backups"): "古いバックアップを削除",
+        ("*", "Delete backups beyond Blender's Save Versions setting when rotating the backup folder"): "ローテーション時にBlenderの「保存バージョン数」を超えたバックアップを削除",
+        ("*", "Retention"): "保持ポリシー",
+        ("*", "Retention Policy"): "保持ポリシー",
+        ("*", "Automatically prune old backups after each save"): "保存のたびに古いバックアップを自動で整理",
+        ("*", "Max Total (MB)"): "合計上限 (MB)",
+        ("*", "Maximum disk space for this file's backups (0 = unlimited)"): "このファイルのバックアップが使うディスク容量の上限（0 = 無制限）",
+        ("*", "Max Age (Days)"): "保持期間 (日)",
+        ("*", "Remove backups older than this many days (0 = unlimited)"): "この日数より古いバックアップを削除（0 = 無制限）",
+        ("*", "Keep Hourly"): "1時間ごとに保持",
+        ("*", "Keep only the newest backup for each of the last N hours (0 = disabled)"): "直近N時間は1時間ごとに最新のバックアップだけを残す（0 = 無効）",
+        ("*", "Keep Daily"): "1日ごとに保持",
+        ("*", "Keep only the newest backup for each of the last N days (0 = disabled)"): "直近N日は1日ごとに最新のバックアップだけを残す（0 = 無効）",
     }
 }
 
 def register():
     """アドオン登録"""
+    for storage in SUFFIXED_STORAGES:
+        backup_index.register_storage(storage)
+    bpy.utils.register_class(SUBAMO_AddonPreferences)
+    bpy.utils.register_class(SUBAMO_RetentionSettings)
     bpy.utils.register_class(SUBAMO_OT_delete_backup)
     bpy.utils.register_class(SUBAMO_OT_open_backup)
-    bpy.utils.register_class(SUBAMO_PT_panel)
+    # パネルはバックグラウンド実行（blender -b）では不要
+    if not bpy.app.background:
+        bpy.utils.register_class(SUBAMO_PT_panel)
+        bpy.utils.register_class(SUBAMO_PT_retention)
+    
+    # プロジェクトごとの保持ポリシーをシーンに追加
+    bpy.types.Scene.subamo_retention = bpy.props.PointerProperty(type=SUBAMO_RetentionSettings)
     
     # 翻訳を登録（既に登録済みの場合はスキップ）
     try:
@@ -307,10 +505,19 @@ def register():
 
 def unregister():
     """アドオン登録解除"""
+    global _relocation_worker
+    
     # ハンドラーを削除
     if save_post_handler in bpy.app.handlers.save_post:
         bpy.app.handlers.save_post.remove(save_post_handler)
     
+    # 実行中の移動ジョブの完了を待ってからワーカーを停止
+    if bpy.app.timers.is_registered(poll_relocation_results):
+        bpy.app.timers.unregister(poll_relocation_results)
+    if _relocation_worker is not None:
+        _relocation_worker.shutdown(wait=True)
+        _relocation_worker = None
+    
     # 翻訳を解除
     try:
         bpy.app.translations.unregister(__name__)
@@ -318,9 +525,17 @@ def unregister():
         # 登録されていない場合は無視
         pass
     
-    bpy.utils.unregister_class(SUBAMO_PT_panel)
+    backup_index.invalidate()
+    
+    del bpy.types.Scene.subamo_retention
+    
+    if not bpy.app.background:
+        bpy.utils.unregister_class(SUBAMO_PT_retention)
+        bpy.utils.unregister_class(SUBAMO_PT_panel)
     bpy.utils.unregister_class(SUBAMO_OT_open_backup)
     bpy.utils.unregister_class(SUBAMO_OT_delete_backup)
+    bpy.utils.unregister_class(SUBAMO_RetentionSettings)
+    bpy.utils.unregister_class(SUBAMO_AddonPreferences)
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
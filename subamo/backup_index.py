@@ -0,0 +1,286 @@
+"""バックアップフォルダのキャッシュ付きインデックス
+
+バックアップフォルダを os.scandir で一度だけ走査し、結果をディレクトリの
+mtime をキーにしてキャッシュする。パネルの draw() はこのインデックスを
+参照するだけで、ファイル単位のシステムコールは発行しない。
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+# バックアップフォルダ名
+BACKUP_FOLDER = "backup"
+
+# Blenderが作成するバックアップの最大数（.blend1 〜 .blend32）
+MAX_BACKUP_NUMBER = 32
+
+# ディレクトリの mtime を再確認するまでの最短間隔（秒）
+STAT_INTERVAL = 1.0
+
+_BACKUP_NAME_RE = re.compile(r'^(.+)\.blend([1-9][0-9]?)$')
+
+# 圧縮保存したバックアップの元サイズを記録するサイドカー
+SIZES_FILE = ".subamo_sizes.json"
+
+# size は元のファイルサイズ、stored_size はディスク上のサイズ（比較できない保存方式では None）
+BackupEntry = namedtuple("BackupEntry", ["number", "filename", "path", "size", "mtime", "suffix", "stored_size"])
+
+# 保存方式ごとのファイル接尾辞 -> 保存方式（接尾辞なしは通常のファイル）
+_storages = {}
+
+# backup フォルダへ書き込む処理を直列化するためのロック
+_dir_locks = {}
+_dir_locks_guard = threading.Lock()
+
+
+class ProjectBackups:
+    """1つの .blend ファイルに属するバックアップ一覧（新しい順）"""
+    __slots__ = ("entries", "total_size")
+
+    def __init__(self, entries):
+        # ローテーションにより .blend1 が最新
+        self.entries = tuple(sorted(entries, key=lambda e: e.number))
+        self.total_size = sum(e.size for e in self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+EMPTY_BACKUPS = ProjectBackups(())
+
+
+def register_storage(storage):
+    """接尾辞付きで保存されるバックアップの保存方式を登録"""
+    _storages[storage.suffix] = storage
+
+
+def get_storage(suffix):
+    """接尾辞に対応する保存方式（通常のファイルなら None）"""
+    return _storages.get(suffix)
+
+
+def directory_lock(backup_dir):
+    """backup フォルダ単位の再入可能ロック"""
+    with _dir_locks_guard:
+        return _dir_locks.setdefault(backup_dir, threading.RLock())
+
+
+def parse_backup_name(filename):
+    """'name.blendN[接尾辞]' を (name, N, 接尾辞) に分解。バックアップ名でなければ None"""
+    suffix = ""
+    for storage_suffix in _storages:
+        if filename.endswith(storage_suffix):
+            suffix = storage_suffix
+            filename = filename[:-len(storage_suffix)]
+            break
+    match = _BACKUP_NAME_RE.match(filename)
+    if not match:
+        return None
+    number = int(match.group(2))
+    if number > MAX_BACKUP_NUMBER:
+        return None
+    return match.group(1), number, suffix
+
+
+def find_backup(backup_dir, base_name, number):
+    """番号に対応するバックアップ（保存方式を問わず）のパスと接尾辞。無ければ None"""
+    for suffix in ("", *_storages):
+        path = os.path.join(backup_dir, f"{base_name}.blend{number}{suffix}")
+        if os.path.exists(path):
+            return path, suffix
+    return None
+
+
+def size_key(stat):
+    """サイドカーのキー。リネームでは変わらない mtime とサイズから作る"""
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def load_sizes(backup_dir):
+    """サイドカーから {キー: 元サイズ} を読み込む"""
+    try:
+        with open(os.path.join(backup_dir, SIZES_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_sizes(backup_dir, updates):
+    """サイドカーに元サイズを追記し、存在しないファイルのキーを取り除く
+
+    呼び出し側で directory_lock を取得しておくこと。
+    """
+    live_keys = set()
+    with os.scandir(backup_dir) as it:
+        for entry in it:
+            parsed = parse_backup_name(entry.name)
+            if parsed is not None and parsed[2]:
+                try:
+                    live_keys.add(size_key(entry.stat()))
+                except OSError:
+                    pass
+    sizes = load_sizes(backup_dir)
+    sizes.update(updates)
+    sizes = {key: size for key, size in sizes.items() if key in live_keys}
+
+    path = os.path.join(backup_dir, SIZES_FILE)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(sizes, f)
+    os.replace(temp_path, path)
+
+
+def get_backup_dir(filepath):
+    """.blend ファイルパスに対応するバックアップフォルダのパス"""
+    return os.path.join(os.path.dirname(filepath), BACKUP_FOLDER)
+
+
+def scan_backup_dir(backup_dir):
+    """バックアップフォルダを1回の os.scandir で走査し、ベース名ごとに分類"""
+    grouped = {}
+    sizes = None
+    with os.scandir(backup_dir) as it:
+        for entry in it:
+            parsed = parse_backup_name(entry.name)
+            if parsed is None:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            base_name, number, suffix = parsed
+            size = stored_size = stat.st_size
+            if suffix:
+                storage = _storages[suffix]
+                if not storage.compressed:
+                    stored_size = None
+                # 元のサイズはサイドカー、無ければ保存方式ごとのヘッダーから読む
+                if sizes is None:
+                    sizes = load_sizes(backup_dir)
+                size = sizes.get(size_key(stat))
+                if size is None:
+                    try:
+                        size = storage.read_size(entry.path)
+                    except (OSError, ValueError, KeyError):
+                        size = stat.st_size
+            grouped.setdefault(base_name, []).append(
+                BackupEntry(number, entry.name, entry.path, size, stat.st_mtime, suffix, stored_size)
+            )
+    return {base_name: ProjectBackups(entries) for base_name, entries in grouped.items()}
+
+
+class _Snapshot:
+    __slots__ = ("mtime_ns", "checked_at", "projects")
+
+    def __init__(self, mtime_ns, projects):
+        self.mtime_ns = mtime_ns
+        self.checked_at = time.monotonic()
+        self.projects = projects
+
+
+class BackupIndex:
+    """バックアップフォルダごとの走査結果キャッシュ"""
+
+    def __init__(self, stat_interval=STAT_INTERVAL):
+        self.stat_interval = stat_interval
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, backup_dir, base_name):
+        """ベース名のバックアップ一覧を返す。フォルダが無ければ None"""
+        snapshot = self._get_snapshot(backup_dir)
+        if snapshot is None:
+            return None
+        return snapshot.projects.get(base_name, EMPTY_BACKUPS)
+
+    def projects(self, backup_dir):
+        """フォルダ内のすべてのバックアップ一覧 {ベース名: ProjectBackups}。フォルダが無ければ None"""
+        snapshot = self._get_snapshot(backup_dir)
+        if snapshot is None:
+            return None
+        return dict(snapshot.projects)
+
+    def invalidate(self, backup_dir=None):
+        """キャッシュを破棄（backup_dir 省略時はすべて）"""
+        with self._lock:
+            if backup_dir is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(backup_dir, None)
+
+    def forget(self, backup_dir, paths):
+        """削除済みのファイルをキャッシュから取り除く（フォルダは再走査しない）"""
+        if not paths:
+            return
+        paths = set(paths)
+        try:
+            mtime_ns = os.stat(backup_dir).st_mtime_ns
+        except OSError:
+            self.invalidate(backup_dir)
+            return
+
+        with self._lock:
+            snapshot = self._snapshots.get(backup_dir)
+            if snapshot is None or snapshot.mtime_ns is None:
+                return
+            projects = {}
+            for base_name, project_backups in snapshot.projects.items():
+                kept = [e for e in project_backups.entries if e.path not in paths]
+                if len(kept) == len(project_backups):
+                    projects[base_name] = project_backups
+                elif kept:
+                    projects[base_name] = ProjectBackups(kept)
+            self._snapshots[backup_dir] = _Snapshot(mtime_ns, projects)
+
+    def _get_snapshot(self, backup_dir):
+        with self._lock:
+            snapshot = self._snapshots.get(backup_dir)
+        now = time.monotonic()
+        if snapshot is not None and now - snapshot.checked_at < self.stat_interval:
+            return snapshot if snapshot.mtime_ns is not None else None
+
+        # 安価な mtime チェック（ディレクトリに対する stat 1回のみ）
+        try:
+            mtime_ns = os.stat(backup_dir).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns:
+            snapshot.checked_at = now
+            return snapshot if mtime_ns is not None else None
+
+        if mtime_ns is None:
+            snapshot = _Snapshot(None, {})
+        else:
+            try:
+                snapshot = _Snapshot(mtime_ns, scan_backup_dir(backup_dir))
+            except OSError:
+                snapshot = _Snapshot(None, {})
+
+        with self._lock:
+            self._snapshots[backup_dir] = snapshot
+        return snapshot if snapshot.mtime_ns is not None else None
+
+
+# アドオン全体で共有するインデックス
+_index = BackupIndex()
+
+
+def shared_index():
+    """アドオン全体で共有するインデックス"""
+    return _index
+
+
+def lookup(backup_dir, base_name):
+    """共有インデックスからバックアップ一覧を取得"""
+    return _index.lookup(backup_dir, base_name)
+
+
+def invalidate(backup_dir=None):
+    """共有インデックスのキャッシュを破棄"""
+    _index.invalidate(backup_dir)
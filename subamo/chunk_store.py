@@ -0,0 +1,277 @@
+"""重複排除バックアップストア
+
+バックアップを内容依存のチャンクに分割し、同じチャンクは1回だけ保存する。
+各バックアップは backup フォルダ内の小さなマニフェスト（name.blendN.manifest）
+として残り、チャンク本体は backup/.subamo_chunks/ に置かれる。
+
+マニフェスト形式（テキスト）:
+    1行目: {"version": 1, "size": 元のファイルサイズ}
+    2行目以降: "<チャンクのハッシュ> <バイト数>"
+"""
+import hashlib
+import json
+import mmap
+import os
+import time
+import uuid
+
+try:
+    import numpy as np
+except ImportError:  # Blenderには同梱されているが、単体実行時に備える
+    np = None
+
+from . import backup_index
+from .relocation import claim_file
+
+MANIFEST_SUFFIX = ".manifest"
+CHUNKS_FOLDER = ".subamo_chunks"
+
+# チャンクサイズ（平均は約1MB）
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+AVG_CHUNK_BITS = 20
+
+# ローリングハッシュの窓幅、ハッシュ計算の単位、読み込み単位
+WINDOW_SIZE = 64
+HASH_BLOCK_SIZE = 1024 * 1024
+READ_SIZE = 16 * 1024 * 1024
+
+# 他のプロセスが書き込み中のチャンクを消さないための猶予（秒）
+GC_GRACE_PERIOD = 3600
+
+MANIFEST_HEADER_LIMIT = 4096
+
+if np is not None:
+    _GEAR = np.random.RandomState(0x5B4A).randint(
+        0, 2 ** 63, size=256, dtype=np.int64
+    ).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+    _SHIFT = np.uint64(64 - AVG_CHUNK_BITS)
+
+
+def _candidate_cuts(data):
+    """ローリングハッシュが条件を満たす切れ目候補の位置（昇順）"""
+    if np is None:
+        return []
+    view = np.frombuffer(data, dtype=np.uint8)
+    cuts = []
+    # 中間配列をキャッシュに収めるため、窓幅ぶん重ねながら小さな単位で計算
+    for start in range(0, len(data) - WINDOW_SIZE, HASH_BLOCK_SIZE):
+        part = view[start:start + HASH_BLOCK_SIZE + WINDOW_SIZE]
+        with np.errstate(over='ignore'):
+            total = np.cumsum(_GEAR[part], dtype=np.uint64)
+            window = total[WINDOW_SIZE:] - total[:-WINDOW_SIZE]
+        hits = np.flatnonzero((window >> _SHIFT) == 0)
+        cuts.extend((hits + (start + WINDOW_SIZE + 1)).tolist())
+    return cuts
+
+
+def _split(data, final):
+    """data をチャンク境界で分割。final でなければ末尾の端数を返す"""
+    cuts = []
+    start = 0
+    if np is None:
+        # numpy が無い場合は固定長チャンク
+        step = 1 << AVG_CHUNK_BITS
+        while len(data) - start >= step:
+            start += step
+            cuts.append(start)
+    else:
+        for pos in _candidate_cuts(data):
+            if pos - start < MIN_CHUNK_SIZE:
+                continue
+            while pos - start > MAX_CHUNK_SIZE:
+                start += MAX_CHUNK_SIZE
+                cuts.append(start)
+            cuts.append(pos)
+            start = pos
+        while len(data) - start > MAX_CHUNK_SIZE:
+            start += MAX_CHUNK_SIZE
+            cuts.append(start)
+
+    chunks = []
+    prev = 0
+    for cut in cuts:
+        chunks.append(data[prev:cut])
+        prev = cut
+    rest = data[prev:]
+    if final and rest:
+        chunks.append(rest)
+        rest = b""
+    return chunks, rest
+
+
+def iter_chunks(f):
+    """ファイルオブジェクトを内容依存チャンクに分割して順に返す"""
+    pending = b""
+    while True:
+        block = f.read(READ_SIZE)
+        final = not block
+        chunks, pending = _split(pending + block, final)
+        yield from chunks
+        if final:
+            return
+
+
+def chunk_digest(data):
+    """チャンクの識別子（BLAKE2b 160bit）"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def read_manifest_header(path):
+    """マニフェストの1行目だけを読み、ヘッダー辞書を返す"""
+    with open(path, "rb") as f:
+        line = f.readline(MANIFEST_HEADER_LIMIT)
+    return json.loads(line)
+
+
+def _iter_manifest_chunks(path):
+    with open(path, "r", encoding="ascii") as f:
+        f.readline()
+        for line in f:
+            digest, length = line.split()
+            yield digest, int(length)
+
+
+class ChunkStore:
+    """backup フォルダごとのチャンクストア"""
+
+    def __init__(self, backup_dir):
+        self.backup_dir = backup_dir
+        self.chunks_dir = os.path.join(backup_dir, CHUNKS_FOLDER)
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def _put(self, digest, data):
+        path = self.chunk_path(digest)
+        try:
+            # 既存チャンクは再利用（GCの猶予判定用に更新日時だけ進める）
+            os.utime(path)
+            return False
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return True
+
+    def ingest(self, src, manifest_path):
+        """src をチャンク化して保存し、マニフェストを書き出して src を削除"""
+        stat = os.stat(src)
+        entries = []
+        with backup_index.directory_lock(self.backup_dir):
+            with open(src, "rb") as f:
+                for data in iter_chunks(f):
+                    digest = chunk_digest(data)
+                    self._put(digest, data)
+                    entries.append(f"{digest} {len(data)}\n")
+
+            temp_path = f"{manifest_path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(temp_path, "w", encoding="ascii") as f:
+                f.write(json.dumps({"version": 1, "size": stat.st_size}) + "\n")
+                f.writelines(entries)
+            # マニフェストの更新日時は元のバックアップに合わせる
+            os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(temp_path, manifest_path)
+        os.remove(src)
+
+    def restore(self, manifest_path, out_path):
+        """マニフェストから元のファイルを復元（メモリマップ出力へストリーム書き込み）"""
+        size = read_manifest_header(manifest_path)["size"]
+        temp_path = f"{out_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temp_path, "w+b") as out:
+                out.truncate(size)
+                if size:
+                    with mmap.mmap(out.fileno(), size) as mm:
+                        offset = 0
+                        for digest, length in _iter_manifest_chunks(manifest_path):
+                            with open(self.chunk_path(digest), "rb") as f:
+                                data = f.read()
+                            if len(data) != length or chunk_digest(data) != digest:
+                                raise IOError(f"Corrupted chunk: {digest}")
+                            mm[offset:offset + length] = data
+                            offset += length
+                        if offset != size:
+                            raise IOError(f"Incomplete manifest: {os.path.basename(manifest_path)}")
+                        mm.flush()
+            os.replace(temp_path, out_path)
+        except BaseException:
+            # 復元に失敗した一時ファイルを残さない
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def collect_garbage(self):
+        """どのマニフェストからも参照されていないチャンクを削除し、削除数を返す"""
+        with backup_index.directory_lock(self.backup_dir):
+            referenced = set()
+            with os.scandir(self.backup_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(MANIFEST_SUFFIX) and entry.is_file():
+                        referenced.update(d for d, _ in _iter_manifest_chunks(entry.path))
+
+            removed = 0
+            deadline = time.time() - GC_GRACE_PERIOD
+            try:
+                subdirs = [e.path for e in os.scandir(self.chunks_dir) if e.is_dir()]
+            except FileNotFoundError:
+                return 0
+            for subdir in subdirs:
+                with os.scandir(subdir) as it:
+                    for entry in it:
+                        if entry.name in referenced:
+                            continue
+                        try:
+                            # 書き込み途中の .tmp も、他のプロセスのものかもしれないので猶予を待つ
+                            if entry.stat().st_mtime > deadline:
+                                continue
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            pass
+            return removed
+
+    def stored_bytes(self):
+        """チャンクストアの実サイズ（バイト）"""
+        total = 0
+        try:
+            subdirs = [e.path for e in os.scandir(self.chunks_dir) if e.is_dir()]
+        except FileNotFoundError:
+            return 0
+        for subdir in subdirs:
+            with os.scandir(subdir) as it:
+                total += sum(e.stat().st_size for e in it if e.is_file())
+        return total
+
+
+class DedupStorage:
+    """重複排除ストアへ取り込むバックアップ保存方式"""
+    suffix = MANIFEST_SUFFIX
+    compressed = False
+
+    def store(self, src, dst):
+        staging = claim_file(src)
+        try:
+            ChunkStore(os.path.dirname(dst)).ingest(staging, dst)
+        except BaseException:
+            # 取り込みに失敗した場合は元の位置に戻す
+            if os.path.exists(staging):
+                os.replace(staging, src)
+            raise
+
+    def restore(self, path, out_path):
+        ChunkStore(os.path.dirname(path)).restore(path, out_path)
+
+    def read_size(self, path):
+        return read_manifest_header(path)["size"]
+
+    def after_remove(self, backup_dir):
+        ChunkStore(backup_dir).collect_garbage()
+
+
+DEDUP_STORAGE = DedupStorage()
@@ -0,0 +1,217 @@
+"""Subamo のコマンドライン版（GUI不要）
+
+ディレクトリツリーをスレッドプールで並列に走査し、見つかった backup フォルダ
+ごとにプロジェクト単位のバックアップ数・合計サイズ・最古/最新の更新日時を
+JSON Lines で1行ずつ出力する。保持ポリシーを指定すると、ツリー全体に対して
+ドライラン（既定）または --apply で実際に適用する。
+
+使い方:
+    python subamo/cli.py ROOT [--max-total-mb N] [--max-age-days N]
+                              [--keep-hourly N] [--keep-daily N] [--apply]
+    blender -b --factory-startup --python subamo/cli.py -- ROOT ...
+
+Python 単体でも動くよう、ここから import する backup_index・chunk_store・
+compression・relocation・retention は bpy を import しないこと。
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+if __name__ == "__main__" and not __package__:
+    # スクリプトとして実行された場合は、__init__.py（bpy を import する）を
+    # 実行せずにパッケージだけを登録してから相対 import する
+    import importlib.util
+
+    _package_dir = os.path.dirname(os.path.abspath(__file__))
+    _spec = importlib.util.spec_from_file_location(
+        "subamo", os.path.join(_package_dir, "__init__.py"),
+        submodule_search_locations=[_package_dir],
+    )
+    sys.modules.setdefault("subamo", importlib.util.module_from_spec(_spec))
+    __package__ = "subamo"
+
+from . import backup_index
+from .chunk_store import DEDUP_STORAGE
+from .compression import XZ_STORAGE, ZSTD_STORAGE
+from .retention import RetentionPolicy, apply_retention, disk_size
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def register_storages():
+    """圧縮・重複排除のバックアップも認識できるよう保存方式を登録"""
+    for storage in (DEDUP_STORAGE, ZSTD_STORAGE, XZ_STORAGE):
+        backup_index.register_storage(storage)
+
+
+def scan_directory(path, on_error=None):
+    """ディレクトリを os.scandir で1回だけ読み、(backup フォルダ, その他のサブディレクトリ) を返す
+
+    シンボリックリンクのディレクトリはたどらない。
+    """
+    found = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                if entry.name == backup_index.BACKUP_FOLDER:
+                    # backup フォルダの中（チャンクストアなど）には入らない
+                    found.append(entry.path)
+                else:
+                    subdirs.append(entry.path)
+    except OSError as e:
+        if on_error is not None:
+            on_error(path, e)
+    return found, subdirs
+
+
+def iter_backup_dirs(root, jobs=DEFAULT_JOBS, on_error=None):
+    """root 以下の backup フォルダをスレッドプールで並列に探して順次返す
+
+    読み終わったディレクトリから順にサブディレクトリを新しいタスクとして
+    投入する。ワーカーで起きた例外は future.result() でそのまま送出される。
+    """
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="subamo-scan") as executor:
+        pending = {executor.submit(scan_directory, root, on_error)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, subdirs = future.result()
+                yield from found
+                pending.update(executor.submit(scan_directory, subdir, on_error) for subdir in subdirs)
+
+
+def summarize(backup_dir, base_name, project_backups):
+    """プロジェクト1つ分の集計レコード"""
+    entries = project_backups.entries
+    mtimes = [e.mtime for e in entries]
+    return {
+        "type": "project",
+        "backup_dir": backup_dir,
+        "project": base_name,
+        "count": len(project_backups),
+        "bytes": project_backups.total_size,
+        "disk_bytes": sum(disk_size(e) for e in entries),
+        "oldest_mtime": min(mtimes) if mtimes else None,
+        "newest_mtime": max(mtimes) if mtimes else None,
+    }
+
+
+def audit_backup_dir(backup_dir, index, policy=None, dry_run=True):
+    """backup フォルダ1つを集計し、レコードのリストを返す"""
+    projects = index.projects(backup_dir)
+    if not projects:
+        return []
+    records = []
+    for base_name in sorted(projects):
+        record = summarize(backup_dir, base_name, projects[base_name])
+        if policy is not None:
+            result = apply_retention(backup_dir, base_name, policy, dry_run=dry_run, index=index)
+            record["retention"] = {
+                "mode": "dry-run" if dry_run else "apply",
+                "removed": [e.filename for e in result.removed],
+                "freed_bytes": result.freed_bytes,
+            }
+        records.append(record)
+    return records
+
+
+def run(root, policy=None, dry_run=True, jobs=DEFAULT_JOBS, out=sys.stdout, err=sys.stderr):
+    """root 以下を監査して JSON Lines を出力し、最後に合計を出力する"""
+    register_storages()
+    index = backup_index.BackupIndex()
+    write_lock = threading.Lock()
+    totals = {"type": "summary", "root": root, "backup_dirs": 0, "projects": 0,
+              "count": 0, "bytes": 0, "disk_bytes": 0, "freed_bytes": 0, "errors": 0}
+
+    def emit(stream, record):
+        with write_lock:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+
+    def on_error(path, error):
+        with write_lock:
+            totals["errors"] += 1
+        emit(err, {"type": "error", "path": path, "error": str(error)})
+
+    def process(backup_dir):
+        try:
+            records = audit_backup_dir(backup_dir, index, policy, dry_run)
+        except Exception as e:
+            # 壊れたサイドカーや保存方式の読み込みエラーも集計から落とさずに報告する
+            on_error(backup_dir, e)
+            return
+        with write_lock:
+            totals["backup_dirs"] += 1
+            for record in records:
+                totals["projects"] += 1
+                totals["count"] += record["count"]
+                totals["bytes"] += record["bytes"]
+                totals["disk_bytes"] += record["disk_bytes"]
+                if "retention" in record:
+                    totals["freed_bytes"] += record["retention"]["freed_bytes"]
+        for record in records:
+            emit(out, record)
+
+    # 探索と集計を別のプールで並行させ、見つかった順に出力する
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="subamo-audit") as executor:
+        futures = [executor.submit(process, backup_dir) for backup_dir in iter_backup_dirs(root, jobs, on_error)]
+    for future in futures:
+        future.result()
+
+    # ルート自体が backup フォルダの場合
+    if os.path.basename(os.path.normpath(root)) == backup_index.BACKUP_FOLDER:
+        process(root)
+
+    emit(out, totals)
+    return totals
+
+
+def build_policy(args):
+    """コマンドライン引数から RetentionPolicy を作成（指定が無ければ None）"""
+    policy = RetentionPolicy(
+        max_total_bytes=args.max_total_mb * 1024 * 1024,
+        max_age_days=args.max_age_days,
+        keep_hourly=args.keep_hourly,
+        keep_daily=args.keep_daily,
+    )
+    return policy if policy.is_active() else None
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="subamo",
+        description="Audit Subamo backup folders under a directory tree and optionally apply a retention policy.",
+    )
+    parser.add_argument("root", help="Directory tree to scan for backup folders")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Number of scanner threads")
+    parser.add_argument("--max-total-mb", type=int, default=0, help="Maximum disk space per project (0 = unlimited)")
+    parser.add_argument("--max-age-days", type=int, default=0, help="Remove backups older than this (0 = unlimited)")
+    parser.add_argument("--keep-hourly", type=int, default=0, help="Keep the newest backup for each of the last N hours")
+    parser.add_argument("--keep-daily", type=int, default=0, help="Keep the newest backup for each of the last N days")
+    parser.add_argument("--apply", action="store_true", help="Delete the selected backups (default is a dry run)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+        # blender -b --python cli.py -- ... の場合は "--" 以降だけを使う
+        if "--" in sys.argv:
+            argv = sys.argv[sys.argv.index("--") + 1:]
+    args = parse_args(argv)
+    totals = run(args.root, build_policy(args), dry_run=not args.apply, jobs=max(1, args.jobs))
+    return 1 if totals["errors"] else 0
+
+
+if __name__ == "__main__":
+    # blender -b --python でもスクリプトの後に終了するので、終了コードをそのまま返す
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""圧縮バックアップの保存方式
+
+バックアップを backup フォルダへ移す際に、ストリーミングで zstd 圧縮する
+（zstandard モジュールが無い環境では標準ライブラリの lzma を使う）。
+元のサイズはサイドカー（backup/.subamo_sizes.json）に記録し、
+パネルは圧縮ファイルを読み直さずに表示できる。
+"""
+import lzma
+import os
+import shutil
+import uuid
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from . import backup_index
+from .relocation import claim_file
+
+# ストリーム処理の読み書き単位
+STREAM_BLOCK_SIZE = 4 * 1024 * 1024
+
+ZSTD_LEVEL = 3
+XZ_PRESET = 1
+
+
+class CompressedStorage:
+    """圧縮保存方式
+
+    open_writer(f, size) と open_reader(f) は、開いたファイルを包む
+    圧縮・展開ストリームを返す関数。read_size(path) は圧縮ファイルから
+    元のサイズを読む関数（形式が対応していなければ None）。
+    """
+    compressed = True
+
+    def __init__(self, suffix, open_writer, open_reader, read_size=None):
+        self.suffix = suffix
+        self._open_writer = open_writer
+        self._open_reader = open_reader
+        self._read_size = read_size
+
+    def store(self, src, dst):
+        staging = claim_file(src)
+        try:
+            stat = os.stat(staging)
+            temp_path = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+            try:
+                with open(staging, "rb") as fin, open(temp_path, "wb") as fout:
+                    with self._open_writer(fout, stat.st_size) as writer:
+                        shutil.copyfileobj(fin, writer, STREAM_BLOCK_SIZE)
+                # 圧縮ファイルの更新日時は元のバックアップに合わせる
+                os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                backup_dir = os.path.dirname(dst)
+                with backup_index.directory_lock(backup_dir):
+                    os.replace(temp_path, dst)
+                    backup_index.record_sizes(backup_dir, {backup_index.size_key(os.stat(dst)): stat.st_size})
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        except BaseException:
+            # 保存に失敗した場合は元の位置に戻す
+            if os.path.exists(staging):
+                os.replace(staging, src)
+            raise
+        os.remove(staging)
+
+    def restore(self, path, out_path):
+        """圧縮バックアップをストリームで展開"""
+        temp_path = f"{out_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(path, "rb") as fin, open(temp_path, "wb") as fout:
+                with self._open_reader(fin) as reader:
+                    shutil.copyfileobj(reader, fout, STREAM_BLOCK_SIZE)
+            os.replace(temp_path, out_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def read_size(self, path):
+        if self._read_size is None:
+            raise ValueError("Original size is not stored in the file header")
+        return self._read_size(path)
+
+    def after_remove(self, backup_dir):
+        pass
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("zstandard module is not available")
+
+
+def _open_zstd_writer(f, size):
+    _require_zstandard()
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, write_content_size=True)
+    return compressor.stream_writer(f, size=size, closefd=False)
+
+
+def _open_zstd_reader(f):
+    _require_zstandard()
+    return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+
+
+def _read_zstd_size(path):
+    # フレームヘッダーに元のサイズが書かれている（サイドカーが無い場合の予備）
+    if zstandard is None:
+        raise ValueError("zstandard module is not available")
+    with open(path, "rb") as f:
+        try:
+            size = zstandard.frame_content_size(f.read(18))
+        except zstandard.ZstdError as e:
+            raise ValueError(str(e))
+    if size < 0:
+        raise ValueError("Content size is unknown")
+    return size
+
+
+def _open_xz_writer(f, size):
+    return lzma.LZMAFile(f, "wb", preset=XZ_PRESET)
+
+
+def _open_xz_reader(f):
+    return lzma.LZMAFile(f, "rb")
+
+
+# zstd 圧縮（zstandard モジュールが必要）
+ZSTD_STORAGE = CompressedStorage(".zst", _open_zstd_writer, _open_zstd_reader, _read_zstd_size)
+# xz 圧縮（標準ライブラリの lzma）
+XZ_STORAGE = CompressedStorage(".xz", _open_xz_writer, _open_xz_reader)
+
+
+def get_compressed_storage():
+    """この環境で使える圧縮保存方式（zstd 優先）"""
+    return ZSTD_STORAGE if zstandard is not None else XZ_STORAGE
@@ -0,0 +1,264 @@
+"""バックアップファイルの移動処理とバックグラウンドワーカー
+
+save_post ハンドラーからは RelocationWorker にジョブを投入するだけにし、
+実際のファイル移動はスレッドプール上で行う。
+"""
+import errno
+import os
+import queue
+import shutil
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from . import backup_index
+from .retention import apply_retention
+
+RelocationResult = namedtuple("RelocationResult", ["filepath", "moved_count", "pruned_count", "error"])
+
+
+def claim_file(src):
+    """src を同じディレクトリ内の作業用の名前へ原子的に退避し、そのパスを返す
+
+    次の保存でBlenderが同名のバックアップを作り直しても、
+    処理中のファイルを巻き込まないようにするため。
+    """
+    staging = os.path.join(os.path.dirname(src), f".{os.path.basename(src)}.subamo-{uuid.uuid4().hex[:8]}")
+    os.replace(src, staging)
+    return staging
+
+
+def move_file(src, dst):
+    """src を dst へ移動（同一デバイスなら os.replace で原子的に置き換え）"""
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # 別ボリュームへの移動：退避してからコピーする
+    staging = claim_file(src)
+    temp_dst = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.subamo-{uuid.uuid4().hex[:8]}")
+    try:
+        shutil.copy2(staging, temp_dst)
+        os.replace(temp_dst, dst)
+    except BaseException:
+        # コピーに失敗した場合は元の位置に戻す
+        if os.path.exists(temp_dst):
+            os.remove(temp_dst)
+        os.replace(staging, src)
+        raise
+    os.remove(staging)
+
+
+class RawStorage:
+    """バックアップをそのまま移動する保存方式"""
+    suffix = ""
+
+    def store(self, src, dst):
+        move_file(src, dst)
+
+
+RAW_STORAGE = RawStorage()
+
+RotationPlan = namedtuple("RotationPlan", ["backup_dir", "create_dir", "removals", "moves", "imports"])
+
+
+def list_backup_numbers(directory, base_name):
+    """ディレクトリを1回の os.scandir で走査し、{番号: (パス, 接尾辞)} を返す（stat は行わない）"""
+    numbers = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            parsed = backup_index.parse_backup_name(entry.name)
+            if parsed is None or parsed[0] != base_name:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            numbers[parsed[1]] = (entry.path, parsed[2])
+    return numbers
+
+
+def plan_rotation(current_filepath, max_versions=None, storage=RAW_STORAGE):
+    """バックアップのローテーションをメモリ上で計画
+
+    作業フォルダの新しいバックアップ（.blend1 が最新）を backup フォルダの
+    先頭に入れ、既存のバックアップを後ろへずらす。番号の欠けは詰める。
+    既存のバックアップは保存方式（接尾辞）を保ったまま移動する。
+
+    max_versions を指定した場合は、それを超えた古いものを削除対象とする
+    （Blenderの Save Versions と同じ挙動）。None の場合は番号の上限（32）に
+    達したときだけ、最も古いものから押し出す。
+    """
+    current_dir = os.path.dirname(current_filepath)
+    base_name = os.path.splitext(os.path.basename(current_filepath))[0]
+    backup_dir = os.path.join(current_dir, backup_index.BACKUP_FOLDER)
+
+    # 作業フォルダには通常のファイルしか置かれない
+    incoming = {n: path for n, (path, suffix) in list_backup_numbers(current_dir, base_name).items() if not suffix}
+    if not incoming:
+        return RotationPlan(backup_dir, False, [], [], [])
+
+    # backupフォルダの走査結果で存在確認も兼ねる（makedirs を省略するため）
+    try:
+        existing = list_backup_numbers(backup_dir, base_name)
+        create_dir = False
+    except FileNotFoundError:
+        existing = {}
+        create_dir = True
+
+    def target(number, suffix):
+        return os.path.join(backup_dir, f"{base_name}.blend{number}{suffix}")
+
+    sources = [incoming[n] for n in sorted(incoming)]
+    old_numbers = sorted(existing)
+    limit = backup_index.MAX_BACKUP_NUMBER if max_versions is None else max_versions
+    keep_existing = max(0, limit - len(sources))
+    removals = [(path, "") for path in sources[limit:]]
+    removals += [existing[n] for n in old_numbers[keep_existing:]]
+    sources = sources[:limit]
+    old_numbers = old_numbers[:keep_existing]
+
+    # 既存バックアップの番号変更は順序を保つ写像なので、
+    # 番号が増えるものは大きい順、減るものは小さい順に処理すれば上書きは起きない
+    shifts = [(old, len(sources) + i + 1) for i, old in enumerate(old_numbers)]
+    moves = [(existing[old][0], target(new, existing[old][1])) for old, new in reversed(shifts) if new > old]
+    moves += [(existing[old][0], target(new, existing[old][1])) for old, new in shifts if new < old]
+
+    # 新しいバックアップは空いた先頭の番号へ保存
+    imports = [(src, target(i + 1, storage.suffix)) for i, src in enumerate(sources)]
+
+    return RotationPlan(backup_dir, create_dir, removals, moves, imports)
+
+
+def apply_rotation(plan, storage=RAW_STORAGE):
+    """計画したローテーションを適用し、保存した新規バックアップ数を返す"""
+    if not plan.moves and not plan.removals and not plan.imports:
+        return 0
+
+    if plan.create_dir:
+        os.makedirs(plan.backup_dir, exist_ok=True)
+
+    with backup_index.directory_lock(plan.backup_dir):
+        for path, _suffix in plan.removals:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        for src, dst in plan.moves:
+            os.replace(src, dst)
+
+        for src, dst in plan.imports:
+            storage.store(src, dst)
+
+        # 削除したバックアップが参照していたデータを後始末
+        for suffix in {suffix for _path, suffix in plan.removals if suffix}:
+            backup_index.get_storage(suffix).after_remove(plan.backup_dir)
+
+    return len(plan.imports)
+
+
+def organize_backup_files(current_filepath, max_versions=None, storage=RAW_STORAGE):
+    """現在のファイルパスに基づいてバックアップファイルを整理"""
+    if not current_filepath:
+        return 0
+    return apply_rotation(plan_rotation(current_filepath, max_versions, storage), storage)
+
+
+def relocate_and_prune(filepath, max_versions=None, storage=RAW_STORAGE, policy=None):
+    """バックアップを整理し、保持ポリシーがあれば続けて適用"""
+    moved_count = organize_backup_files(filepath, max_versions, storage)
+    backup_dir = backup_index.get_backup_dir(filepath)
+    backup_index.invalidate(backup_dir)
+
+    pruned_count = 0
+    if policy is not None and policy.is_active():
+        base_name = os.path.splitext(os.path.basename(filepath))[0]
+        pruned_count = len(apply_retention(backup_dir, base_name, policy).removed)
+    return RelocationResult(filepath, moved_count, pruned_count, None)
+
+
+class RelocationWorker:
+    """バックアップ移動ジョブをスレッドプールで実行するワーカー
+
+    同じファイルに対するジョブは1つにまとめる。実行待ちのジョブがあれば
+    新しい保存は無視し、実行中であれば完了後にもう一度だけ実行する。
+    完了結果は poll_results() でメインスレッドから取り出す。
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="subamo")
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._running = set()
+        self._rerun = set()
+        self._options = {}
+        self._results = queue.Queue()
+
+    def submit(self, filepath, max_versions=None, storage=RAW_STORAGE, policy=None):
+        """移動ジョブを投入。既存ジョブにまとめられた場合は False
+
+        max_versions を指定すると、それを超えた古いバックアップを削除する。
+        policy（RetentionPolicy）を指定すると移動後に保持ポリシーも適用する。
+        """
+        with self._lock:
+            self._options[filepath] = (max_versions, storage, policy)
+            if filepath in self._queued:
+                return False
+            if filepath in self._running:
+                self._rerun.add(filepath)
+                return False
+            self._queued.add(filepath)
+        self._executor.submit(self._run, filepath)
+        return True
+
+    def is_busy(self):
+        """実行待ち・実行中のジョブ、または未取得の結果があるか"""
+        with self._lock:
+            if self._queued or self._running:
+                return True
+        return not self._results.empty()
+
+    def poll_results(self):
+        """完了したジョブの結果をすべて取り出す"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def shutdown(self, wait=True):
+        """ワーカーを停止（wait=True なら投入済みのジョブの完了を待つ）"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, filepath):
+        with self._lock:
+            self._queued.discard(filepath)
+            self._running.add(filepath)
+            max_versions, storage, policy = self._options[filepath]
+
+        try:
+            result = relocate_and_prune(filepath, max_versions, storage, policy)
+        except Exception as e:
+            result = RelocationResult(filepath, 0, 0, e)
+
+        self._results.put(result)
+
+        with self._lock:
+            self._running.discard(filepath)
+            if filepath not in self._rerun:
+                return
+            self._rerun.discard(filepath)
+            self._queued.add(filepath)
+        try:
+            self._executor.submit(self._run, filepath)
+        except RuntimeError:
+            # シャットダウン済みの場合は再実行しない
+            with self._lock:
+                self._queued.discard(filepath)
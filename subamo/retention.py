@@ -0,0 +1,115 @@
+"""バックアップの保持ポリシー
+
+合計サイズ・経過日数の上限と「直近 N 時間・M 日は1時間/1日ごとに1つ残す」
+間引きを組み合わせて、削除するバックアップを決める。判定はバックアップ
+インデックスのキャッシュ済みエントリ（番号・サイズ・更新日時）だけで行い、
+フォルダを再度 stat し直すことはない。
+"""
+import os
+import time
+from collections import namedtuple
+
+from . import backup_index
+
+RetentionResult = namedtuple("RetentionResult", ["removed", "freed_bytes"])
+
+
+class RetentionPolicy:
+    """保持ポリシー（0 の項目は無制限・無効）"""
+    __slots__ = ("max_total_bytes", "max_age_days", "keep_hourly", "keep_daily")
+
+    def __init__(self, max_total_bytes=0, max_age_days=0, keep_hourly=0, keep_daily=0):
+        self.max_total_bytes = max_total_bytes
+        self.max_age_days = max_age_days
+        self.keep_hourly = keep_hourly
+        self.keep_daily = keep_daily
+
+    def is_active(self):
+        return bool(self.max_total_bytes or self.max_age_days or self.keep_hourly or self.keep_daily)
+
+
+def disk_size(entry):
+    """ディスク上のサイズ（比較できない保存方式では元のサイズ）"""
+    return entry.stored_size if entry.stored_size is not None else entry.size
+
+
+def _thinned_keep_set(entries, keep_hourly, keep_daily):
+    """時間・日ごとに最新の1つを残す間引きで、残すエントリの集合"""
+    keep = set()
+    for limit, bucket in ((keep_hourly, 3600), (keep_daily, 86400)):
+        if not limit:
+            continue
+        seen = set()
+        for entry in entries:
+            # ローカル時刻で区切る（日の区切りを作業者の感覚に合わせる）
+            key = int((entry.mtime + time.localtime(entry.mtime).tm_gmtoff) // bucket)
+            if key in seen:
+                continue
+            seen.add(key)
+            keep.add(entry.path)
+            if len(seen) >= limit:
+                break
+    return keep
+
+
+def select_for_removal(entries, policy, now=None):
+    """ポリシーに従って削除するエントリを返す（entries は新しい順）
+
+    最新のバックアップは常に残す。
+    """
+    if not entries or not policy.is_active():
+        return []
+    now = time.time() if now is None else now
+
+    newest, older = entries[0], list(entries[1:])
+    removed = []
+
+    if policy.keep_hourly or policy.keep_daily:
+        keep = _thinned_keep_set(entries, policy.keep_hourly, policy.keep_daily)
+        removed += [e for e in older if e.path not in keep]
+        older = [e for e in older if e.path in keep]
+
+    if policy.max_age_days:
+        deadline = now - policy.max_age_days * 86400
+        removed += [e for e in older if e.mtime < deadline]
+        older = [e for e in older if e.mtime >= deadline]
+
+    if policy.max_total_bytes:
+        total = disk_size(newest) + sum(disk_size(e) for e in older)
+        while older and total > policy.max_total_bytes:
+            entry = older.pop()
+            removed.append(entry)
+            total -= disk_size(entry)
+
+    return removed
+
+
+def apply_retention(backup_dir, base_name, policy, dry_run=False, now=None, index=None):
+    """backup フォルダ内の base_name のバックアップにポリシーを適用"""
+    index = index or backup_index.shared_index()
+    project_backups = index.lookup(backup_dir, base_name)
+    if not project_backups:
+        return RetentionResult([], 0)
+
+    candidates = select_for_removal(project_backups.entries, policy, now)
+    if dry_run or not candidates:
+        return RetentionResult(candidates, sum(disk_size(e) for e in candidates))
+
+    removed = []
+    with backup_index.directory_lock(backup_dir):
+        for entry in candidates:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            removed.append(entry)
+
+        # 削除したバックアップが参照していたデータを後始末
+        for suffix in {e.suffix for e in removed if e.suffix}:
+            backup_index.get_storage(suffix).after_remove(backup_dir)
+
+    # キャッシュから取り除くだけにして、フォルダの再走査を避ける
+    index.forget(backup_dir, [e.path for e in removed])
+    return RetentionResult(removed, sum(disk_size(e) for e in removed))
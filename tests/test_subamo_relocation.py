@@ -0,0 +1,68 @@
+"""Tests for subamo.relocation (runs without Blender)."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from _bootstrap import load_addon_module  # noqa: E402
+
+backup_index = load_addon_module("subamo", "backup_index")
+relocation = load_addon_module("subamo", "relocation")
+
+
+class RotationTest(unittest.TestCase):
+    """Rotation only deletes backups when max_versions is given."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="subamo-test-")
+        self.filepath = os.path.join(self.root, "a.blend")
+        self.backup_dir = os.path.join(self.root, "backup")
+        os.makedirs(self.backup_dir)
+        open(self.filepath, "wb").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        backup_index.invalidate()
+
+    def write(self, path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def backups(self):
+        result = {}
+        for name in os.listdir(self.backup_dir):
+            with open(os.path.join(self.backup_dir, name)) as f:
+                result[name] = f.read()
+        return result
+
+    def test_rotation_keeps_backups_beyond_save_versions(self):
+        for i in range(1, 4):
+            self.write(os.path.join(self.backup_dir, f"a.blend{i}"), f"old{i}")
+        self.write(self.filepath + "1", "new")
+        relocation.organize_backup_files(self.filepath)
+        self.assertEqual(self.backups(), {"a.blend1": "new", "a.blend2": "old1", "a.blend3": "old2", "a.blend4": "old3"})
+
+    def test_full_backup_folder_rotates_oldest_out(self):
+        last = backup_index.MAX_BACKUP_NUMBER
+        for i in range(1, last + 1):
+            self.write(os.path.join(self.backup_dir, f"a.blend{i}"), f"old{i}")
+        self.write(self.filepath + "1", "new")
+        relocation.organize_backup_files(self.filepath)
+        backups = self.backups()
+        self.assertFalse(os.path.exists(self.filepath + "1"))
+        self.assertEqual(len(backups), last)
+        self.assertEqual(backups["a.blend1"], "new")
+        self.assertEqual(backups[f"a.blend{last}"], f"old{last - 1}")
+
+    def test_max_versions_removes_oldest(self):
+        for i in range(1, 4):
+            self.write(os.path.join(self.backup_dir, f"a.blend{i}"), f"old{i}")
+        self.write(self.filepath + "1", "new")
+        relocation.organize_backup_files(self.filepath, max_versions=2)
+        self.assertEqual(self.backups(), {"a.blend1": "new", "a.blend2": "old1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
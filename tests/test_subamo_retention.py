@@ -0,0 +1,60 @@
+"""Tests for subamo.retention (runs without Blender)."""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from _bootstrap import load_addon_module  # noqa: E402
+
+backup_index = load_addon_module("subamo", "backup_index")
+retention = load_addon_module("subamo", "retention")
+
+
+def local_time(year, month, day, hour):
+    return time.mktime((year, month, day, hour, 0, 0, 0, 0, -1))
+
+
+def entry(number, mtime):
+    return backup_index.BackupEntry(number, f"a.blend{number}", f"/backup/a.blend{number}", 100, mtime, "", None)
+
+
+class SelectForRemovalTimezoneTest(unittest.TestCase):
+    """Daily buckets must break at local midnight, not at UTC midnight."""
+
+    def setUp(self):
+        self.saved_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Asia/Tokyo"
+        time.tzset()
+
+    def tearDown(self):
+        if self.saved_tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = self.saved_tz
+        time.tzset()
+
+    def test_keep_daily_splits_at_local_midnight(self):
+        # Newest first: 01:00 on the 18th and 23:00 on the 17th are different local days
+        entries = [
+            entry(1, local_time(2024, 5, 18, 1)),
+            entry(2, local_time(2024, 5, 17, 23)),
+            entry(3, local_time(2024, 5, 17, 20)),
+        ]
+        policy = retention.RetentionPolicy(keep_daily=2)
+        removed = retention.select_for_removal(entries, policy, now=local_time(2024, 5, 18, 2))
+        self.assertEqual([e.filename for e in removed], ["a.blend3"])
+
+    def test_keep_hourly_uses_local_hours(self):
+        entries = [
+            entry(1, local_time(2024, 5, 18, 1) + 1800),
+            entry(2, local_time(2024, 5, 18, 1) + 600),
+            entry(3, local_time(2024, 5, 18, 0) + 1800),
+        ]
+        policy = retention.RetentionPolicy(keep_hourly=2)
+        removed = retention.select_for_removal(entries, policy, now=local_time(2024, 5, 18, 2))
+        self.assertEqual([e.filename for e in removed], ["a.blend2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,74 +1,79 @@
 import bpy
+import bpy.utils.previews
+from bpy.app.handlers import persistent
 from bpy_extras.io_utils import ExportHelper
+import array
+import json
 import os
 import re
+import time
+
+from . import version_index
+from .metadata import CACHE_SIZE, MetadataPrefetcher
+from .snapshot import SnapshotWorker
+from . import delta_store
+
+# 翻訳は locale/<言語>.json に置き、最初に使う時に読み込む
+LOCALE_DIR = os.path.join(os.path.dirname(__file__), "locale")
+
+# 言語ごとに読み込んだ表（英語を下敷きにして未翻訳のキーを埋めたもの）
+_text_tables = {}
+# 現在の言語の表（言語が変わると None に戻す）
+_active_texts = None
+
+
+def load_texts(lang):
+    """言語の表を読み込む（2回目以降はキャッシュを返す）"""
+    texts = _text_tables.get(lang)
+    if texts is None:
+        texts = {}
+        for code in dict.fromkeys(("en_US", lang)):
+            try:
+                with open(os.path.join(LOCALE_DIR, f"{code}.json"), encoding="utf-8") as f:
+                    texts.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        _text_tables[lang] = texts
+    return texts
+
+
+def invalidate_texts(*_args):
+    """言語設定が変わった時に呼ぶ（次の get_text で表を選び直す）"""
+    global _active_texts
+    _active_texts = None
+
+
+# 言語設定の変更通知（msgbus）の購読者
+_language_owner = object()
+
+
+def subscribe_language_changes():
+    """言語設定（言語・インターフェイスの翻訳）が変わったら表を選び直す"""
+    for prop in ("language", "use_translate_interface"):
+        bpy.msgbus.subscribe_rna(
+            key=(bpy.types.PreferencesView, prop),
+            owner=_language_owner,
+            args=(),
+            notify=invalidate_texts,
+        )
+
+
+@persistent
+def resubscribe_language_changes(*_args):
+    """load_post ハンドラー（ファイルを開くと msgbus の購読はすべて解除される）"""
+    invalidate_texts()
+    subscribe_language_changes()
+
 
 def get_text(key):
     """Get localized text based on Blender's language setting"""
-    texts = {
-        "en_US": {
-            "no_file_open": "No file currently open",
-            "no_versions_found": "No version files found",
-            "project": "Project",
-            "available_versions": "Available Versions:",
-            "opened": "Opened",
-            "failed_to_open": "Failed to open file",
-            "saved_as": "Saved as",
-            "failed_to_save": "Failed to save file",
-            "created_project": "Created project",
-            "failed_to_create": "Failed to create project",
-            "unsaved_changes": "Unsaved Changes",
-            "save_before_open": "Do you want to save the current file before opening another version?",
-            "save": "Save",
-            "dont_save": "Don't Save",
-            "cancel": "Cancel",
-            "version": "Version",
-            "filename": "Filename",
-            "status": "Status",
-            "current": "Current",
-            "file_size": "Size",
-            "modified": "Modified",
-            "version_manager": "Version Manager",
-            "open_version": "Open Version",
-            "please_save_project": "Please save the project first"
-        },
-        "ja_JP": {
-            "no_file_open": "現在開いているファイルがありません",
-            "no_versions_found": "バージョンファイルが見つかりません",
-            "project": "プロジェクト",
-            "available_versions": "利用可能なバージョン:",
-            "opened": "開きました",
-            "failed_to_open": "ファイルを開けませんでした",
-            "saved_as": "保存しました",
-            "failed_to_save": "ファイルを保存できませんでした",
-            "created_project": "プロジェクトを作成しました",
-            "failed_to_create": "プロジェクトを作成できませんでした",
-            "unsaved_changes": "未保存の変更",
-            "save_before_open": "別のバージョンを開く前に現在のファイルを保存しますか？",
-            "save": "保存",
-            "dont_save": "保存しない",
-            "cancel": "キャンセル",
-            "version": "バージョン",
-            "filename": "ファイル名",
-            "status": "状態",
-            "current": "現在",
-            "file_size": "サイズ",
-            "modified": "更新日時",
-            "version_manager": "バージョン管理",
-            "open_version": "バージョンを開く",
-            "please_save_project": "プロジェクトを保存してください"
-        }
-    }
-    
-    # Get Blender's language preference
-    prefs = bpy.context.preferences
-    lang = prefs.view.language
-    
-    # Default to English if language not supported
-    if lang not in texts:
-        lang = "en_US"
-    
-    return texts[lang].get(key, key)
+    global _active_texts
+    texts = _active_texts
+    if texts is None:
+        view = bpy.context.preferences.view
+        # インターフェイスの翻訳が無効なら英語
+        texts = _active_texts = load_texts(view.language if view.use_translate_interface else "en_US")
+    return texts.get(key, key)
 
 bl_info = {
     "name": "Versave",
@@ -80,6 +85,127 @@ bl_info = {
     "category": "System"
 }
 
+# アドオンPreferences設定クラス
+class VERSAVE_AddonPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+    
+    # インクリメンタル保存の方式
+    incremental_mode: bpy.props.EnumProperty(
+        name="Incremental Save",
+        description="How Save Incremental creates the next version",
+        items=[
+            ('SAVE_AS', "Save As New Version", "Write the next version and continue working in it (Default)"),
+            ('SNAPSHOT', "Save and Snapshot", "Save the current file, then copy it to the next version in the background using fast file cloning where available"),
+        ],
+        default='SAVE_AS'
+    )
+    
+    # 古いバージョンを差分形式で保存するか
+    use_delta_storage: bpy.props.BoolProperty(
+        name="Delta Storage",
+        description="Keep the newest version as a full file and store older versions as binary deltas against the next version",
+        default=False
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "incremental_mode")
+        layout.prop(self, "use_delta_storage")
+
+
+def get_preferences():
+    """アドオンPreferencesを取得"""
+    addon = bpy.context.preferences.addons.get(__name__)
+    return addon.preferences if addon else None
+
+
+# スナップショット作成用ワーカー（最初の使用時に作成）
+_snapshot_worker = None
+
+
+def poll_snapshot_results():
+    """スナップショットの完了結果をメインスレッドで処理（タイマー）"""
+    worker = _snapshot_worker
+    if worker is None:
+        return None
+    
+    for result in worker.poll_results():
+        directory = os.path.dirname(result.target)
+        version_index.release_version(result.target)
+        version_index.invalidate(directory)
+        if result.error is not None:
+            print(f"Versave: {get_text('snapshot_failed')}: {os.path.basename(result.target)}: {str(result.error)}")
+        else:
+            # 複製前に先読みしたメタデータが残っていれば読み直す
+            if _prefetcher is not None:
+                _prefetcher.forget(result.target)
+            compact_if_enabled(directory, version_index.project_name_from_path(result.target))
+    
+    # ジョブが残っていれば監視を続ける
+    return 0.2 if worker.is_busy() else None
+
+
+# 差分形式への変換用ワーカー（最初の使用時に作成）
+_compaction_worker = None
+
+
+def poll_compaction_results():
+    """差分形式への変換結果をメインスレッドで処理（タイマー）"""
+    worker = _compaction_worker
+    if worker is None:
+        return None
+    
+    for result in worker.poll_results():
+        version_index.invalidate(result.directory)
+        if result.error is not None:
+            print(f"Versave: {get_text('delta_failed')}: {result.project_name}: {str(result.error)}")
+    
+    # ジョブが残っていれば監視を続ける
+    return 0.2 if worker.is_busy() else None
+
+
+def compact_if_enabled(directory, project_name):
+    """差分形式が有効なら、古いバージョンの変換をバックグラウンドで開始"""
+    global _compaction_worker
+    preferences = get_preferences()
+    if not (preferences and preferences.use_delta_storage):
+        return
+    if _compaction_worker is None:
+        _compaction_worker = delta_store.CompactionWorker()
+    # 開いているファイルは変換対象にも参照先にもしない
+    _compaction_worker.submit(directory, project_name, exclude=(bpy.data.filepath,))
+    
+    if not bpy.app.timers.is_registered(poll_compaction_results):
+        bpy.app.timers.register(poll_compaction_results, first_interval=0.2)
+
+
+def materialize_version(filepath):
+    """差分形式のバージョンを通常の .blend に復元し、開けるパスを返す
+
+    元の位置に復元するので、テクスチャなどの相対パスはそのまま使える。
+    """
+    if not filepath.endswith(delta_store.DELTA_SUFFIX):
+        return filepath
+    full_path = filepath[:-len(delta_store.DELTA_SUFFIX)]
+    delta_store.restore(filepath, full_path)
+    # 復元したファイルが上書き保存されても、古い差分の参照先が失われないようにする
+    delta_store.pin_file(full_path)
+    os.remove(filepath)
+    version_index.invalidate(os.path.dirname(full_path))
+    return full_path
+
+
+def snapshot_in_background(src_path, dst):
+    """スナップショットジョブをワーカーに投入し、完了監視タイマーを開始"""
+    global _snapshot_worker
+    if _snapshot_worker is None:
+        _snapshot_worker = SnapshotWorker()
+    _snapshot_worker.submit(src_path, dst)
+    
+    if not bpy.app.timers.is_registered(poll_snapshot_results):
+        bpy.app.timers.register(poll_snapshot_results, first_interval=0.2)
+
+
 class VERSAVE_OT_save_initial(bpy.types.Operator, ExportHelper):
     """Enhanced initial save with _v1 versioning format"""
     bl_idname = "versave.save_initial"
@@ -133,6 +259,7 @@ class VERSAVE_OT_save_initial(bpy.types.Operator, ExportHelper):
             final_filepath = os.path.join(project_dir, name + ext)
             
             bpy.ops.wm.save_as_mainfile(filepath=final_filepath)
+            version_index.invalidate(project_dir)
             self.report({'INFO'}, f"{get_text('created_project')}: {project_name}/ with {os.path.basename(final_filepath)}")
         except Exception as e:
             self.report({'ERROR'}, f"{get_text('failed_to_create')}: {str(e)}")
@@ -173,16 +300,211 @@ class VERSAVE_OT_open_version(bpy.types.Operator):
     
     def execute(self, context):
         try:
+            filepath = materialize_version(self.filepath)
             # This is the simplest approach - Blender will handle save confirmation automatically
             # when opening a file if there are unsaved changes
-            bpy.ops.wm.open_mainfile(filepath=self.filepath)
-            self.report({'INFO'}, f"{get_text('opened')}: {os.path.basename(self.filepath)}")
+            bpy.ops.wm.open_mainfile(filepath=filepath)
+            self.report({'INFO'}, f"{get_text('opened')}: {os.path.basename(filepath)}")
             return {'FINISHED'}
         except Exception as e:
             self.report({'ERROR'}, f"{get_text('failed_to_open')}: {str(e)}")
             return {'CANCELLED'}
 
 
+# バージョンマネージャーに表示する行数（件数に関係なく描画はこの行数分だけ）
+VISIBLE_ROWS = 10
+
+
+def format_size(file_size):
+    """ファイルサイズを表示用の文字列に変換"""
+    if file_size > 1024*1024:
+        return f"{file_size/(1024*1024):.1f}MB"
+    elif file_size > 1024:
+        return f"{file_size/1024:.1f}KB"
+    return f"{file_size}B"
+
+
+def get_current_versions():
+    """現在のファイルが属するプロジェクトのバージョン一覧（キャッシュ済み）"""
+    current_filepath = bpy.data.filepath
+    if not current_filepath:
+        return version_index.EMPTY_VERSIONS
+    directory = os.path.dirname(current_filepath)
+    return version_index.lookup(directory, version_index.project_name_from_path(current_filepath))
+
+
+# メタデータ（サイズ・更新日時・サムネイル）の先読みとサムネイル用プレビュー
+_prefetcher = None
+_thumbnail_previews = None
+
+
+def get_prefetcher():
+    """メタデータ先読みサービス（最初の使用時に作成）"""
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = MetadataPrefetcher()
+    return _prefetcher
+
+
+def get_thumbnail_icon(filepath, metadata):
+    """サムネイルのアイコンID（無ければ 0）。表示中の行に対してだけ作成する"""
+    global _thumbnail_previews
+    if metadata is None or metadata.thumbnail is None:
+        return 0
+    if _thumbnail_previews is None:
+        _thumbnail_previews = bpy.utils.previews.new()
+    
+    # 上書き保存された場合に備えて更新日時もキーに含める
+    key = f"{filepath}:{metadata.mtime}"
+    preview = _thumbnail_previews.get(key)
+    if preview is None:
+        if len(_thumbnail_previews) >= CACHE_SIZE:
+            _thumbnail_previews.clear()
+        thumbnail = metadata.thumbnail
+        preview = _thumbnail_previews.new(key)
+        preview.icon_size = (thumbnail.width, thumbnail.height)
+        # RGBA の各バイトをそのまま1ピクセル1整数として渡す
+        pixels = array.array('i')
+        pixels.frombytes(thumbnail.pixels)
+        preview.icon_pixels = pixels
+    return preview.icon_id
+
+
+def poll_metadata():
+    """先読み結果が届いたら画面を再描画するタイマー"""
+    prefetcher = get_prefetcher()
+    if prefetcher.has_updates():
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+    if prefetcher.is_busy():
+        return 0.1
+    return None
+
+
+# UIList 用のバージョン項目（ファイル名は name に入れて標準の名前フィルターを使う）
+class VERSAVE_VersionItem(bpy.types.PropertyGroup):
+    filepath: bpy.props.StringProperty()
+    number: bpy.props.IntProperty()
+
+
+class VERSAVE_UL_versions(bpy.types.UIList):
+    """Version list that only lays out the visible rows"""
+    
+    # バージョン範囲フィルター（0 は無制限）
+    filter_min_version: bpy.props.IntProperty(name="Min Version", default=0, min=0)
+    filter_max_version: bpy.props.IntProperty(name="Max Version", default=0, min=0)
+    
+    # 更新日時フィルター
+    filter_modified: bpy.props.EnumProperty(
+        name="Modified",
+        items=[
+            ('ALL', "Any Time", "Show all versions"),
+            ('DAY', "Last 24 Hours", "Show versions modified in the last 24 hours"),
+            ('WEEK', "Last 7 Days", "Show versions modified in the last 7 days"),
+            ('MONTH', "Last 30 Days", "Show versions modified in the last 30 days"),
+        ],
+        default='ALL'
+    )
+    
+    MODIFIED_DAYS = {'DAY': 1, 'WEEK': 7, 'MONTH': 30}
+    
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        version_file = item.filepath
+        is_current = version_file == bpy.data.filepath
+        
+        # 先読み済みのメタデータだけを使う（未取得なら "..." を表示）
+        metadata = get_prefetcher().get(version_file)
+        if metadata is not None:
+            size_text = format_size(metadata.size)
+            modified_text = time.strftime("%m/%d %H:%M", time.localtime(metadata.mtime))
+        else:
+            size_text = modified_text = "..."
+        
+        row = layout.row(align=True)
+        
+        # Current file indicator / status icon placeholder
+        row.label(text="", icon='RADIOBUT_ON' if is_current else 'RADIOBUT_OFF')
+        
+        # Thumbnail
+        icon_id = get_thumbnail_icon(version_file, metadata)
+        if icon_id:
+            row.label(text="", icon_value=icon_id)
+        elif version_file.endswith(delta_store.DELTA_SUFFIX):
+            # 差分形式（開くと復元される）
+            row.label(text="", icon='FILE_ARCHIVE')
+        else:
+            row.label(text="", icon='FILE_BLEND')
+        
+        # Version number with fixed width
+        version_col = row.column()
+        version_col.ui_units_x = 2.5
+        version_col.label(text=f"v{item.number}")
+        
+        # Modified time with fixed width
+        modified_col = row.column()
+        modified_col.ui_units_x = 4.5
+        modified_col.label(text=modified_text)
+        
+        # File size with fixed width
+        size_col = row.column()
+        size_col.ui_units_x = 3.5
+        size_col.alignment = 'RIGHT'
+        size_col.label(text=size_text)
+        
+        # Small spacer
+        row.separator()
+        
+        # Open button (disabled for current file)
+        op = row.operator("versave.open_version", text="", icon='FILE_BLEND')
+        op.filepath = version_file
+        if is_current:
+            row.enabled = False
+    
+    def draw_filter(self, context, layout):
+        col = layout.column(align=True)
+        col.prop(self, "filter_name", text="", icon='VIEWZOOM')
+        
+        row = col.row(align=True)
+        row.label(text=get_text("version_range"))
+        row.prop(self, "filter_min_version", text=get_text("from"))
+        row.prop(self, "filter_max_version", text=get_text("to"))
+        
+        row = col.row(align=True)
+        row.label(text=get_text("modified"))
+        row.prop(self, "filter_modified", text="")
+    
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        
+        # 名前フィルター
+        if self.filter_name:
+            flags = bpy.types.UI_UL_list.filter_items_by_name(
+                self.filter_name, self.bitflag_filter_item, items, "name")
+        else:
+            flags = [self.bitflag_filter_item] * len(items)
+        
+        min_version = self.filter_min_version
+        max_version = self.filter_max_version
+        days = self.MODIFIED_DAYS.get(self.filter_modified)
+        if not (min_version or max_version or days):
+            return flags, []
+        
+        prefetcher = get_prefetcher()
+        deadline = time.time() - days * 86400 if days else None
+        for i, item in enumerate(items):
+            if not flags[i]:
+                continue
+            if (min_version and item.number < min_version) or (max_version and item.number > max_version):
+                flags[i] = 0
+            elif deadline is not None:
+                # 更新日時が未取得のものは表示しておく
+                metadata = prefetcher.get(item.filepath)
+                if metadata is not None and metadata.mtime < deadline:
+                    flags[i] = 0
+        return flags, []
+
+
 class VERSAVE_OT_version_manager(bpy.types.Operator):
     """Version manager to display and manage file versions"""
     bl_idname = "versave.version_manager"
@@ -198,8 +520,9 @@ class VERSAVE_OT_version_manager(bpy.types.Operator):
     def execute(self, context):
         if self.selected_version:
             try:
-                bpy.ops.wm.open_mainfile(filepath=self.selected_version)
-                self.report({'INFO'}, f"{get_text('opened')}: {os.path.basename(self.selected_version)}")
+                filepath = materialize_version(self.selected_version)
+                bpy.ops.wm.open_mainfile(filepath=filepath)
+                self.report({'INFO'}, f"{get_text('opened')}: {os.path.basename(filepath)}")
             except Exception as e:
                 self.report({'ERROR'}, f"{get_text('failed_to_open')}: {str(e)}")
                 return {'CANCELLED'}
@@ -217,7 +540,36 @@ class VERSAVE_OT_version_manager(bpy.types.Operator):
             self.report({'INFO'}, f"{get_text('version_manager')}: {get_text('please_save_project')}")
             return {'CANCELLED'}
         
-        return context.window_manager.invoke_popup(self, width=220)
+        versions = get_current_versions()
+        self.sync_version_items(context.window_manager, versions, current_filepath)
+        self.start_prefetch(versions, current_filepath)
+        return context.window_manager.invoke_popup(self, width=360)
+    
+    def start_prefetch(self, versions, current_filepath):
+        """メタデータの先読みを開始（現在のファイルに近いバージョンから）"""
+        prefetcher = get_prefetcher()
+        # 現在のファイルは上書き保存されている可能性があるので読み直す
+        prefetcher.forget(current_filepath)
+        
+        position = versions.positions.get(current_filepath, len(versions) - 1)
+        order = sorted(range(len(versions)), key=lambda i: abs(i - position))
+        if prefetcher.request(versions.entries[i].path for i in order):
+            if not bpy.app.timers.is_registered(poll_metadata):
+                bpy.app.timers.register(poll_metadata, first_interval=0.1)
+    
+    def sync_version_items(self, wm, versions, current_filepath):
+        """UIList 用の項目をインデックスと同期（draw() 中はプロパティを書き換えられないため）"""
+        items = wm.versave_versions
+        if [item.filepath for item in items] != [e.path for e in versions.entries]:
+            items.clear()
+            for entry in versions.entries:
+                item = items.add()
+                item.name = entry.filename
+                item.filepath = entry.path
+                item.number = entry.number
+        
+        # 現在のファイルを選択状態にしてリストに表示させる
+        wm.versave_active_version = versions.positions.get(current_filepath, max(0, len(items) - 1))
     
     def draw(self, context):
         layout = self.layout
@@ -227,115 +579,22 @@ class VERSAVE_OT_version_manager(bpy.types.Operator):
             layout.label(text=get_text("no_file_open"), icon='ERROR')
             return
         
-        
-        directory = os.path.dirname(current_filepath)
-        filename = os.path.basename(current_filepath)
-        name, ext = os.path.splitext(filename)
-        
-        project_name = re.sub(r'_v\d+$', '', name)
-        
-        versions = self.get_version_files(directory, project_name)
-        
-        if not versions:
+        wm = context.window_manager
+        if not wm.versave_versions:
             layout.label(text=get_text("no_versions_found"), icon='INFO')
             return
         
         layout.label(text=get_text("version_manager"), icon='PRESET')
         # layout.separator(factor=0.5)
         
-        box = layout.box()
-        
-        col = box.column(align=False)
-        for version_file in versions:
-            version_name = os.path.basename(version_file)
-            
-            # Extract version number for display
-            match = re.search(r'_v(\d+)\.blend$', version_name)
-            version_num = match.group(1) if match else "?"
-            
-            # File size calculation
-            try:
-                file_size = os.path.getsize(version_file)
-                if file_size > 1024*1024:
-                    size_text = f"{file_size/(1024*1024):.1f}MB"
-                elif file_size > 1024:
-                    size_text = f"{file_size/1024:.1f}KB"
-                else:
-                    size_text = f"{file_size}B"
-            except OSError:
-                size_text = "?MB"
-            
-            # Create row for each version with spacing
-            if versions.index(version_file) > 0:
-                col.separator(factor=0.3)
-            row = col.row(align=True)
-            
-            if version_file == current_filepath:
-                # Current file indicator
-                row.label(text="", icon='RADIOBUT_ON')
-                
-                # Version number with fixed width
-                version_col = row.column()
-                version_col.ui_units_x = 2.5
-                version_col.label(text=f"v{version_num}")
-                
-                # File size with fixed width
-                size_col = row.column()
-                size_col.ui_units_x = 3.5
-                size_col.alignment = 'RIGHT'
-                size_col.label(text=size_text)
-                
-                # Small spacer
-                row.separator()
-                
-                # Disabled open button for current file
-                op = row.operator("versave.open_version", text="", icon='FILE_BLEND')
-                op.filepath = version_file
-                row.enabled = False
-            else:
-                # Status icon placeholder
-                row.label(text="", icon='RADIOBUT_OFF')
-                
-                # Version number with fixed width
-                version_col = row.column()
-                version_col.ui_units_x = 2.5
-                version_col.label(text=f"v{version_num}")
-                
-                # File size with fixed width
-                size_col = row.column()
-                size_col.ui_units_x = 3.5
-                size_col.alignment = 'RIGHT'
-                size_col.label(text=size_text)
-                
-                # Small spacer
-                row.separator()
-                
-                # Open button
-                op = row.operator("versave.open_version", text="", icon='FILE_BLEND')
-                op.filepath = version_file
-    
-    def get_version_files(self, directory, project_name):
-        """Get all version files for the current project"""
-        versions = []
-        try:
-            for file in os.listdir(directory):
-                if file.endswith('.blend'):
-                    base_name = os.path.splitext(file)[0]
-                    if re.match(rf'^{re.escape(project_name)}_v\d+$', base_name):
-                        versions.append(os.path.join(directory, file))
-            
-            versions.sort(key=lambda x: self.extract_version_number(x))
-        except OSError:
-            pass
-        
-        return versions
-    
-    def extract_version_number(self, filepath):
-        """Extract version number from filepath for sorting"""
-        filename = os.path.basename(filepath)
-        name = os.path.splitext(filename)[0]
-        match = re.search(r'_v(\d+)$', name)
-        return int(match.group(1)) if match else 0
+        # UIList は表示中の行だけをレイアウトする
+        layout.template_list(
+            "VERSAVE_UL_versions", "",
+            wm, "versave_versions",
+            wm, "versave_active_version",
+            rows=min(len(wm.versave_versions), VISIBLE_ROWS),
+            maxrows=VISIBLE_ROWS
+        )
 
 class VERSAVE_OT_save_incremental(bpy.types.Operator):
     """Enhanced incremental save with proper versioning format"""
@@ -357,17 +616,44 @@ class VERSAVE_OT_save_incremental(bpy.types.Operator):
         filename = os.path.basename(current_filepath)
         name, ext = os.path.splitext(filename)
         
-        # 新しいファイル名を生成
+        # 新しいファイル名を生成し、既存・他の作業者と重ならない番号を確保
         new_name = self.generate_versioned_filename(name)
-        new_filepath = os.path.join(directory, new_name + ext)
+        base_name, version_num = version_index.split_version_name(new_name)
+        try:
+            _number, new_filepath = version_index.reserve_version(directory, base_name, version_num)
+        except OSError as e:
+            self.report({'ERROR'}, f"{get_text('failed_to_save')}: {str(e)}")
+            return {'CANCELLED'}
+        
+        preferences = get_preferences()
+        if preferences and preferences.incremental_mode == 'SNAPSHOT':
+            return self.save_and_snapshot(current_filepath, new_filepath)
         
-        # ファイルを保存
+        # 確保した番号で保存し、保存が終わったら予約を解放
         try:
             bpy.ops.wm.save_as_mainfile(filepath=new_filepath)
-            self.report({'INFO'}, f"{get_text('saved_as')}: {os.path.basename(new_filepath)}")
         except Exception as e:
             self.report({'ERROR'}, f"{get_text('failed_to_save')}: {str(e)}")
             return {'CANCELLED'}
+        finally:
+            version_index.release_version(new_filepath)
+        version_index.invalidate(directory)
+        self.report({'INFO'}, f"{get_text('saved_as')}: {os.path.basename(new_filepath)}")
+        compact_if_enabled(directory, version_index.project_name_from_path(new_filepath))
+        
+        return {'FINISHED'}
+    
+    def save_and_snapshot(self, current_filepath, new_filepath):
+        """現在のファイルを保存し、確保したバージョンへの複製をバックグラウンドで行う"""
+        try:
+            # 書き出しは通常の保存の1回だけ
+            bpy.ops.wm.save_mainfile()
+            snapshot_in_background(current_filepath, new_filepath)
+            self.report({'INFO'}, f"{get_text('snapshot_started')}: {os.path.basename(new_filepath)}")
+        except Exception as e:
+            version_index.release_version(new_filepath)
+            self.report({'ERROR'}, f"{get_text('failed_to_save')}: {str(e)}")
+            return {'CANCELLED'}
         
         return {'FINISHED'}
     
@@ -375,12 +661,9 @@ class VERSAVE_OT_save_incremental(bpy.types.Operator):
         """ファイル名にバージョン番号を追加/インクリメント"""
         
         # パターン1: _v + 数字 で終わる場合 (例: abc_v2 -> abc_v3)
-        version_pattern = r'^(.+)_v(\d+)$'
-        match = re.match(version_pattern, name)
+        base_name, version_num = version_index.split_version_name(name)
         
-        if match:
-            base_name = match.group(1)
-            version_num = int(match.group(2))
+        if version_num is not None:
             return f"{base_name}_v{version_num + 1}"
         
         # パターン2: 数字のみで終わる場合 (例: abc1 -> abc_v2)
@@ -403,11 +686,27 @@ addon_keymaps = []
 
 def register():
     """アドオン登録"""
+    bpy.utils.register_class(VERSAVE_AddonPreferences)
+    bpy.utils.register_class(VERSAVE_VersionItem)
     bpy.utils.register_class(VERSAVE_OT_save_initial)
     bpy.utils.register_class(VERSAVE_OT_open_version)
     bpy.utils.register_class(VERSAVE_OT_version_manager)
     bpy.utils.register_class(VERSAVE_OT_save_incremental)
     
+    # バージョンマネージャーの一覧（ファイルには保存されない）
+    bpy.types.WindowManager.versave_versions = bpy.props.CollectionProperty(type=VERSAVE_VersionItem)
+    bpy.types.WindowManager.versave_active_version = bpy.props.IntProperty()
+    
+    # バックグラウンド実行（blender -b）では一覧表示・言語の切り替え・ショートカットは不要
+    if bpy.app.background:
+        return
+    
+    bpy.utils.register_class(VERSAVE_UL_versions)
+    
+    # 言語設定が変わったら翻訳の表を選び直す（ファイルを開くたびに購読し直す）
+    subscribe_language_changes()
+    bpy.app.handlers.load_post.append(resubscribe_language_changes)
+    
     # キーボードショートカットを追加
     wm = bpy.context.window_manager
     if wm.keyconfigs.addon:
@@ -444,10 +743,44 @@ def register():
 
 def unregister():
     """アドオン登録解除"""
+    global _prefetcher, _thumbnail_previews, _snapshot_worker, _compaction_worker
+    if bpy.app.timers.is_registered(poll_snapshot_results):
+        bpy.app.timers.unregister(poll_snapshot_results)
+    if _snapshot_worker is not None:
+        # 作成中のスナップショットは完了させる
+        _snapshot_worker.shutdown(wait=True)
+        _snapshot_worker = None
+    if bpy.app.timers.is_registered(poll_compaction_results):
+        bpy.app.timers.unregister(poll_compaction_results)
+    if _compaction_worker is not None:
+        # 変換中のファイルを途中で残さないよう完了を待つ
+        _compaction_worker.shutdown(wait=True)
+        _compaction_worker = None
+    if bpy.app.timers.is_registered(poll_metadata):
+        bpy.app.timers.unregister(poll_metadata)
+    if _prefetcher is not None:
+        _prefetcher.shutdown()
+        _prefetcher = None
+    if _thumbnail_previews is not None:
+        bpy.utils.previews.remove(_thumbnail_previews)
+        _thumbnail_previews = None
+    
+    if resubscribe_language_changes in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(resubscribe_language_changes)
+    bpy.msgbus.clear_by_owner(_language_owner)
+    invalidate_texts()
+    
+    del bpy.types.WindowManager.versave_active_version
+    del bpy.types.WindowManager.versave_versions
+    
     bpy.utils.unregister_class(VERSAVE_OT_save_incremental)
     bpy.utils.unregister_class(VERSAVE_OT_version_manager)
     bpy.utils.unregister_class(VERSAVE_OT_open_version)
     bpy.utils.unregister_class(VERSAVE_OT_save_initial)
+    if not bpy.app.background:
+        bpy.utils.unregister_class(VERSAVE_UL_versions)
+    bpy.utils.unregister_class(VERSAVE_VersionItem)
+    bpy.utils.unregister_class(VERSAVE_AddonPreferences)
     
     # キーボードショートカットを削除
     for km, kmi in addon_keymaps:
@@ -0,0 +1,330 @@
+"""Versave のコマンドライン版（GUI不要）
+
+ディレクトリツリーをスレッドプールで並列に走査し、name_vN.blend を含む
+フォルダごとにプロジェクト単位のバージョン数・最新番号・合計サイズを
+JSON Lines で1行ずつ出力する。古いバージョンの削除（prune）と、
+古いバージョンを最新の番号として複製する操作（promote）もできる。
+バージョン名の解釈はアドオン本体と同じ version_index を使う。
+
+使い方:
+    python versave/cli.py list ROOT
+    python versave/cli.py prune ROOT [--keep N] [--max-age-days N] [--apply]
+    python versave/cli.py promote FILE
+    blender -b --factory-startup --python versave/cli.py -- list ROOT
+
+Python 単体でも動くよう、ここから import する delta_store・snapshot・
+version_index は bpy を import しないこと。
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+if __name__ == "__main__" and not __package__:
+    # スクリプトとして実行された場合は、__init__.py（bpy を import する）を
+    # 実行せずにパッケージだけを登録してから相対 import する
+    import importlib.util
+
+    _package_dir = os.path.dirname(os.path.abspath(__file__))
+    _spec = importlib.util.spec_from_file_location(
+        "versave", os.path.join(_package_dir, "__init__.py"),
+        submodule_search_locations=[_package_dir],
+    )
+    sys.modules.setdefault("versave", importlib.util.module_from_spec(_spec))
+    __package__ = "versave"
+
+from . import delta_store, snapshot, version_index
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def scan_directory(path, on_error=None):
+    """ディレクトリを os.scandir で1回だけ読み、(バージョンファイルの DirEntry, サブディレクトリ) を返す
+
+    隠しフォルダ（.versave_pinned など）とシンボリックリンクのディレクトリはたどらない。
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            subdirs.append(entry.path)
+                    elif version_index.parse_version_filename(entry.name) is not None and entry.is_file():
+                        files.append(entry)
+                except OSError:
+                    continue
+    except OSError as e:
+        if on_error is not None:
+            on_error(path, e)
+    return files, subdirs
+
+
+def iter_version_dirs(root, jobs=DEFAULT_JOBS, on_error=None):
+    """root 以下でバージョンファイルを含むフォルダを並列に探して順次返す
+
+    (フォルダ, バージョンファイルの DirEntry のリスト) を返す。読み終わった
+    ディレクトリから順にサブディレクトリを新しいタスクとして投入する。
+    ワーカーで起きた例外は future.result() でそのまま送出される。
+    """
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="versave-scan") as executor:
+        pending = {executor.submit(scan_directory, root, on_error): root}
+        while pending:
+            done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                files, subdirs = future.result()
+                if files:
+                    yield path, files
+                for subdir in subdirs:
+                    pending[executor.submit(scan_directory, subdir, on_error)] = subdir
+
+
+def group_versions(files):
+    """バージョンファイルの DirEntry をプロジェクトごとに分類
+
+    {プロジェクト名: (ProjectVersions, {パス: stat})} を返す。
+    """
+    grouped = {}
+    stats = {}
+    for entry in files:
+        project_name, number, suffix = version_index.parse_version_filename(entry.name)
+        grouped.setdefault(project_name, []).append(version_index.VersionEntry(number, entry.name, entry.path, suffix))
+        stats[entry.path] = entry.stat(follow_symlinks=False)
+    result = {}
+    for project_name, entries in grouped.items():
+        versions = version_index.ProjectVersions(entries)
+        result[project_name] = (versions, {e.path: stats[e.path] for e in versions.entries})
+    return result
+
+
+def pinned_bytes(directory, project_name):
+    """プロジェクトのピン留めファイルのうち、容量を消費しているバイト数"""
+    total = 0
+    try:
+        it = os.scandir(os.path.join(directory, delta_store.PIN_FOLDER))
+    except OSError:
+        return 0
+    with it:
+        for entry in it:
+            parsed = version_index.parse_version_filename(entry.name.rpartition("@")[0])
+            if parsed is None or parsed[0] != project_name:
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            # 元のファイルとリンクを共有している間は容量を消費しない
+            if stat.st_nlink <= 1:
+                total += stat.st_size
+    return total
+
+
+def summarize(directory, project_name, versions, stats):
+    """プロジェクト1つ分の集計レコード"""
+    mtimes = [s.st_mtime for s in stats.values()]
+    # スナップショットのハードリンクは1回だけ数える
+    files = {(s.st_dev, s.st_ino): s.st_size for s in stats.values()}
+    return {
+        "type": "project",
+        "directory": directory,
+        "project": project_name,
+        "count": len(versions),
+        "first": versions.entries[0].number,
+        "latest": versions.latest().number,
+        "deltas": sum(1 for e in versions.entries if e.suffix),
+        "bytes": sum(files.values()) + pinned_bytes(directory, project_name),
+        "oldest_mtime": min(mtimes),
+        "newest_mtime": max(mtimes),
+    }
+
+
+def select_prunable(versions, stats, keep=0, max_age_days=0, now=None):
+    """削除する古いバージョンを選ぶ（番号の小さい順）
+
+    最新のバージョンは常に残す。差分は次のバージョンを参照するので、
+    削除するのは古い方から連続した範囲だけにして、差分の連鎖を壊さない。
+    """
+    entries = versions.entries[:-1]
+    if keep > 0:
+        entries = versions.entries[:max(0, len(versions) - keep)]
+    if max_age_days > 0:
+        cutoff = (now if now is not None else time.time()) - max_age_days * 86400
+        count = 0
+        for entry in entries:
+            if stats[entry.path].st_mtime >= cutoff:
+                break
+            count += 1
+        entries = entries[:count]
+    return entries
+
+
+def prune_project(directory, project_name, versions, stats, keep=0, max_age_days=0, dry_run=True):
+    """古いバージョンを削除し、(削除したファイル名のリスト, 解放したバイト数) を返す"""
+    removed = []
+    freed = 0
+    for entry in select_prunable(versions, stats, keep, max_age_days):
+        if not dry_run:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+        removed.append(entry.filename)
+        freed += stats[entry.path].st_size
+    if removed and not dry_run:
+        freed += delta_store.remove_unused_pins(directory, project_name)
+        version_index.invalidate(directory)
+    return removed, freed
+
+
+def promote(filepath):
+    """古いバージョンを次の番号に複製して最新にし、作成したパスを返す
+
+    差分形式のバージョン（.vdelta を省略した名前でも可）は復元して複製する。
+    複製は元のバージョンの更新日時を引き継ぐ。
+    """
+    filepath = os.path.abspath(filepath)
+    if filepath.endswith(version_index.DELTA_SUFFIX):
+        filepath = filepath[:-len(version_index.DELTA_SUFFIX)]
+    directory, filename = os.path.split(filepath)
+    parsed = version_index.parse_version_filename(filename)
+    if parsed is None:
+        raise ValueError(f"Not a Versave version file: {filename}")
+
+    delta_path = filepath + version_index.DELTA_SUFFIX
+    is_delta = not os.path.exists(filepath)
+    if is_delta and not os.path.exists(delta_path):
+        raise FileNotFoundError(f"Version not found: {filepath}")
+
+    _number, new_filepath = version_index.reserve_version(directory, parsed[0])
+    try:
+        if is_delta:
+            delta_store.restore(delta_path, new_filepath)
+        else:
+            src_fd = os.open(filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                snapshot.clone_file(src_fd, filepath, new_filepath)
+            finally:
+                os.close(src_fd)
+    finally:
+        version_index.release_version(new_filepath)
+    version_index.invalidate(directory)
+    return new_filepath
+
+
+def run(root, command="list", keep=0, max_age_days=0, dry_run=True, jobs=DEFAULT_JOBS,
+        out=sys.stdout, err=sys.stderr):
+    """root 以下の全プロジェクトを集計（prune なら削除も）して JSON Lines を出力する"""
+    write_lock = threading.Lock()
+    totals = {"type": "summary", "root": root, "directories": 0, "projects": 0,
+              "count": 0, "bytes": 0, "freed_bytes": 0, "errors": 0}
+
+    def emit(stream, record):
+        with write_lock:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+
+    def on_error(path, error):
+        with write_lock:
+            totals["errors"] += 1
+        emit(err, {"type": "error", "path": path, "error": str(error)})
+
+    def process(directory, files):
+        records = []
+        try:
+            for project_name, (versions, stats) in sorted(group_versions(files).items()):
+                record = summarize(directory, project_name, versions, stats)
+                if command == "prune":
+                    removed, freed = prune_project(directory, project_name, versions, stats,
+                                                   keep, max_age_days, dry_run)
+                    record["prune"] = {
+                        "mode": "dry-run" if dry_run else "apply",
+                        "removed": removed,
+                        "freed_bytes": freed,
+                    }
+                records.append(record)
+        except Exception as e:
+            # 削除途中の失敗なども集計から落とさずに報告する
+            on_error(directory, e)
+            return
+        with write_lock:
+            totals["directories"] += 1
+            for record in records:
+                totals["projects"] += 1
+                totals["count"] += record["count"]
+                totals["bytes"] += record["bytes"]
+                if "prune" in record:
+                    totals["freed_bytes"] += record["prune"]["freed_bytes"]
+        for record in records:
+            emit(out, record)
+
+    # 探索と集計を別のプールで並行させ、見つかった順に出力する
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="versave-cli") as executor:
+        futures = [executor.submit(process, directory, files)
+                   for directory, files in iter_version_dirs(root, jobs, on_error)]
+    for future in futures:
+        future.result()
+
+    emit(out, totals)
+    return totals
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="versave",
+        description="List, prune and promote Versave versions under a directory tree.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="Print version counts and byte totals per project")
+    list_parser.add_argument("root", help="Directory tree to scan for versions")
+    list_parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Number of scanner threads")
+
+    prune_parser = subparsers.add_parser("prune", help="Remove old versions (the latest is always kept)")
+    prune_parser.add_argument("root", help="Directory tree to scan for versions")
+    prune_parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Number of scanner threads")
+    prune_parser.add_argument("--keep", type=int, default=0, help="Keep the newest N versions of each project")
+    prune_parser.add_argument("--max-age-days", type=int, default=0, help="Remove versions older than this")
+    prune_parser.add_argument("--apply", action="store_true", help="Delete the selected versions (default is a dry run)")
+
+    promote_parser = subparsers.add_parser("promote", help="Copy a version to the next free version number")
+    promote_parser.add_argument("file", help="Version to promote (name_vN.blend)")
+
+    args = parser.parse_args(argv)
+    if args.command == "prune" and args.keep <= 0 and args.max_age_days <= 0:
+        parser.error("prune needs --keep or --max-age-days")
+    return args
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+        # blender -b --python cli.py -- ... の場合は "--" 以降だけを使う
+        if "--" in sys.argv:
+            argv = sys.argv[sys.argv.index("--") + 1:]
+    args = parse_args(argv)
+
+    if args.command == "promote":
+        try:
+            new_filepath = promote(args.file)
+        except Exception as e:
+            sys.stderr.write(json.dumps({"type": "error", "path": args.file, "error": str(e)}, ensure_ascii=False) + "\n")
+            return 1
+        sys.stdout.write(json.dumps({"type": "promoted", "source": args.file, "target": new_filepath},
+                                    ensure_ascii=False) + "\n")
+        return 0
+
+    totals = run(args.root, args.command,
+                 keep=getattr(args, "keep", 0), max_age_days=getattr(args, "max_age_days", 0),
+                 dry_run=not getattr(args, "apply", False), jobs=max(1, args.jobs))
+    return 1 if totals["errors"] else 0
+
+
+if __name__ == "__main__":
+    # blender -b --python でもスクリプトの後に終了するので、終了コードをそのまま返す
+    sys.exit(main())
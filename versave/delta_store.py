@@ -0,0 +1,508 @@
+"""差分形式のバージョン保存
+
+最新のバージョンは通常の .blend のまま残し、古いバージョンを次の
+バージョンとの差分（name_vN.blend.vdelta）に置き換える。差分は rsync と
+同じ方式で作る：次のバージョンを固定長ブロックに分け、各ブロックの
+弱いローリングハッシュと強いハッシュを表にし、古いバージョンの全位置で
+ローリングハッシュを計算して一致するブロックをコピー命令に置き換える。
+
+古いバージョンは差分の連鎖をたどりながら、必要な範囲だけを読み出して
+ストリームで復元する（途中のバージョンを一時ファイルに展開しない）。
+
+差分が参照するファイルは名前とサイズ・更新日時で特定する。参照先が後から
+上書き保存されても差分が壊れないよう、差分を作る時に参照先を
+.versave_pinned/ にハードリンクしておく（同じ内容の間は容量を消費しない）。
+
+差分ファイル形式:
+    ヘッダー: マジック, 元のサイズ・更新日時, 参照先のサイズ・更新日時,
+              参照先のファイル名, 元の内容のハッシュ
+    命令列:   C(参照先の位置, 長さ) / L(長さ, データ) / E
+"""
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import uuid
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # Blenderには同梱されているが、単体実行時に備える
+    np = None
+
+from . import version_index
+from .snapshot import BackgroundWorker
+
+DELTA_SUFFIX = version_index.DELTA_SUFFIX
+PIN_FOLDER = ".versave_pinned"
+
+# 照合するブロックの大きさ
+BLOCK_SIZE = 8 * 1024
+# ローリングハッシュを計算する単位と、復元時の読み書き単位
+HASH_SLICE = 1024 * 1024
+READ_SIZE = 8 * 1024 * 1024
+
+# 差分がこれより大きくなる場合（圧縮された .blend など）は変換しない
+MAX_DELTA_RATIO = 0.9
+
+_MAGIC = b"VSDELTA1"
+_HEADER = struct.Struct("<8sQqQqH")
+_OP = struct.Struct("<cQQ")
+_DIGEST_SIZE = 20
+
+# 弱いハッシュの一次フィルター（下位24ビットのビットマップ）
+_FILTER_BITS = 24
+
+DeltaHeader = namedtuple("DeltaHeader", ["target_size", "target_mtime_ns", "basis_name",
+                                         "basis_size", "basis_mtime_ns", "digest", "ops_offset"])
+CompactionResult = namedtuple("CompactionResult", ["directory", "project_name", "converted", "error"])
+
+
+def _strong_hash(data):
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+def _weak_hash(a, b):
+    return (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+
+
+def _rolling_weak(view, start, count):
+    """view[start + k : start + k + BLOCK_SIZE] の弱いハッシュ（k = 0..count-1）"""
+    x = view[start:start + count + BLOCK_SIZE - 1].astype(np.int64)
+    c1 = np.concatenate(([0], np.cumsum(x)))
+    c2 = np.concatenate(([0], np.cumsum(x * np.arange(len(x), dtype=np.int64))))
+    a = c1[BLOCK_SIZE:] - c1[:-BLOCK_SIZE]
+    # b(k) = Σ (k + BLOCK_SIZE - i) * x_i  (i = k .. k + BLOCK_SIZE - 1)
+    b = (np.arange(count, dtype=np.int64) + BLOCK_SIZE) * a - (c2[BLOCK_SIZE:] - c2[:-BLOCK_SIZE])
+    return _weak_hash(a, b)
+
+
+def _basis_signature(view):
+    """参照先のブロック表 {弱いハッシュ: {強いハッシュ: 位置}}"""
+    table = {}
+    count = len(view) // BLOCK_SIZE
+    group = HASH_SLICE // BLOCK_SIZE
+    if np is not None:
+        weights = np.arange(BLOCK_SIZE, 0, -1, dtype=np.int64)
+        array = np.frombuffer(view, dtype=np.uint8)
+    for first in range(0, count, group):
+        n = min(group, count - first)
+        if np is not None:
+            blocks = array[first * BLOCK_SIZE:(first + n) * BLOCK_SIZE].reshape(n, BLOCK_SIZE).astype(np.int64)
+            weaks = _weak_hash(blocks.sum(axis=1), blocks @ weights).tolist()
+        else:
+            weaks = [0] * n
+        for i, weak in enumerate(weaks):
+            offset = (first + i) * BLOCK_SIZE
+            table.setdefault(weak, {}).setdefault(_strong_hash(view[offset:offset + BLOCK_SIZE]), offset)
+    return table
+
+
+def _iter_matches(view, basis_view, table):
+    """元のファイル中で参照先のブロックと一致する (位置, 参照先の位置) を昇順に返す"""
+    size = len(view)
+    if size < BLOCK_SIZE or not table:
+        return
+
+    if np is None:
+        # numpy が無い場合はブロック境界の位置だけを照合する
+        blocks = table.get(0, {})
+        for pos in range(0, size - BLOCK_SIZE + 1, BLOCK_SIZE):
+            offset = blocks.get(_strong_hash(view[pos:pos + BLOCK_SIZE]))
+            if offset is not None:
+                yield pos, offset
+        return
+
+    array = np.frombuffer(view, dtype=np.uint8)
+    keys = np.array(sorted(table), dtype=np.int64)
+    mask = (1 << _FILTER_BITS) - 1
+    present = np.zeros(1 << _FILTER_BITS, dtype=bool)
+    present[keys & mask] = True
+
+    pos = 0
+    last = size - BLOCK_SIZE + 1
+    slice_end = 0
+    basis_size = len(basis_view)
+    while pos < last:
+        if pos >= slice_end:
+            # pos から HASH_SLICE 個の位置の弱いハッシュを計算し、一致しうる位置を絞り込む
+            count = min(HASH_SLICE, last - pos)
+            weak = _rolling_weak(array, pos, count)
+            candidates = np.flatnonzero(present[weak & mask])
+            candidates = candidates[np.isin(weak[candidates], keys)]
+            weak_values = weak[candidates].tolist()
+            candidates = (candidates + pos).tolist()
+            slice_end = pos + count
+            i = 0
+        else:
+            i = bisect.bisect_left(candidates, pos)
+
+        match = None
+        while i < len(candidates):
+            candidate = candidates[i]
+            offset = table[weak_values[i]].get(_strong_hash(view[candidate:candidate + BLOCK_SIZE]))
+            if offset is not None:
+                match = candidate, offset
+                break
+            i += 1
+        if match is None:
+            pos = slice_end
+            continue
+
+        candidate, offset = match
+        yield candidate, offset
+        pos = candidate + BLOCK_SIZE
+        offset += BLOCK_SIZE
+        # 参照先でも続きのブロックが一致していれば、ハッシュを使わずそのまま照合する
+        while (pos + BLOCK_SIZE <= size and offset + BLOCK_SIZE <= basis_size
+               and view[pos:pos + BLOCK_SIZE].tobytes() == basis_view[offset:offset + BLOCK_SIZE].tobytes()):
+            yield pos, offset
+            pos += BLOCK_SIZE
+            offset += BLOCK_SIZE
+
+
+def _read_header(f):
+    magic, target_size, target_mtime_ns, basis_size, basis_mtime_ns, name_length = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC:
+        raise ValueError("Not a Versave delta file")
+    basis_name = f.read(name_length).decode("utf-8")
+    digest = f.read(_DIGEST_SIZE)
+    return DeltaHeader(target_size, target_mtime_ns, basis_name, basis_size, basis_mtime_ns, digest, f.tell())
+
+
+def read_header(path):
+    """差分ファイルのヘッダーを読む"""
+    with open(path, "rb") as f:
+        return _read_header(f)
+
+
+def encode(target_path, basis_path, out_path):
+    """target_path を basis_path との差分として out_path に書き出し、差分のサイズを返す"""
+    target_stat = os.stat(target_path)
+    basis_stat = os.stat(basis_path)
+    with open(target_path, "rb") as tf, open(basis_path, "rb") as bf:
+        target = mmap.mmap(tf.fileno(), 0, access=mmap.ACCESS_READ) if target_stat.st_size else b""
+        basis = mmap.mmap(bf.fileno(), 0, access=mmap.ACCESS_READ) if basis_stat.st_size else b""
+        try:
+            target_view = memoryview(target)
+            basis_view = memoryview(basis)
+            table = _basis_signature(basis_view)
+            digest = hashlib.blake2b(target_view, digest_size=_DIGEST_SIZE).digest()
+
+            basis_name = os.path.basename(basis_path).encode("utf-8")
+            with open(out_path, "wb") as out:
+                out.write(_HEADER.pack(_MAGIC, target_stat.st_size, target_stat.st_mtime_ns,
+                                       basis_stat.st_size, basis_stat.st_mtime_ns, len(basis_name)))
+                out.write(basis_name)
+                out.write(digest)
+
+                # 連続するコピー命令はまとめて書き出す
+                copy_offset = copy_length = 0
+                literal_start = 0
+                for pos, offset in _iter_matches(target_view, basis_view, table):
+                    if pos > literal_start:
+                        if copy_length:
+                            out.write(_OP.pack(b"C", copy_offset, copy_length))
+                            copy_length = 0
+                        out.write(_OP.pack(b"L", pos - literal_start, 0))
+                        out.write(target_view[literal_start:pos])
+                    if copy_length and copy_offset + copy_length == offset:
+                        copy_length += BLOCK_SIZE
+                    else:
+                        if copy_length:
+                            out.write(_OP.pack(b"C", copy_offset, copy_length))
+                        copy_offset, copy_length = offset, BLOCK_SIZE
+                    literal_start = pos + BLOCK_SIZE
+                if copy_length:
+                    out.write(_OP.pack(b"C", copy_offset, copy_length))
+                if literal_start < len(target_view):
+                    out.write(_OP.pack(b"L", len(target_view) - literal_start, 0))
+                    out.write(target_view[literal_start:])
+                out.write(_OP.pack(b"E", 0, 0))
+                stored = out.tell()
+            target_view.release()
+            basis_view.release()
+        finally:
+            if target_stat.st_size:
+                target.close()
+            if basis_stat.st_size:
+                basis.close()
+    return stored
+
+
+class _FileReader:
+    """通常のファイルからの読み出し"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+
+    def pread(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+class DeltaReader:
+    """差分ファイルの連鎖をたどって元の内容を読み出す"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            header = _read_header(self._file)
+            self.header = header
+            self.size = header.target_size
+
+            # 命令の一覧（元のファイル上の開始位置で二分探索する）
+            self._starts = []
+            self._ops = []
+            position = 0
+            while True:
+                tag, a, b = _OP.unpack(self._file.read(_OP.size))
+                if tag == b"E":
+                    break
+                if tag == b"C":
+                    self._ops.append((True, a, b))
+                    length = b
+                elif tag == b"L":
+                    self._ops.append((False, self._file.tell(), a))
+                    self._file.seek(a, os.SEEK_CUR)
+                    length = a
+                else:
+                    raise ValueError(f"Corrupted delta file: {os.path.basename(path)}")
+                self._starts.append(position)
+                position += length
+            if position != header.target_size:
+                raise ValueError(f"Incomplete delta file: {os.path.basename(path)}")
+
+            self.basis = open_version_reader(os.path.dirname(path), header.basis_name,
+                                             header.basis_size, header.basis_mtime_ns)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def pread(self, offset, size):
+        parts = []
+        i = bisect.bisect_right(self._starts, offset) - 1
+        while size > 0 and 0 <= i < len(self._ops):
+            is_copy, source, length = self._ops[i]
+            within = offset - self._starts[i]
+            n = min(length - within, size)
+            if is_copy:
+                data = self.basis.pread(source + within, n)
+            else:
+                self._file.seek(source + within)
+                data = self._file.read(n)
+            if len(data) != n:
+                raise IOError("Unexpected end of file in delta chain")
+            parts.append(data)
+            offset += n
+            size -= n
+            i += 1
+        return b"".join(parts)
+
+    def close(self):
+        self.basis.close()
+        self._file.close()
+
+
+def pinned_path(directory, filename, mtime_ns):
+    return os.path.join(directory, PIN_FOLDER, f"{filename}@{mtime_ns}")
+
+
+def open_version_reader(directory, filename, size, mtime_ns):
+    """名前・サイズ・更新日時で特定したバージョンの読み出し口を開く
+
+    通常のファイル、ピン留めされたファイル、差分ファイルの順に探す。
+    """
+    path = os.path.join(directory, filename)
+    try:
+        stat = os.stat(path)
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+            return _FileReader(path)
+    except FileNotFoundError:
+        pass
+
+    pinned = pinned_path(directory, filename, mtime_ns)
+    try:
+        if os.stat(pinned).st_size == size:
+            return _FileReader(pinned)
+    except FileNotFoundError:
+        pass
+
+    delta = path + DELTA_SUFFIX
+    try:
+        header = read_header(delta)
+        if header.target_size == size and header.target_mtime_ns == mtime_ns:
+            return DeltaReader(delta)
+    except FileNotFoundError:
+        pass
+    raise IOError(f"Base version is missing for delta: {filename}")
+
+
+def restore(delta_path, out_path):
+    """差分ファイルから元のファイルを復元（内容と更新日時を元に戻す）"""
+    reader = DeltaReader(delta_path)
+    temp_path = f"{out_path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        digest = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+        with open(temp_path, "wb") as out:
+            for offset in range(0, reader.size, READ_SIZE):
+                data = reader.pread(offset, READ_SIZE)
+                digest.update(data)
+                out.write(data)
+        if digest.digest() != reader.header.digest:
+            raise IOError(f"Restored data does not match: {os.path.basename(delta_path)}")
+        os.utime(temp_path, ns=(reader.header.target_mtime_ns, reader.header.target_mtime_ns))
+        os.replace(temp_path, out_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        reader.close()
+
+
+def pin_file(path):
+    """ファイルを現在の内容のまま .versave_pinned/ にハードリンクする（失敗しても続行）"""
+    stat = os.stat(path)
+    directory, filename = os.path.split(path)
+    pinned = pinned_path(directory, filename, stat.st_mtime_ns)
+    if os.path.exists(pinned):
+        return
+    try:
+        os.makedirs(os.path.dirname(pinned), exist_ok=True)
+        os.link(path, pinned)
+    except OSError:
+        # ハードリンクできないファイルシステムでは参照先の上書きを検出するだけになる
+        pass
+
+
+def _unpin_file(path, stat):
+    directory, filename = os.path.split(path)
+    pinned = pinned_path(directory, filename, stat.st_mtime_ns)
+    try:
+        if os.path.samestat(os.stat(pinned), stat):
+            os.remove(pinned)
+    except OSError:
+        pass
+
+
+def remove_unused_pins(directory, project_name):
+    """どの差分からも参照されなくなったプロジェクトのピン留めファイルを削除
+
+    古いバージョンを削除した後に使う。解放したバイト数を返す。
+    読めない差分がある場合は参照先を判断できないので何も削除しない。
+    """
+    referenced = set()
+    with os.scandir(directory) as it:
+        for entry in it:
+            parsed = version_index.parse_version_filename(entry.name)
+            if parsed is None or parsed[0] != project_name or not parsed[2]:
+                continue
+            try:
+                header = read_header(entry.path)
+            except (OSError, ValueError, struct.error):
+                return 0
+            referenced.add(f"{header.basis_name}@{header.basis_mtime_ns}")
+
+    freed = 0
+    try:
+        it = os.scandir(os.path.join(directory, PIN_FOLDER))
+    except FileNotFoundError:
+        return 0
+    with it:
+        for entry in it:
+            filename = entry.name.rpartition("@")[0]
+            parsed = version_index.parse_version_filename(filename)
+            if parsed is None or parsed[0] != project_name or entry.name in referenced:
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                os.remove(entry.path)
+            except OSError:
+                continue
+            # 元のファイルとリンクを共有していれば容量は解放されない
+            if stat.st_nlink <= 1:
+                freed += stat.st_size
+    return freed
+
+
+def convert_to_delta(target_path, basis_path):
+    """target_path を basis_path との差分に置き換える。差分が小さくならなければ False"""
+    target_stat = os.stat(target_path)
+    pin_file(basis_path)
+
+    delta_path = target_path + DELTA_SUFFIX
+    temp_path = os.path.join(os.path.dirname(delta_path), f".{os.path.basename(delta_path)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        stored = encode(target_path, basis_path, temp_path)
+        if stored > target_stat.st_size * MAX_DELTA_RATIO:
+            os.remove(temp_path)
+            return False
+
+        # 書き出した差分から正しく復元できることを確認してから置き換える
+        reader = DeltaReader(temp_path)
+        try:
+            digest = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+            for offset in range(0, reader.size, READ_SIZE):
+                digest.update(reader.pread(offset, READ_SIZE))
+        finally:
+            reader.close()
+        if digest.digest() != reader.header.digest:
+            raise IOError(f"Delta verification failed: {os.path.basename(target_path)}")
+
+        # 差分ファイルの更新日時は元のバージョンに合わせる
+        os.utime(temp_path, ns=(target_stat.st_atime_ns, target_stat.st_mtime_ns))
+        if not os.path.samestat(os.stat(target_path), target_stat):
+            # 変換中に上書きされた
+            os.remove(temp_path)
+            return False
+        os.replace(temp_path, delta_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    os.remove(target_path)
+    # 差分から同じ内容を復元できるので、このファイル自身のピン留めは不要
+    _unpin_file(target_path, target_stat)
+    return True
+
+
+def compact_project(directory, project_name, exclude=(), index=None):
+    """次のバージョンが通常のファイルとして残っているバージョンを差分に変換
+
+    開いているファイル（exclude）は変換せず、参照先にもしない。
+    変換したバージョンのパスのリストを返す。
+    """
+    index = index or version_index.shared_index()
+    entries = index.lookup(directory, project_name).entries
+    exclude = set(exclude)
+    converted = []
+    for entry, successor in zip(entries, entries[1:]):
+        if entry.suffix or successor.suffix or entry.path in exclude or successor.path in exclude:
+            continue
+        if convert_to_delta(entry.path, successor.path):
+            converted.append(entry.path)
+    if converted:
+        index.invalidate(directory)
+    return converted
+
+
+class CompactionWorker(BackgroundWorker):
+    """差分への変換をバックグラウンドで行うワーカー"""
+
+    thread_name_prefix = "versave-delta"
+
+    def submit(self, directory, project_name, exclude=()):
+        self._submit(directory, project_name, tuple(exclude))
+
+    def _run(self, directory, project_name, exclude):
+        try:
+            return CompactionResult(directory, project_name, compact_project(directory, project_name, exclude), None)
+        except Exception as e:
+            return CompactionResult(directory, project_name, [], e)
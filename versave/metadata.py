@@ -0,0 +1,181 @@
+"""バージョンファイルのメタデータ先読み
+
+更新日時・サイズ・.blend に埋め込まれたサムネイル（TEST ブロック）を
+スレッドプール上で読み込み、LRU キャッシュに保持する。draw() は
+キャッシュを参照するだけで、ファイルを開いたり stat したりしない。
+
+サムネイルは .blend ヘッダー直後のブロックにあるため、先頭から
+上限付きで読むだけで取り出せる（ファイル全体は読まない）。
+"""
+import gzip
+import os
+import struct
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# サムネイルを探すために読む最大バイト数（128x128 RGBA は約64KB）
+THUMBNAIL_READ_LIMIT = 256 * 1024
+
+# キャッシュするファイル数
+CACHE_SIZE = 512
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+Thumbnail = namedtuple("Thumbnail", ["width", "height", "pixels"])
+VersionMetadata = namedtuple("VersionMetadata", ["size", "mtime", "thumbnail"])
+
+
+def _open_blend_stream(f):
+    """圧縮された .blend（gzip / zstd）なら展開ストリームを返す"""
+    magic = f.read(4)
+    f.seek(0)
+    if magic[:2] == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=f)
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            return None
+        return zstandard.ZstdDecompressor().stream_reader(f)
+    return f
+
+
+def _read_exact(stream, size, budget):
+    if size > budget[0]:
+        raise ValueError("Thumbnail block is beyond the read limit")
+    budget[0] -= size
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of file")
+    return data
+
+
+def read_thumbnail(path, limit=THUMBNAIL_READ_LIMIT):
+    """.blend ファイルの TEST ブロックからサムネイルを読む。無ければ None
+
+    先頭から最大 limit バイトだけ読む。
+    """
+    with open(path, "rb") as raw:
+        stream = _open_blend_stream(raw)
+        if stream is None:
+            return None
+        budget = [limit]
+        header = _read_exact(stream, 12, budget)
+        if not header.startswith(b"BLENDER"):
+            raise ValueError("Not a .blend file")
+
+        if header[7:9].isdigit():
+            # 新しいヘッダー形式: BLENDER17-01v0500（64bit の大きなブロックヘッダー）
+            header += _read_exact(stream, int(header[7:9]) - 12, budget)
+            endian = "<" if header[12:13] == b"v" else ">"
+            bhead = struct.Struct(endian + "4siQqq")
+            code_len = lambda fields: (fields[0], fields[3])
+        else:
+            # 従来のヘッダー形式: BLENDER-v402
+            endian = "<" if header[8:9] == b"v" else ">"
+            pointer = "Q" if header[7:8] == b"-" else "I"
+            bhead = struct.Struct(endian + "4si" + pointer + "ii")
+            code_len = lambda fields: (fields[0], fields[1])
+
+        while True:
+            code, length = code_len(bhead.unpack(_read_exact(stream, bhead.size, budget)))
+            if code == b"TEST":
+                data = _read_exact(stream, length, budget)
+                width, height = struct.unpack_from(endian + "ii", data)
+                pixels = data[8:8 + width * height * 4]
+                if width <= 0 or height <= 0 or len(pixels) != width * height * 4:
+                    raise ValueError("Invalid thumbnail block")
+                return Thumbnail(width, height, pixels)
+            if code != b"REND":
+                # サムネイルはファイル先頭の REND ブロックの直後にしか無い
+                return None
+            _read_exact(stream, length, budget)
+
+
+def read_metadata(path):
+    """ファイルのサイズ・更新日時・サムネイルを読む"""
+    stat = os.stat(path)
+    try:
+        thumbnail = read_thumbnail(path)
+    except (OSError, ValueError, EOFError, struct.error):
+        thumbnail = None
+    return VersionMetadata(stat.st_size, stat.st_mtime, thumbnail)
+
+
+class MetadataPrefetcher:
+    """メタデータをスレッドプールで先読みし、LRU キャッシュに保持する
+
+    結果の到着は has_updates() でメインスレッドから確認する。
+    """
+
+    def __init__(self, max_workers=4, cache_size=CACHE_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="versave")
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._pending = set()
+        self._updated = False
+
+    def get(self, path):
+        """キャッシュ済みのメタデータ（未取得なら None）"""
+        with self._lock:
+            metadata = self._cache.get(path)
+            if metadata is not None:
+                self._cache.move_to_end(path)
+            return metadata
+
+    def request(self, paths):
+        """キャッシュに無いパスの読み込みを順に投入し、投入数を返す"""
+        submitted = 0
+        for path in paths:
+            with self._lock:
+                if path in self._cache or path in self._pending:
+                    continue
+                self._pending.add(path)
+            try:
+                self._executor.submit(self._load, path)
+            except RuntimeError:
+                # シャットダウン済み
+                with self._lock:
+                    self._pending.discard(path)
+                break
+            submitted += 1
+        return submitted
+
+    def forget(self, path):
+        """内容が変わったファイルのキャッシュを破棄"""
+        with self._lock:
+            self._cache.pop(path, None)
+
+    def is_busy(self):
+        with self._lock:
+            return bool(self._pending)
+
+    def has_updates(self):
+        """前回の確認以降に新しい結果が届いたか"""
+        with self._lock:
+            updated, self._updated = self._updated, False
+            return updated
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _load(self, path):
+        try:
+            metadata = read_metadata(path)
+        except OSError:
+            metadata = None
+        with self._lock:
+            self._pending.discard(path)
+            if metadata is None:
+                return
+            self._cache[path] = metadata
+            self._cache.move_to_end(path)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            self._updated = True
@@ -0,0 +1,229 @@
+"""保存済みファイルのスナップショット作成
+
+保存した .blend をもう一度書き出す代わりに、ファイルシステムの機能で
+次のバージョンへ複製する。複製はバックグラウンドのスレッドで行い、
+使える方法を次の順に試す:
+
+    1. reflink（Linux の FICLONE / macOS の fclonefileat）: データを共有するコピー
+    2. ハードリンク: Blender の保存は一時ファイルからの置き換えなので、
+       元のファイルを保存し直してもスナップショット側は変わらない
+    3. os.copy_file_range: カーネル内でのコピー（Linux）
+    4. 固定サイズのチャンク単位のコピー
+
+複製元は保存直後に開いたファイル記述子で指定する。複製が終わる前に
+作業ファイルが再保存されても、保存した時点の内容がスナップショットになる。
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import sys
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# チャンクコピーの単位
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Linux の FICLONE ioctl
+_FICLONE = 0x40049409
+
+SnapshotResult = namedtuple("SnapshotResult", ["source", "target", "method", "error"])
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return _libc
+
+
+def _reflink(src_fd, dst):
+    """データブロックを共有するコピー。対応していなければ OSError"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        except BaseException:
+            os.close(dst_fd)
+            os.remove(dst)
+            raise
+        os.close(dst_fd)
+    elif sys.platform == "darwin":
+        libc = _get_libc()
+        dir_fd = os.open(os.path.dirname(dst) or ".", os.O_RDONLY)
+        try:
+            if libc.fclonefileat(src_fd, dir_fd, os.fsencode(os.path.basename(dst)), 0) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno))
+        finally:
+            os.close(dir_fd)
+    else:
+        raise OSError("Reflink is not supported on this platform")
+
+
+def _hardlink(src_fd, src_path, dst):
+    """ハードリンク。src_path が既に別のファイルに置き換わっていれば OSError"""
+    os.link(src_path, dst)
+    if not os.path.samestat(os.fstat(src_fd), os.stat(dst)):
+        os.remove(dst)
+        raise OSError("Source file was replaced before it could be linked")
+
+
+def _copy_file_range(src_fd, dst):
+    size = os.fstat(src_fd).st_size
+    with open(dst, "xb") as f:
+        offset = 0
+        try:
+            while offset < size:
+                copied = os.copy_file_range(src_fd, f.fileno(), size - offset, offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except BaseException:
+            f.close()
+            os.remove(dst)
+            raise
+
+
+def _chunked_copy(src_fd, dst):
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    with open(dst, "xb") as f:
+        while True:
+            data = os.read(src_fd, COPY_CHUNK_SIZE)
+            if not data:
+                break
+            f.write(data)
+
+
+def clone_file(src_fd, src_path, dst):
+    """src_fd の内容を dst に複製し、使った方法の名前を返す
+
+    一時ファイルに複製してから置き換えるので、途中の状態の dst は見えない。
+    """
+    directory = os.path.dirname(dst)
+    temp_path = os.path.join(directory, f".{os.path.basename(dst)}.{uuid.uuid4().hex[:8]}.tmp")
+
+    methods = [("reflink", lambda: _reflink(src_fd, temp_path)),
+               ("hardlink", lambda: _hardlink(src_fd, src_path, temp_path))]
+    if hasattr(os, "copy_file_range"):
+        methods.append(("copy_file_range", lambda: _copy_file_range(src_fd, temp_path)))
+    methods.append(("copy", lambda: _chunked_copy(src_fd, temp_path)))
+
+    error = None
+    for name, method in methods:
+        try:
+            method()
+        except OSError as e:
+            error = e
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            continue
+        try:
+            if name != "hardlink":
+                # 複製したファイルの更新日時は保存した時点に合わせる
+                stat = os.fstat(src_fd)
+                os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(temp_path, dst)
+        except BaseException:
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+    raise error
+
+
+class BackgroundWorker:
+    """1本のスレッドでジョブを順に実行するワーカーの共通部分
+
+    サブクラスは _run() で結果を返し、_submit() でジョブを投入する。
+    完了結果は poll_results() でメインスレッドから取り出す。
+    """
+
+    thread_name_prefix = "versave"
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.thread_name_prefix)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._results = queue.Queue()
+
+    def is_busy(self):
+        """実行中のジョブ、または未取得の結果があるか"""
+        with self._lock:
+            if self._pending:
+                return True
+        return not self._results.empty()
+
+    def poll_results(self):
+        """完了したジョブの結果をすべて取り出す"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def shutdown(self, wait=True):
+        """ワーカーを停止（wait=True なら投入済みのジョブの完了を待つ）"""
+        self._executor.shutdown(wait=wait)
+
+    def _submit(self, *args):
+        with self._lock:
+            self._pending += 1
+        try:
+            self._executor.submit(self._execute, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def _execute(self, *args):
+        try:
+            self._results.put(self._run(*args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _run(self, *args):
+        raise NotImplementedError
+
+
+class SnapshotWorker(BackgroundWorker):
+    """スナップショットを作成するバックグラウンドワーカー"""
+
+    thread_name_prefix = "versave-snapshot"
+
+    def submit(self, src_path, dst):
+        """保存直後の src_path を開いて複製ジョブを投入"""
+        if os.name == "nt":
+            # Windows では開いているファイルを置き換えられず、複製中の再保存が
+            # 失敗するため、まずその場でハードリンクを試す（メタデータ操作のみ）
+            temp_path = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.{uuid.uuid4().hex[:8]}.tmp")
+            try:
+                os.link(src_path, temp_path)
+                os.replace(temp_path, dst)
+            except OSError:
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+            else:
+                self._results.put(SnapshotResult(src_path, dst, "hardlink", None))
+                return
+        src_fd = os.open(src_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            self._submit(src_fd, src_path, dst)
+        except BaseException:
+            os.close(src_fd)
+            raise
+
+    def _run(self, src_fd, src_path, dst):
+        try:
+            return SnapshotResult(src_path, dst, clone_file(src_fd, src_path, dst), None)
+        except Exception as e:
+            return SnapshotResult(src_path, dst, None, e)
+        finally:
+            os.close(src_fd)
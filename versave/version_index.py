@@ -0,0 +1,271 @@
+"""バージョンファイルのキャッシュ付きインデックス
+
+プロジェクトフォルダを os.scandir で一度だけ走査し、name_vN.blend を
+プロジェクト名ごとに分類した結果をディレクトリの mtime をキーにして
+キャッシュする。バージョンマネージャーの draw() はこのインデックスを
+参照するだけで、ファイル単位のシステムコールや正規表現のコンパイルは行わない。
+サイズ・更新日時・サムネイルは metadata モジュールが別スレッドで先読みする。
+"""
+import errno
+import os
+import re
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+# ディレクトリの mtime を再確認するまでの最短間隔（秒）
+STAT_INTERVAL = 1.0
+
+# 差分形式で保存された古いバージョンの接尾辞（delta_store を参照）
+DELTA_SUFFIX = ".vdelta"
+
+# name_vN.blend または name_vN.blend.vdelta（バージョン番号の桁数は問わない）
+_VERSION_FILE_RE = re.compile(r'^(.+)_v(\d+)\.blend(\.vdelta)?$')
+# 拡張子を除いた name_vN
+_VERSION_NAME_RE = re.compile(r'^(.+)_v(\d+)$')
+
+# サイズ・更新日時は stat が必要なため metadata モジュールで別途先読みする
+# suffix は差分形式なら DELTA_SUFFIX、通常の .blend なら ""
+VersionEntry = namedtuple("VersionEntry", ["number", "filename", "path", "suffix"])
+
+
+class ProjectVersions:
+    """1つのプロジェクトに属するバージョン一覧（番号の小さい順）"""
+    __slots__ = ("entries", "positions")
+
+    def __init__(self, entries):
+        # 復元中などで同じ番号が両方の形式で存在する場合は通常のファイルを使う
+        by_number = {}
+        for entry in entries:
+            if entry.number not in by_number or not entry.suffix:
+                by_number[entry.number] = entry
+        self.entries = tuple(sorted(by_number.values(), key=lambda e: e.number))
+        # パス -> 一覧内の位置（現在のファイルの行を O(1) で引くため）
+        self.positions = {e.path: i for i, e in enumerate(self.entries)}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def latest(self):
+        """最新（番号が最大）のバージョン。無ければ None"""
+        return self.entries[-1] if self.entries else None
+
+
+EMPTY_VERSIONS = ProjectVersions(())
+
+
+def parse_version_filename(filename):
+    """'name_vN.blend[.vdelta]' を (name, N, 接尾辞) に分解。バージョンファイルでなければ None"""
+    match = _VERSION_FILE_RE.match(filename)
+    if not match:
+        return None
+    return match.group(1), int(match.group(2)), match.group(3) or ""
+
+
+def split_version_name(name):
+    """拡張子なしの 'name_vN' を (name, N) に分解。番号が無ければ (name, None)"""
+    match = _VERSION_NAME_RE.match(name)
+    if not match:
+        return name, None
+    return match.group(1), int(match.group(2))
+
+
+def project_name_from_path(filepath):
+    """.blend ファイルパスからプロジェクト名（_vN を除いた名前）を取得"""
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return split_version_name(name)[0]
+
+
+def scan_directory(directory):
+    """ディレクトリを1回の os.scandir で走査し、プロジェクト名ごとに分類
+
+    ファイル単位の stat は行わない（ファイル種別はディレクトリエントリから判定）。
+    """
+    grouped = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            parsed = parse_version_filename(entry.name)
+            if parsed is None:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            project_name, number, suffix = parsed
+            grouped.setdefault(project_name, []).append(VersionEntry(number, entry.name, entry.path, suffix))
+    return {project_name: ProjectVersions(entries) for project_name, entries in grouped.items()}
+
+
+class _Snapshot:
+    __slots__ = ("mtime_ns", "checked_at", "projects")
+
+    def __init__(self, mtime_ns, projects):
+        self.mtime_ns = mtime_ns
+        self.checked_at = time.monotonic()
+        self.projects = projects
+
+
+class VersionIndex:
+    """ディレクトリごとの走査結果キャッシュ"""
+
+    def __init__(self, stat_interval=STAT_INTERVAL):
+        self.stat_interval = stat_interval
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, directory, project_name):
+        """プロジェクトのバージョン一覧を返す（フォルダが無ければ空）"""
+        snapshot = self._get_snapshot(directory)
+        return snapshot.projects.get(project_name, EMPTY_VERSIONS)
+
+    def projects(self, directory):
+        """フォルダ内のすべてのバージョン一覧 {プロジェクト名: ProjectVersions}"""
+        return dict(self._get_snapshot(directory).projects)
+
+    def invalidate(self, directory=None):
+        """キャッシュを破棄（directory 省略時はすべて）"""
+        with self._lock:
+            if directory is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(directory, None)
+
+    def _get_snapshot(self, directory):
+        with self._lock:
+            snapshot = self._snapshots.get(directory)
+        now = time.monotonic()
+        if snapshot is not None and now - snapshot.checked_at < self.stat_interval:
+            return snapshot
+
+        # 安価な mtime チェック（ディレクトリに対する stat 1回のみ）
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns:
+            snapshot.checked_at = now
+            return snapshot
+
+        projects = {}
+        if mtime_ns is not None:
+            try:
+                projects = scan_directory(directory)
+            except OSError:
+                pass
+        snapshot = _Snapshot(mtime_ns, projects)
+
+        with self._lock:
+            self._snapshots[directory] = snapshot
+        return snapshot
+
+
+# 予約マーカーがこれより古ければ、保存中に終了したセッションの残りとみなす（秒）
+RESERVATION_TIMEOUT = 6 * 3600
+
+
+def reservation_path(path):
+    """name_vN.blend の番号予約に使うマーカーファイル（.name_vN.reserve）のパス"""
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{os.path.splitext(filename)[0]}.reserve")
+
+
+def _is_stale(marker):
+    try:
+        return time.time() - os.stat(marker).st_mtime > RESERVATION_TIMEOUT
+    except OSError:
+        return False
+
+
+def _reclaim_stale(marker):
+    """古い予約マーカーを取り除き、取り除けたら True を返す
+
+    複数のセッションが同時に古いと判断しても、一意の名前への移動に成功するのは
+    1 つだけ。移した後に同じファイルの古さを確かめ直し、その間に他のセッションが
+    作り直した新しいマーカーだった場合は元に戻す。
+    """
+    claimed = f"{marker}.{uuid.uuid4().hex[:8]}.stale"
+    try:
+        os.replace(marker, claimed)
+    except OSError:
+        return False
+    stale = _is_stale(claimed)
+    if not stale:
+        try:
+            os.link(claimed, marker)
+        except OSError:
+            pass
+    try:
+        os.remove(claimed)
+    except OSError:
+        pass
+    return stale
+
+
+def reserve_version(directory, project_name, first_number=1, index=None):
+    """次の空いているバージョン番号を原子的に確保し、(番号, パス) を返す
+
+    保存先の name_vN.blend そのものは作らず、隠しマーカー .name_vN.reserve を
+    O_CREAT | O_EXCL で作成して番号を予約する。空の .blend を先に作ると、
+    Save Versions が有効な Blender が保存時にそれを .blend1 へ回して空の
+    バックアップが残り、保存が終わるまで他のセッションからも開ける 0 バイトの
+    バージョンに見えてしまうため。
+    同じフォルダに保存する他の Blender（他の作業者）と同時に呼ばれても、
+    同じ番号を二重に確保することはない。候補はキャッシュ済みインデックスの
+    最新番号の次から始め、先を越された場合だけ番号を進めて再試行する
+    （保存のたびにフォルダを走査し直すことはない）。
+
+    保存が終わったら（成功・失敗を問わず）release_version() で解放すること。
+    """
+    index = index or _index
+    latest = index.lookup(directory, project_name).latest()
+    number = max(first_number, latest.number + 1 if latest is not None else 1)
+    while True:
+        path = os.path.join(directory, f"{project_name}_v{number}.blend")
+        marker = reservation_path(path)
+        try:
+            fd = os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            if _is_stale(marker):
+                _reclaim_stale(marker)
+            else:
+                number += 1
+            continue
+        os.close(fd)
+        if os.path.exists(path) or os.path.exists(path + DELTA_SUFFIX):
+            # 保存済みの番号（インデックスが古い場合）
+            release_version(path)
+            number += 1
+            continue
+        return number, path
+
+
+def release_version(path):
+    """reserve_version() で確保した番号の予約マーカーを削除"""
+    try:
+        os.remove(reservation_path(path))
+    except OSError:
+        pass
+
+
+# アドオン全体で共有するインデックス
+_index = VersionIndex()
+
+
+def shared_index():
+    """アドオン全体で共有するインデックス"""
+    return _index
+
+
+def lookup(directory, project_name):
+    """共有インデックスからバージョン一覧を取得"""
+    return _index.lookup(directory, project_name)
+
+
+def invalidate(directory=None):
+    """共有インデックスのキャッシュを破棄（Versave 自身の保存後に呼ぶ）"""
+    _index.invalidate(directory)
@@ -134,6 +134,10 @@ def register():
     bpy.utils.register_class(VEXER_OT_add_line)
     bpy.utils.register_class(VEXER_OT_add_triangle)
     
+    # Icons, menu entries and UI translations are UI-only; skip them under blender -b
+    if bpy.app.background:
+        return
+    
     # Load custom icons
     pcoll = bpy.utils.previews.new()
     icons_dir = os.path.join(os.path.dirname(__file__), "icons")
@@ -157,19 +161,20 @@ def register():
 
 def unregister():
     """Unregister addon"""
-    # Unregister translations
-    try:
-        bpy.app.translations.unregister(__name__)
-    except ValueError:
-        pass
-    
-    # Remove custom icons
-    for pcoll in preview_collections.values():
-        bpy.utils.previews.remove(pcoll)
-    preview_collections.clear()
+    if not bpy.app.background:
+        # Unregister translations
+        try:
+            bpy.app.translations.unregister(__name__)
+        except ValueError:
+            pass
+        
+        # Remove custom icons
+        for pcoll in preview_collections.values():
+            bpy.utils.previews.remove(pcoll)
+        preview_collections.clear()
         
-    bpy.types.VIEW3D_MT_mesh_add.remove(menu_func_plane)
-    bpy.types.VIEW3D_MT_mesh_add.remove(menu_func_torus)
+        bpy.types.VIEW3D_MT_mesh_add.remove(menu_func_plane)
+        bpy.types.VIEW3D_MT_mesh_add.remove(menu_func_torus)
     bpy.utils.unregister_class(VEXER_OT_add_triangle)
     bpy.utils.unregister_class(VEXER_OT_add_line)
     bpy.utils.unregister_class(VEXER_OT_add_point)
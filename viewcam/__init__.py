@@ -126,6 +126,11 @@ def register():
     """アドオン登録"""
     bpy.utils.register_class(VIEWCAM_OT_set_view_to_camera)
     bpy.utils.register_class(VIEWCAM_OT_toggle_camera_to_view)
+    
+    # バックグラウンド実行（blender -b）ではヘッダーボタンとショートカットは不要
+    if bpy.app.background:
+        return
+    
     bpy.types.VIEW3D_HT_header.append(draw_viewcam_button)
     
     # キーボードショートカットを追加
@@ -164,6 +169,8 @@ def unregister():
     """アドオン登録解除"""
     bpy.utils.unregister_class(VIEWCAM_OT_set_view_to_camera)
     bpy.utils.unregister_class(VIEWCAM_OT_toggle_camera_to_view)
+    if bpy.app.background:
+        return
     bpy.types.VIEW3D_HT_header.remove(draw_viewcam_button)
     
     # キーボードショートカットを削除
@@ -1,4 +1,7 @@
 import bpy
+import json
+import os
+from bpy.app.handlers import persistent
 from bpy.types import Menu
 
 bl_info = {
@@ -11,65 +14,62 @@ bl_info = {
     "category": "3D View"
 }
 
-# Translation dictionary
-translations = {
-    "en_US": {
-        "Right": "Right",
-        "Left": "Left", 
-        "Bottom": "Bottom",
-        "Top": "Top",
-        "Back": "Back",
-        "Front": "Front",
-        "Camera": "Camera",
-        "Perspective/Ortho": "Perspective/Ortho",
-        "View Selected": "View Selected",
-        "View All": "View All",
-        "Center Cursor": "Center Cursor",
-        "Basic Views": "Basic Views",
-        "Perspective": "Perspective",
-        "Orthographic": "Orthographic"
-    },
-    "ja_JP": {
-        "Right": "右面",
-        "Left": "左面",
-        "Bottom": "底面", 
-        "Top": "上面",
-        "Back": "背面",
-        "Front": "前面",
-        "Camera": "カメラ",
-        "Perspective/Ortho": "透視/平行",
-        "View Selected": "選択オブジェクト表示",
-        "View All": "全体表示",
-        "Center Cursor": "カーソル中心",
-        "Basic Views": "基本ビュー",
-        "Perspective": "透視",
-        "Orthographic": "平行"
-    }
-}
+# Translations live in locale/<language>.json and are read on first use.
+# The English strings are the lookup keys, so English needs no file.
+LOCALE_DIR = os.path.join(os.path.dirname(__file__), "locale")
+
+# Loaded tables per language code
+_translation_tables = {}
+# Table for the current UI language (reset to None when the language changes)
+_active_translations = None
+
+# msgbus owner for the language preference subscriptions
+_language_owner = object()
+
+def load_translations(lang):
+    """Load the table for a language code (cached after the first call)"""
+    table = _translation_tables.get(lang)
+    if table is None:
+        try:
+            with open(os.path.join(LOCALE_DIR, f"{lang}.json"), encoding="utf-8") as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            # Unsupported language: fall back to the English keys
+            table = {}
+        _translation_tables[lang] = table
+    return table
+
+def invalidate_translations(*_args):
+    """Pick the table again on the next lookup (msgbus callback)"""
+    global _active_translations
+    _active_translations = None
 
 def get_translation(text):
     """Get translated text based on current language and UI translation setting"""
-    prefs = bpy.context.preferences.view
-    
-    # Check if translation is enabled in UI
-    if not prefs.use_translate_interface:
+    global _active_translations
+    table = _active_translations
+    if table is None:
+        prefs = bpy.context.preferences.view
         # If translation is disabled, always use English
-        return translations.get('en_US', {}).get(text, text)
-    
-    # If translation is enabled, check the system language
-    lang = prefs.language
-    
-    # Map Blender language codes to our translation keys
-    lang_map = {
-        'ja_JP': 'ja_JP',
-        'DEFAULT': 'en_US'
-    }
-    
-    # Get the appropriate language key
-    lang_key = lang_map.get(lang, 'en_US')
-    
-    # Return translated text or original if not found
-    return translations.get(lang_key, {}).get(text, text)
+        lang = prefs.language if prefs.use_translate_interface else 'en_US'
+        table = _active_translations = load_translations(lang)
+    return table.get(text, text)
+
+def subscribe_language_changes():
+    """Invalidate the active table when the UI language settings change"""
+    for prop in ("language", "use_translate_interface"):
+        bpy.msgbus.subscribe_rna(
+            key=(bpy.types.PreferencesView, prop),
+            owner=_language_owner,
+            args=(),
+            notify=invalidate_translations,
+        )
+
+@persistent
+def resubscribe_language_changes(*_args):
+    """load_post handler: loading a file clears every msgbus subscription"""
+    invalidate_translations()
+    subscribe_language_changes()
 
 class VIEWPIE_OT_set_view(bpy.types.Operator):
     """Set 3D viewport to specific view"""
@@ -243,9 +243,17 @@ def register():
     bpy.utils.register_class(VIEWPIE_OT_set_view)
     bpy.utils.register_class(VIEWPIE_OT_toggle_projection)
     bpy.utils.register_class(VIEWPIE_OT_call_pie_menu)
+    
+    # Pie menus, shortcuts and label translations are UI-only; skip them under blender -b
+    if bpy.app.background:
+        return
+    
     bpy.utils.register_class(VIEWPIE_MT_pie_menu)
     bpy.utils.register_class(VIEWPIE_MT_pie_menu_extended)
     
+    subscribe_language_changes()
+    bpy.app.handlers.load_post.append(resubscribe_language_changes)
+    
     # Add keymap
     wm = bpy.context.window_manager
     if wm.keyconfigs.addon:
@@ -275,9 +283,16 @@ def unregister():
     bpy.utils.unregister_class(VIEWPIE_OT_set_view)
     bpy.utils.unregister_class(VIEWPIE_OT_toggle_projection)
     bpy.utils.unregister_class(VIEWPIE_OT_call_pie_menu)
+    if bpy.app.background:
+        return
     bpy.utils.unregister_class(VIEWPIE_MT_pie_menu)
     bpy.utils.unregister_class(VIEWPIE_MT_pie_menu_extended)
     
+    if resubscribe_language_changes in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(resubscribe_language_changes)
+    bpy.msgbus.clear_by_owner(_language_owner)
+    invalidate_translations()
+    
     # Remove keymap
     for km, kmi in addon_keymaps:
         km.keymap_items.remove(kmi)
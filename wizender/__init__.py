@@ -182,12 +182,21 @@ def auto_render_on_save(dummy):
 # 登録クラス一覧
 classes = (
     WIZENDER_AddonPreferences,
-    WIZENDER_PT_output_panel,
     WIZENDER_OT_set_settings,
 )
 
+# UI のみのクラス（バックグラウンド実行では登録しない）
+ui_classes = (
+    WIZENDER_PT_output_panel,
+)
+
+def get_classes():
+    if bpy.app.background:
+        return classes
+    return classes + ui_classes
+
 def register():
-    for cls in classes:
+    for cls in get_classes():
         bpy.utils.register_class(cls)
 
     if auto_render_on_save not in bpy.app.handlers.save_post:
@@ -195,7 +204,7 @@ def register():
         print("[Wizender] Save handler registered.")
 
 def unregister():
-    for cls in reversed(classes):
+    for cls in reversed(get_classes()):
         bpy.utils.unregister_class(cls)
 
     if auto_render_on_save in bpy.app.handlers.save_post: